@@ -0,0 +1,308 @@
+import asyncio
+import base64
+import collections
+import itertools
+import os
+import threading
+import time
+import traceback
+
+# Seconds a capture thread keeps running with no stream clients before it parks
+CAMERA_IDLE_SECONDS = float(os.environ.get('CAMERA_IDLE_SECONDS', '10'))
+
+_client_ids = itertools.count(1)
+
+
+class StreamClient:
+    """
+    Pacing and delivery statistics for one stream viewer.
+
+    Frames are due on a fixed schedule derived from the client's fps cap rather
+    than after a fixed sleep, so capture and send time don't drag the rate down.
+    A client that is still sending when its next frame is due jumps straight to
+    the newest frame; the frames it missed are counted as dropped. Frames passed
+    over because of the client's own fps cap are counted as skipped.
+    """
+
+    def __init__(self, broadcaster, max_fps=None, remote_addr=None):
+        self.id = next(_client_ids)
+        self.profile = broadcaster.profile
+        self.remote_addr = remote_addr
+        self.max_fps = min(max_fps or broadcaster.framerate, broadcaster.framerate)
+        self.interval = 1.0 / self.max_fps
+        self.connected_at = time.time()
+        self.last_sequence = 0
+        self.next_due = time.monotonic()
+        self.late = False
+        self.delivered = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.bytes_sent = 0
+        self.recent = collections.deque(maxlen=30)
+
+    def delay(self):
+        """Seconds to wait before the next frame is due (0 if it is already due or overdue)"""
+        now = time.monotonic()
+        # More than a whole interval behind means the client couldn't keep up
+        self.late = now - self.next_due > self.interval
+        return max(0.0, self.next_due - now)
+
+    def record(self, sequence, frame):
+        """Account for a frame about to be sent and schedule the next one"""
+        if self.last_sequence:
+            missed = max(0, sequence - self.last_sequence - 1)
+            if self.late:
+                self.dropped += missed
+            else:
+                self.skipped += missed
+
+        now = time.monotonic()
+        self.last_sequence = sequence
+        self.delivered += 1
+        self.bytes_sent += len(frame)
+        self.recent.append(now)
+
+        # Stay on the schedule, but don't try to catch up with a burst after a stall
+        self.next_due = max(self.next_due + self.interval, now - self.interval)
+
+    @property
+    def fps(self):
+        """Delivered frames per second over the last few frames"""
+        if len(self.recent) < 2:
+            return 0.0
+        elapsed = self.recent[-1] - self.recent[0]
+        return (len(self.recent) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def stats(self):
+        return {
+            'id': self.id,
+            'profile': self.profile,
+            'remote_addr': self.remote_addr,
+            'connected_seconds': round(time.time() - self.connected_at, 1),
+            'max_fps': round(self.max_fps, 2),
+            'delivered_fps': round(self.fps, 2),
+            'delivered_frames': self.delivered,
+            'dropped_frames': self.dropped,
+            'skipped_frames': self.skipped,
+            'bytes_sent': self.bytes_sent,
+        }
+
+
+class FrameBroadcaster:
+    """
+    Runs a single capture thread per camera and fans the latest encoded frame
+    out to any number of consumers.
+
+    The producer captures and encodes once per tick into a "latest frame" slot
+    guarded by a condition variable. Consumers wait for a sequence number newer
+    than the one they last saw, so slow clients simply skip to the newest frame
+    instead of queueing or holding the capture lock.
+
+    Async consumers (ASGI streams) wait on one future per event loop, so the
+    producer wakes a whole loop's worth of viewers with a single callback.
+
+    Once the last client leaves and nothing has called ``start`` for
+    ``idle_timeout`` seconds, the capture thread parks and ``on_idle`` runs so
+    the owner can release the camera; the next ``start`` picks up again. An
+    ``idle_timeout`` of None keeps capturing until ``stop``, for owners like
+    the frame bus publisher that consume frames without registering clients.
+    """
+
+    def __init__(self, camera, profile='full', capture_lock=None, idle_timeout=CAMERA_IDLE_SECONDS, on_idle=None):
+        self.camera = camera
+        self.profile = profile
+        self.capture_lock = capture_lock or threading.Lock()
+        self.idle_timeout = idle_timeout
+        self.on_idle = on_idle
+        self.last_demand = time.monotonic()
+        self.condition = threading.Condition()
+        self.frame = None
+        self.sequence = 0
+        self.timestamp = None
+        self.is_running = False
+        self.thread = None
+        self._base64_sequence = None
+        self._base64_frame = None
+        self._loop_futures = {}
+        self.clients = set()
+
+    @property
+    def framerate(self):
+        return self.camera.framerate
+
+    @property
+    def last_error(self):
+        return self.camera.last_error
+
+    def start(self):
+        """Start the camera and the capture thread if they aren't already running"""
+        with self.condition:
+            self.last_demand = time.monotonic()
+            if self.is_running and self.thread is not None and self.thread.is_alive():
+                return True
+
+            with self.capture_lock:
+                if not self.camera.start():
+                    return False
+
+            self.is_running = True
+            self.thread = threading.Thread(target=self._capture_loop, name=f'camera-capture-{self.profile}', daemon=True)
+            self.thread.start()
+            return True
+
+    def stop(self):
+        """Stop the capture thread and wake up every waiting consumer"""
+        with self.condition:
+            self.is_running = False
+            self.condition.notify_all()
+            self._notify_loops()
+            thread = self.thread
+            self.thread = None
+
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2)
+
+    def _park_if_idle(self):
+        """Stop capturing when nobody is watching; call with the condition held"""
+        if self.idle_timeout is None or self.clients or time.monotonic() - self.last_demand < self.idle_timeout:
+            return False
+        self.is_running = False
+        # Don't hand a stale frame to the next snapshot after capture resumes
+        self.frame = None
+        return True
+
+    def _capture_loop(self):
+        frame_interval = 1.0 / self.framerate
+        parked = False
+
+        while self.is_running:
+            with self.condition:
+                parked = self._park_if_idle()
+            if parked:
+                break
+
+            started = time.monotonic()
+
+            try:
+                with self.capture_lock:
+                    jpeg_frame = self.camera.get_jpeg_frame(self.profile)
+            except Exception:
+                print(f"Error in capture thread: {traceback.format_exc()}")
+                jpeg_frame = None
+
+            if jpeg_frame is None:
+                if not self.camera.is_running:
+                    break
+                time.sleep(0.1)  # Back off while the camera recovers
+                continue
+
+            with self.condition:
+                self.frame = jpeg_frame
+                self.sequence += 1
+                # Bus readers report the writer's capture time, so every worker
+                # tags the same frame with the same timestamp
+                self.timestamp = getattr(self.camera, 'last_timestamp', None) or time.time()
+                self.condition.notify_all()
+                self._notify_loops()
+
+            # Pace to the target frame rate, accounting for capture/encode time
+            elapsed = time.monotonic() - started
+            if elapsed < frame_interval:
+                time.sleep(frame_interval - elapsed)
+
+        with self.condition:
+            # A start() after parking may already own a new thread; leave it alone
+            if self.thread is threading.current_thread():
+                self.is_running = False
+                self.thread = None
+            self.condition.notify_all()
+            self._notify_loops()
+
+        if parked and self.on_idle is not None:
+            self.on_idle()
+
+    def register_client(self, max_fps=None, remote_addr=None):
+        """Track a new stream viewer so its delivery stats show up in camera_status"""
+        client = StreamClient(self, max_fps=max_fps, remote_addr=remote_addr)
+        with self.condition:
+            self.clients.add(client)
+        return client
+
+    def unregister_client(self, client):
+        with self.condition:
+            self.clients.discard(client)
+
+    def client_stats(self):
+        with self.condition:
+            clients = list(self.clients)
+        return [client.stats() for client in sorted(clients, key=lambda client: client.id)]
+
+    def _notify_loops(self):
+        """Wake every event loop with async consumers waiting; call with the condition held"""
+        for loop, future in self._loop_futures.items():
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                pass  # The loop has been closed
+        self._loop_futures = {}
+
+    def latest(self):
+        """Return (sequence, frame, timestamp) for the most recent frame"""
+        with self.condition:
+            return self.sequence, self.frame, self.timestamp
+
+    def etag(self, timestamp):
+        """Entity tag for a frame, stable across processes reading the same frame bus"""
+        return f'"{self.profile}-{int(timestamp * 1000000)}"'
+
+    def latest_base64(self):
+        """Return (sequence, base64 frame, timestamp), encoding each frame at most once"""
+        with self.condition:
+            if self.frame is not None and self._base64_sequence != self.sequence:
+                self._base64_frame = base64.b64encode(self.frame).decode('utf-8')
+                self._base64_sequence = self.sequence
+            return self.sequence, self._base64_frame, self.timestamp
+
+    def wait_for_frame(self, last_sequence=0, timeout=None):
+        """
+        Block until a frame newer than ``last_sequence`` is available.
+
+        Returns (sequence, frame, timestamp); frame is None if the timeout
+        expired or the producer stopped before a new frame arrived.
+        """
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.sequence > last_sequence or not self.is_running,
+                timeout=timeout
+            )
+            if self.sequence > last_sequence:
+                return self.sequence, self.frame, self.timestamp
+            return self.sequence, None, self.timestamp
+
+    async def wait_for_frame_async(self, last_sequence=0, timeout=None):
+        """Async version of wait_for_frame for consumers running on an event loop"""
+        loop = asyncio.get_running_loop()
+
+        with self.condition:
+            future = None
+            if self.sequence <= last_sequence and self.is_running:
+                future = self._loop_futures.get(loop)
+                if future is None:
+                    future = self._loop_futures[loop] = loop.create_future()
+
+        if future is not None:
+            try:
+                # Shield the shared future so one consumer timing out doesn't cancel it for the rest
+                await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        with self.condition:
+            if self.sequence > last_sequence:
+                return self.sequence, self.frame, self.timestamp
+            return self.sequence, None, self.timestamp
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
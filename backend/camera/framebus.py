@@ -0,0 +1,215 @@
+import os
+import mmap
+import struct
+import time
+
+# Publish frames through a shared-memory ring buffer written by `manage.py camera`
+CAMERA_FRAME_BUS = os.environ.get('CAMERA_FRAME_BUS', 'false').lower() == 'true'
+CAMERA_FRAME_BUS_PATH = os.environ.get('CAMERA_FRAME_BUS_PATH', '/dev/shm/xenolab-camera')
+CAMERA_FRAME_BUS_SLOTS = int(os.environ.get('CAMERA_FRAME_BUS_SLOTS', '4'))
+CAMERA_FRAME_BUS_SLOT_SIZE = int(os.environ.get('CAMERA_FRAME_BUS_SLOT_SIZE', str(2 * 1024 * 1024)))
+
+# File layout:
+#   header: magic, version, slot count, slot size, framerate, writer pid, latest sequence
+#   slots:  sequence, timestamp, length, then up to `slot size` bytes of JPEG data
+MAGIC = b'XLFB'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIIIQ')
+SEQUENCE = struct.Struct('<Q')
+SEQUENCE_OFFSET = HEADER.size - SEQUENCE.size
+HEADER_SIZE = 64
+SLOT_HEADER = struct.Struct('<QdI')
+SLOT_HEADER_SIZE = 24
+
+# How long a reader waits without a new frame before treating the writer as gone
+STALE_AFTER = 5.0
+
+
+def bus_path(profile, path=CAMERA_FRAME_BUS_PATH):
+    """Each stream profile gets its own bus file; the full profile keeps the base path"""
+    return path if profile == 'full' else f"{path}-{profile}"
+
+
+class FrameBusWriter:
+    """
+    Single-writer side of the frame bus.
+
+    Each frame goes into slot ``sequence % slots``. The slot sequence is cleared
+    before the payload is written and set afterwards, so readers can detect a
+    slot that was overwritten while they were copying it (a seqlock).
+    """
+
+    def __init__(self, path=CAMERA_FRAME_BUS_PATH, slots=CAMERA_FRAME_BUS_SLOTS, slot_size=CAMERA_FRAME_BUS_SLOT_SIZE, framerate=30):
+        self.path = path
+        self.slots = slots
+        self.slot_size = slot_size
+        self.framerate = framerate
+        self.sequence = 0
+        self.buffer = None
+
+    @property
+    def size(self):
+        return HEADER_SIZE + self.slots * (SLOT_HEADER_SIZE + self.slot_size)
+
+    def open(self):
+        """Create the bus file and atomically swap it into place"""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_CREAT | os.O_TRUNC | os.O_RDWR, 0o644)
+        try:
+            os.ftruncate(fd, self.size)
+            self.buffer = mmap.mmap(fd, self.size)
+        finally:
+            os.close(fd)
+
+        self.buffer[:HEADER.size] = HEADER.pack(
+            MAGIC, VERSION, self.slots, self.slot_size, self.framerate, os.getpid(), 0
+        )
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def publish(self, frame, timestamp=None):
+        """Write an encoded frame into the next slot and return its sequence"""
+        if len(frame) > self.slot_size:
+            print(f"Frame of {len(frame)} bytes exceeds frame bus slot size {self.slot_size}; dropping")
+            return None
+
+        self.sequence += 1
+        offset = HEADER_SIZE + (self.sequence % self.slots) * (SLOT_HEADER_SIZE + self.slot_size)
+        data_offset = offset + SLOT_HEADER_SIZE
+
+        # Invalidate the slot, write the payload, then publish the sequence
+        self.buffer[offset:offset + SEQUENCE.size] = SEQUENCE.pack(0)
+        self.buffer[data_offset:data_offset + len(frame)] = frame
+        self.buffer[offset:offset + SLOT_HEADER.size] = SLOT_HEADER.pack(
+            self.sequence, timestamp or time.time(), len(frame)
+        )
+        self.buffer[SEQUENCE_OFFSET:HEADER.size] = SEQUENCE.pack(self.sequence)
+        return self.sequence
+
+
+class FrameBusReader:
+    """
+    Reader side of the frame bus, usable as a frame source for FrameBroadcaster.
+
+    Each HTTP worker copies a frame out of shared memory once; the in-process
+    broadcaster then hands that same bytes object to every client.
+    """
+
+    def __init__(self, path=CAMERA_FRAME_BUS_PATH, framerate=30):
+        self.path = path
+        self.framerate = framerate
+        self.is_running = False
+        self.last_error = None
+        self.buffer = None
+        self.inode = None
+        self.slots = 0
+        self.slot_size = 0
+        self.writer_pid = None
+        self.last_sequence = 0
+        self.last_timestamp = None
+
+    def start(self):
+        if self.is_running:
+            return True
+
+        if not self._open():
+            return False
+
+        self.is_running = True
+        self.last_error = None
+        return True
+
+    def stop(self):
+        self.is_running = False
+        self._close()
+
+    def _open(self):
+        self._close()
+        try:
+            with open(self.path, 'rb') as f:
+                self.inode = os.fstat(f.fileno()).st_ino
+                self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError) as e:
+            self.last_error = f"Frame bus {self.path} not available ({e}). Is `manage.py camera` running?"
+            return False
+
+        magic, version, self.slots, self.slot_size, framerate, self.writer_pid, _ = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            self.last_error = f"Frame bus {self.path} has an unexpected header"
+            self._close()
+            return False
+
+        self.framerate = framerate or self.framerate
+        self.last_sequence = 0
+        return True
+
+    def _close(self):
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+
+    def _writer_replaced(self):
+        try:
+            return os.stat(self.path).st_ino != self.inode
+        except FileNotFoundError:
+            return True
+
+    def latest_sequence(self):
+        return SEQUENCE.unpack_from(self.buffer, SEQUENCE_OFFSET)[0]
+
+    def read(self, sequence):
+        """Copy the frame for ``sequence`` out of its slot, or None if it was overwritten"""
+        offset = HEADER_SIZE + (sequence % self.slots) * (SLOT_HEADER_SIZE + self.slot_size)
+        slot_sequence, timestamp, length = SLOT_HEADER.unpack_from(self.buffer, offset)
+        if slot_sequence != sequence:
+            return None, None
+
+        data_offset = offset + SLOT_HEADER_SIZE
+        frame = self.buffer[data_offset:data_offset + length]
+
+        # Make sure the writer didn't lap us while we were copying
+        if SEQUENCE.unpack_from(self.buffer, offset)[0] != sequence:
+            return None, None
+        return frame, timestamp
+
+    def get_jpeg_frame(self, profile=None, timeout=1.0):
+        """Wait for the next published frame; returns None if none arrived in time"""
+        if not self.is_running:
+            return None
+
+        deadline = time.monotonic() + timeout
+        poll_interval = 1.0 / (self.framerate * 4)
+
+        while self.is_running:
+            if self.buffer is None and not self._open():
+                time.sleep(poll_interval)
+            else:
+                sequence = self.latest_sequence()
+                if sequence < self.last_sequence:
+                    # Writer restarted with a fresh bus file
+                    self.last_sequence = 0
+                if sequence > self.last_sequence:
+                    frame, timestamp = self.read(sequence)
+                    if frame is not None:
+                        self.last_sequence = sequence
+                        self.last_timestamp = timestamp
+                        self.last_error = None
+                        return frame
+                time.sleep(poll_interval)
+
+            if time.monotonic() >= deadline:
+                break
+
+        if self.buffer is not None and self._writer_replaced():
+            self._open()
+        elif self.last_timestamp is not None and time.time() - self.last_timestamp > STALE_AFTER:
+            self.last_error = f"No frames published to {self.path} for {time.time() - self.last_timestamp:.0f}s"
+        return None
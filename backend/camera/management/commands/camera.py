@@ -0,0 +1,94 @@
+from django.core.management.base import BaseCommand
+
+from camera.broadcaster import FrameBroadcaster
+from camera.framebus import FrameBusWriter, bus_path, CAMERA_FRAME_BUS_PATH, CAMERA_FRAME_BUS_SLOTS, CAMERA_FRAME_BUS_SLOT_SIZE
+from camera.motion import MotionMonitor, CAMERA_MOTION_DETECTION, CAMERA_MOTION_SNAPSHOTS
+from camera.timelapse import TimelapseRecorder, CAMERA_TIMELAPSE, CAMERA_TIMELAPSE_PROFILE, CAMERA_TIMELAPSE_INTERVAL
+from camera.stream import create_camera, PROFILES
+
+import argparse
+import loguru
+import signal
+import threading
+import time
+
+
+class Command(BaseCommand):
+    help = 'Own the camera and publish encoded frames to the shared-memory frame bus for the HTTP workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=CAMERA_FRAME_BUS_PATH, help='Frame bus file (ideally on tmpfs)')
+        parser.add_argument('--slots', type=int, default=CAMERA_FRAME_BUS_SLOTS, help='Number of ring buffer slots')
+        parser.add_argument('--slot-size', type=int, default=CAMERA_FRAME_BUS_SLOT_SIZE, help='Maximum encoded frame size in bytes')
+        parser.add_argument('--timelapse', action=argparse.BooleanOptionalAction, default=CAMERA_TIMELAPSE, help='Record timelapse frames to disk')
+        parser.add_argument('--timelapse-interval', type=float, default=CAMERA_TIMELAPSE_INTERVAL, help='Seconds between timelapse frames')
+        parser.add_argument('--motion', action=argparse.BooleanOptionalAction, default=CAMERA_MOTION_DETECTION, help='Run motion detection on the lores stream')
+
+    def _terminate(self, signum, frame):
+        # Supervisor stops programs with SIGTERM; unwind the same way as Ctrl-C
+        raise KeyboardInterrupt
+
+    def _publish(self, broadcaster, writer):
+        """Copy every new frame of one profile from its broadcaster onto the bus"""
+        last_sequence = 0
+        while broadcaster.is_running:
+            sequence, frame, timestamp = broadcaster.wait_for_frame(last_sequence, timeout=1.0)
+            if frame is None:
+                continue
+            last_sequence = sequence
+            writer.publish(frame, timestamp)
+
+    def handle(self, *args, **options):
+        signal.signal(signal.SIGTERM, self._terminate)
+
+        camera = create_camera()
+        capture_lock = threading.Lock()
+        broadcasters = []
+        writers = []
+        monitor = None
+        recorder = None
+
+        try:
+            for profile in PROFILES:
+                # Publishing never registers a stream client, so never park for idleness
+                broadcaster = FrameBroadcaster(camera, profile=profile, capture_lock=capture_lock, idle_timeout=None)
+                if not broadcaster.start():
+                    loguru.logger.error(f"Failed to start camera: {camera.last_error}")
+                    return
+                broadcasters.append(broadcaster)
+
+                writer = FrameBusWriter(bus_path(profile, options['path']), options['slots'], options['slot_size'], framerate=camera.framerate)
+                writer.open()
+                writers.append(writer)
+
+                threading.Thread(target=self._publish, args=(broadcaster, writer), name=f'publish-{profile}', daemon=True).start()
+                width, height = camera.profile_resolution(profile)
+                loguru.logger.info(f"Publishing {profile} {width}x{height} @ {camera.framerate}fps to {writer.path}")
+
+            if options['motion']:
+                snapshots = broadcasters[list(PROFILES).index('thumb')] if CAMERA_MOTION_SNAPSHOTS else None
+                monitor = MotionMonitor(camera, snapshot_broadcaster=snapshots)
+                monitor.start()
+                loguru.logger.info(f"Motion detection running at {monitor.fps}fps")
+
+            if options['timelapse']:
+                recorder = TimelapseRecorder(broadcasters[list(PROFILES).index(CAMERA_TIMELAPSE_PROFILE)], interval=options['timelapse_interval'])
+                recorder.start()
+                loguru.logger.info(f"Recording {CAMERA_TIMELAPSE_PROFILE} timelapse every {recorder.interval}s to {recorder.writer.directory}")
+
+            while all(broadcaster.is_running for broadcaster in broadcasters):
+                time.sleep(1)
+
+            loguru.logger.error(f"Capture stopped: {camera.last_error}")
+        except KeyboardInterrupt:
+            loguru.logger.info("Camera publisher stopped")
+        finally:
+            if monitor is not None:
+                monitor.stop()
+            if recorder is not None:
+                recorder.stop()
+            for broadcaster in broadcasters:
+                broadcaster.stop()
+            camera.stop()
+            for writer in writers:
+                writer.close()
@@ -0,0 +1,108 @@
+from django.core.management.base import BaseCommand
+
+from camera.motion import MotionDetector
+from camera.stream import create_camera, CAMERA_JPEG_QUALITY
+
+import time
+
+
+class Command(BaseCommand):
+    help = 'Benchmark frames/s and CPU time per frame for each camera encoding path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--frames', type=int, default=100, help='Frames to capture per encoder')
+        parser.add_argument('--encoders', default='pil,jpeg,mjpeg', help='Comma separated encoders to compare')
+        parser.add_argument('--quality', type=int, default=CAMERA_JPEG_QUALITY, help='JPEG quality')
+        parser.add_argument('--mock-pool', type=int, default=0, help='Mock frame pool size; 0 renders and encodes every frame so encoders can be compared')
+        parser.add_argument('--motion', action='store_true', help='Benchmark motion detection on lores frames instead of encoding')
+
+    def handle_motion(self, options):
+        camera = create_camera(mock_pool_size=options['mock_pool'] or None)
+        if not camera.start():
+            self.stdout.write(self.style.ERROR(f"Failed to start camera: {camera.last_error}"))
+            return
+
+        try:
+            # Grab the frames up front so only the detector itself is timed
+            grays = []
+            capture_start = time.perf_counter()
+            for _ in range(options['frames']):
+                if camera.mock_mode:
+                    camera.get_jpeg_frame('thumb')  # Advance the mock pool
+                gray = camera.get_gray_array()
+                if gray is not None:
+                    grays.append(gray.copy())
+            capture = time.perf_counter() - capture_start
+        finally:
+            camera.stop()
+
+        if not grays:
+            self.stdout.write(self.style.ERROR(f"No lores frames captured: {camera.last_error}"))
+            return
+
+        detector = MotionDetector()
+        detector.process(grays[0])  # Seed the background and buffers
+
+        events = 0
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        for gray in grays:
+            if detector.process(gray) is not None:
+                events += 1
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+
+        height, width = grays[0].shape
+        mode = 'mock' if camera.mock_mode else 'hardware'
+        self.stdout.write(f"Motion detection benchmark ({mode}, {len(grays)} frames of {width}x{height}, downscale {detector.downscale})")
+        self.stdout.write(f"{'lores capture ms/frame':<28}{capture / len(grays) * 1000:>10.2f}")
+        self.stdout.write(f"{'detector ms/frame':<28}{wall / len(grays) * 1000:>10.3f}")
+        self.stdout.write(f"{'detector cpu ms/frame':<28}{cpu / len(grays) * 1000:>10.3f}")
+        self.stdout.write(f"{'frames with motion':<28}{events:>10}")
+
+    def handle(self, *args, **options):
+        if options['motion']:
+            return self.handle_motion(options)
+
+        results = []
+
+        for encoder in options['encoders'].split(','):
+            camera = create_camera(encoder=encoder, quality=options['quality'], mock_pool_size=options['mock_pool'])
+            if not camera.start():
+                self.stdout.write(self.style.ERROR(f"{encoder}: failed to start camera: {camera.last_error}"))
+                continue
+
+            try:
+                # Let the pipeline settle before timing it
+                for _ in range(5):
+                    camera.get_jpeg_frame()
+
+                frames = 0
+                total_bytes = 0
+                wall_start = time.perf_counter()
+                # process_time covers every thread, including picamera2's encoder threads
+                cpu_start = time.process_time()
+
+                for _ in range(options['frames']):
+                    frame = camera.get_jpeg_frame()
+                    if frame is not None:
+                        frames += 1
+                        total_bytes += len(frame)
+
+                wall = time.perf_counter() - wall_start
+                cpu = time.process_time() - cpu_start
+            finally:
+                camera.stop()
+
+            if frames == 0:
+                self.stdout.write(self.style.ERROR(f"{encoder}: no frames captured: {camera.last_error}"))
+                continue
+
+            path = encoder if camera.mock_mode or camera.encoder_active or encoder == 'pil' else f"{encoder} (fell back to pil)"
+            results.append((path, frames / wall, cpu / frames * 1000, total_bytes / frames / 1024))
+
+        mode = 'mock' if create_camera().mock_mode else 'hardware'
+        self.stdout.write(f"Camera encoding benchmark ({mode}, {options['frames']} frames, quality {options['quality']})")
+        self.stdout.write(f"{'encoder':<24}{'frames/s':>10}{'cpu ms/frame':>14}{'KiB/frame':>11}")
+        for path, fps, cpu_ms, kib in results:
+            self.stdout.write(f"{path:<24}{fps:>10.1f}{cpu_ms:>14.2f}{kib:>11.1f}")
@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand
+
+from urllib.parse import urlsplit
+
+import asyncio
+import statistics
+import time
+
+
+class Command(BaseCommand):
+    help = 'Load test the MJPEG stream endpoint by holding many concurrent viewer connections open'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/camera/stream/', help='Stream URL to connect to')
+        parser.add_argument('--clients', type=int, default=200, help='Concurrent stream connections')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds to hold each connection open')
+        parser.add_argument('--ramp', type=float, default=2.0, help='Seconds over which to open the connections')
+
+    async def _viewer(self, index, url, duration, ramp, clients):
+        """Open one stream connection and count the frame boundaries received"""
+        await asyncio.sleep(ramp * index / clients)
+
+        frames = 0
+        received = 0
+        connected = None
+        started = time.monotonic()
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(url.hostname, url.port or 80), timeout=10)
+            path = url.path + (f"?{url.query}" if url.query else '')
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {url.netloc}\r\nConnection: close\r\n\r\n".encode())
+            await writer.drain()
+
+            deadline = started + duration
+            tail = b''
+            while time.monotonic() < deadline:
+                chunk = await asyncio.wait_for(reader.read(65536), timeout=max(0.1, deadline - time.monotonic()))
+                if not chunk:
+                    break
+                if connected is None:
+                    connected = time.monotonic() - started
+                received += len(chunk)
+                # Keep a little of the previous chunk so boundaries split across reads are counted
+                data = tail + chunk
+                frames += data.count(b'--frame\r\n') - tail.count(b'--frame\r\n')
+                tail = data[-16:]
+
+            writer.close()
+            return {'ok': True, 'frames': frames, 'bytes': received, 'connect': connected, 'elapsed': time.monotonic() - started}
+        except (asyncio.TimeoutError, OSError) as e:
+            if connected is not None:
+                return {'ok': True, 'frames': frames, 'bytes': received, 'connect': connected, 'elapsed': time.monotonic() - started}
+            return {'ok': False, 'error': str(e) or type(e).__name__}
+
+    async def _run(self, url, clients, duration, ramp):
+        return await asyncio.gather(*[
+            self._viewer(index, url, duration, ramp, clients) for index in range(clients)
+        ])
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        clients = options['clients']
+
+        self.stdout.write(f"Opening {clients} stream connections to {options['url']} for {options['duration']:.0f}s")
+        results = asyncio.run(self._run(url, clients, options['duration'], options['ramp']))
+
+        ok = [result for result in results if result['ok'] and result['frames'] > 0]
+        failed = len(results) - len(ok)
+
+        if not ok:
+            errors = {result.get('error') for result in results if not result['ok']}
+            self.stdout.write(self.style.ERROR(f"No connection received frames ({', '.join(filter(None, errors)) or 'empty streams'})"))
+            return
+
+        fps = [result['frames'] / result['elapsed'] for result in ok]
+        connect = [result['connect'] * 1000 for result in ok]
+        total_bytes = sum(result['bytes'] for result in ok)
+
+        self.stdout.write(f"connections receiving frames: {len(ok)}/{clients} ({failed} failed)")
+        self.stdout.write(f"frames/s per client:        min {min(fps):.1f}  median {statistics.median(fps):.1f}  max {max(fps):.1f}")
+        self.stdout.write(f"time to first byte:         median {statistics.median(connect):.0f}ms  max {max(connect):.0f}ms")
+        self.stdout.write(f"aggregate throughput:       {total_bytes / options['duration'] / 1024 / 1024:.1f} MiB/s")
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MotionEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('score', models.FloatField(help_text='Fraction of the frame that changed')),
+                ('x', models.IntegerField(help_text='Left edge of the motion bounding box in lores pixels')),
+                ('y', models.IntegerField(help_text='Top edge of the motion bounding box in lores pixels')),
+                ('width', models.IntegerField(help_text='Width of the motion bounding box in lores pixels')),
+                ('height', models.IntegerField(help_text='Height of the motion bounding box in lores pixels')),
+                ('snapshot', models.CharField(blank=True, default='', help_text='Path of the JPEG that triggered the event', max_length=255)),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('camera', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='motionevent',
+            index=models.Index(fields=['-timestamp'], name='motionevent_timestamp_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import models
+from django.utils import timezone
+
+
+class MotionEvent(models.Model):
+    """
+    Model representing motion detected in the camera's lores stream
+    """
+    
+    timestamp = models.DateTimeField(default=timezone.now)
+    score = models.FloatField(help_text="Fraction of the frame that changed")
+    
+    x = models.IntegerField(help_text="Left edge of the motion bounding box in lores pixels")
+    y = models.IntegerField(help_text="Top edge of the motion bounding box in lores pixels")
+    width = models.IntegerField(help_text="Width of the motion bounding box in lores pixels")
+    height = models.IntegerField(help_text="Height of the motion bounding box in lores pixels")
+    
+    snapshot = models.CharField(max_length=255, blank=True, default='', help_text="Path of the JPEG that triggered the event")
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-timestamp'], name='motionevent_timestamp_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Motion: score={self.score:.3f} at ({self.x}, {self.y}, {self.width}x{self.height}) at {self.timestamp}"
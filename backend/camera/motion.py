@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+import traceback
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from camera.models import MotionEvent
+
+# Motion detection runs in the capture process (`manage.py camera --motion`)
+CAMERA_MOTION_DETECTION = os.environ.get('CAMERA_MOTION_DETECTION', 'false').lower() == 'true'
+CAMERA_MOTION_FPS = float(os.environ.get('CAMERA_MOTION_FPS', '10'))
+# Every Nth pixel of the lores luma plane is analysed
+CAMERA_MOTION_DOWNSCALE = int(os.environ.get('CAMERA_MOTION_DOWNSCALE', '4'))
+# Per-pixel brightness change (0-255) that counts as motion
+CAMERA_MOTION_THRESHOLD = float(os.environ.get('CAMERA_MOTION_THRESHOLD', '25'))
+# Fraction of the frame that has to change before an event is emitted
+CAMERA_MOTION_MIN_AREA = float(os.environ.get('CAMERA_MOTION_MIN_AREA', '0.01'))
+# Minimum seconds between two recorded events
+CAMERA_MOTION_COOLDOWN = float(os.environ.get('CAMERA_MOTION_COOLDOWN', '5'))
+CAMERA_MOTION_SNAPSHOTS = os.environ.get('CAMERA_MOTION_SNAPSHOTS', 'true').lower() == 'true'
+CAMERA_MOTION_SNAPSHOT_DIR = os.environ.get('CAMERA_MOTION_SNAPSHOT_DIR', str(settings.BASE_DIR / 'motion'))
+
+
+class MotionDetector:
+    """
+    Background-subtraction motion detector working on greyscale NumPy arrays.
+
+    The background is an exponential moving average of previous frames. Each
+    frame is subsampled, compared against it, and the changed pixels give a
+    score (fraction of the frame) and a bounding box in input coordinates.
+    """
+
+    def __init__(self, downscale=CAMERA_MOTION_DOWNSCALE, threshold=CAMERA_MOTION_THRESHOLD, min_area=CAMERA_MOTION_MIN_AREA, learning_rate=0.05):
+        self.downscale = downscale
+        self.threshold = threshold
+        self.min_area = min_area
+        self.learning_rate = learning_rate
+        self.background = None
+        self.frame = None
+        self.diff = None
+
+    def reset(self):
+        self.background = None
+
+    def process(self, gray):
+        """Return (score, (x, y, width, height)) if the frame shows motion, otherwise None"""
+        small = gray[::self.downscale, ::self.downscale]
+
+        if self.background is None or self.background.shape != small.shape:
+            self.background = small.astype(np.float32)
+            self.frame = np.empty_like(self.background)
+            self.diff = np.empty_like(self.background)
+            return None
+
+        # Work in preallocated buffers so a frame costs no allocations
+        np.copyto(self.frame, small, casting='unsafe')
+        np.subtract(self.frame, self.background, out=self.diff)
+        np.abs(self.diff, out=self.diff)
+        mask = self.diff > self.threshold
+
+        # Fold the frame into the background: bg += rate * (frame - bg)
+        self.background *= 1.0 - self.learning_rate
+        self.background += self.learning_rate * self.frame
+
+        score = float(np.count_nonzero(mask)) / mask.size
+        if score < self.min_area:
+            return None
+
+        rows = np.flatnonzero(mask.any(axis=1))
+        cols = np.flatnonzero(mask.any(axis=0))
+        x, y = int(cols[0]) * self.downscale, int(rows[0]) * self.downscale
+        width = (int(cols[-1]) + 1) * self.downscale - x
+        height = (int(rows[-1]) + 1) * self.downscale - y
+        return score, (x, y, width, height)
+
+
+class MotionMonitor:
+    """
+    Thread that samples the lores stream at CAMERA_MOTION_FPS, runs the detector
+    and records MotionEvents. It reads raw lores arrays straight from the camera,
+    so the main encode path is untouched; snapshots reuse the thumb broadcaster's
+    already-encoded JPEG.
+    """
+
+    def __init__(self, camera, detector=None, fps=CAMERA_MOTION_FPS, cooldown=CAMERA_MOTION_COOLDOWN, snapshot_broadcaster=None, snapshot_dir=CAMERA_MOTION_SNAPSHOT_DIR):
+        self.camera = camera
+        self.detector = detector or MotionDetector()
+        self.fps = fps
+        self.cooldown = cooldown
+        self.snapshot_broadcaster = snapshot_broadcaster
+        self.snapshot_dir = snapshot_dir
+        self.is_running = False
+        self.thread = None
+        self.last_event = 0.0
+        self.frames = 0
+        self.events = 0
+
+    def start(self):
+        if self.snapshot_broadcaster is not None:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+        self.is_running = True
+        self.thread = threading.Thread(target=self._run, name='camera-motion', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.is_running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    def _run(self):
+        interval = 1.0 / self.fps
+
+        try:
+            while self.is_running and self.camera.is_running:
+                started = time.monotonic()
+
+                gray = self.camera.get_gray_array()
+                if gray is not None:
+                    self.frames += 1
+                    motion = self.detector.process(gray)
+                    if motion is not None and time.monotonic() - self.last_event >= self.cooldown:
+                        self.last_event = time.monotonic()
+                        self._record(*motion)
+
+                elapsed = time.monotonic() - started
+                if elapsed < interval:
+                    time.sleep(interval - elapsed)
+        finally:
+            # This thread's database connection isn't managed by a request cycle
+            connection.close()
+
+    def _record(self, score, box):
+        x, y, width, height = box
+        timestamp = timezone.now()
+        snapshot = ''
+
+        try:
+            if self.snapshot_broadcaster is not None:
+                _, jpeg_frame, _ = self.snapshot_broadcaster.latest()
+                if jpeg_frame is not None:
+                    snapshot = os.path.join(self.snapshot_dir, f"motion-{timestamp.strftime('%Y%m%d-%H%M%S-%f')}.jpg")
+                    with open(snapshot, 'wb') as f:
+                        f.write(jpeg_frame)
+
+            MotionEvent.objects.create(
+                timestamp=timestamp,
+                score=score,
+                x=x,
+                y=y,
+                width=width,
+                height=height,
+                snapshot=snapshot
+            )
+            self.events += 1
+            print(f"Motion detected: score={score:.3f} box=({x}, {y}, {width}x{height})")
+        except Exception:
+            print(f"Error recording motion event: {traceback.format_exc()}")
@@ -0,0 +1,308 @@
+import os
+import bisect
+import struct
+import threading
+import time
+import traceback
+
+from django.conf import settings
+
+# Timelapse recording runs in the capture process (`manage.py camera --timelapse`)
+CAMERA_TIMELAPSE = os.environ.get('CAMERA_TIMELAPSE', 'false').lower() == 'true'
+CAMERA_TIMELAPSE_DIR = os.environ.get('CAMERA_TIMELAPSE_DIR', str(settings.BASE_DIR / 'timelapse'))
+CAMERA_TIMELAPSE_PROFILE = os.environ.get('CAMERA_TIMELAPSE_PROFILE', 'full')
+# Seconds between recorded frames
+CAMERA_TIMELAPSE_INTERVAL = float(os.environ.get('CAMERA_TIMELAPSE_INTERVAL', '60'))
+# A segment is closed when it reaches either bound
+CAMERA_TIMELAPSE_SEGMENT_BYTES = int(os.environ.get('CAMERA_TIMELAPSE_SEGMENT_BYTES', str(64 * 1024 * 1024)))
+CAMERA_TIMELAPSE_SEGMENT_SECONDS = float(os.environ.get('CAMERA_TIMELAPSE_SEGMENT_SECONDS', str(24 * 60 * 60)))
+# Frames are buffered in memory and written in batches to spare the SD card
+CAMERA_TIMELAPSE_FLUSH_FRAMES = int(os.environ.get('CAMERA_TIMELAPSE_FLUSH_FRAMES', '10'))
+CAMERA_TIMELAPSE_FLUSH_SECONDS = float(os.environ.get('CAMERA_TIMELAPSE_FLUSH_SECONDS', '600'))
+# Retention: closed segments are deleted once older than this or over the size budget
+CAMERA_TIMELAPSE_MAX_AGE_DAYS = float(os.environ.get('CAMERA_TIMELAPSE_MAX_AGE_DAYS', '90'))
+CAMERA_TIMELAPSE_MAX_BYTES = int(os.environ.get('CAMERA_TIMELAPSE_MAX_BYTES', str(8 * 1024 * 1024 * 1024)))
+
+# A segment is a pair of append-only files named after its first frame's time:
+#   <start>.mjpg  concatenated JPEG frames
+#   <start>.idx   one fixed-size record per frame: timestamp, offset, length
+# The index is written after the frame data, so every indexed frame is complete.
+INDEX_RECORD = struct.Struct('<dQI')
+DATA_SUFFIX = '.mjpg'
+INDEX_SUFFIX = '.idx'
+
+
+def _segment_name(timestamp):
+    return f"{int(timestamp * 1000000):020d}"
+
+
+class TimelapseWriter:
+    """
+    Appends frames to the newest segment of a timelapse directory.
+
+    Frames are buffered and written with one write per file per batch; a new
+    segment is started on open, so existing files are never modified.
+    """
+
+    def __init__(self, directory=CAMERA_TIMELAPSE_DIR, segment_bytes=CAMERA_TIMELAPSE_SEGMENT_BYTES, segment_seconds=CAMERA_TIMELAPSE_SEGMENT_SECONDS,
+                 flush_frames=CAMERA_TIMELAPSE_FLUSH_FRAMES, flush_seconds=CAMERA_TIMELAPSE_FLUSH_SECONDS,
+                 max_age_days=CAMERA_TIMELAPSE_MAX_AGE_DAYS, max_bytes=CAMERA_TIMELAPSE_MAX_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.flush_frames = flush_frames
+        self.flush_seconds = flush_seconds
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self.segment = None
+        self.segment_started = None
+        self.segment_size = 0
+        self.pending = []
+        self.pending_since = None
+        self.last_timestamp = 0.0
+
+    def add(self, frame, timestamp=None):
+        """Queue a frame; it reaches the disk with the next batch"""
+        timestamp = timestamp or time.time()
+        if timestamp <= self.last_timestamp:
+            return  # Timestamps within the store are strictly increasing
+        self.last_timestamp = timestamp
+
+        if not self.pending:
+            self.pending_since = time.monotonic()
+        self.pending.append((timestamp, frame))
+
+        if len(self.pending) >= self.flush_frames or time.monotonic() - self.pending_since >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+
+        first_timestamp = self.pending[0][0]
+        if (self.segment is None
+                or self.segment_size >= self.segment_bytes
+                or first_timestamp - self.segment_started >= self.segment_seconds):
+            self._roll(first_timestamp)
+
+        data = bytearray()
+        index = bytearray()
+        for timestamp, frame in self.pending:
+            index += INDEX_RECORD.pack(timestamp, self.segment_size + len(data), len(frame))
+            data += frame
+
+        base = os.path.join(self.directory, self.segment)
+        with open(base + DATA_SUFFIX, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        with open(base + INDEX_SUFFIX, 'ab') as f:
+            f.write(index)
+
+        self.segment_size += len(data)
+        self.pending = []
+
+    def _roll(self, timestamp):
+        os.makedirs(self.directory, exist_ok=True)
+        self.segment = _segment_name(timestamp)
+        self.segment_started = timestamp
+        self.segment_size = 0
+        self.prune()
+
+    def prune(self):
+        """Delete the oldest closed segments that are past the age or size budget"""
+        segments = TimelapseStore(self.directory).segments()
+        closed = [segment for segment in segments if segment.name != self.segment]
+        total = sum(segment.size for segment in segments)
+        cutoff = time.time() - self.max_age_days * 24 * 60 * 60
+
+        for segment in closed:
+            if segment.start >= cutoff and total <= self.max_bytes:
+                break
+            total -= segment.size
+            segment.delete()
+
+    def close(self):
+        self.flush()
+
+
+class Segment:
+    """One segment on disk; frames are located through its index, never by scanning the data"""
+
+    def __init__(self, directory, name):
+        self.name = name
+        self.start = int(name) / 1000000
+        self.data_path = os.path.join(directory, name + DATA_SUFFIX)
+        self.index_path = os.path.join(directory, name + INDEX_SUFFIX)
+
+    @property
+    def size(self):
+        try:
+            return os.path.getsize(self.data_path) + os.path.getsize(self.index_path)
+        except FileNotFoundError:
+            return 0
+
+    @property
+    def count(self):
+        try:
+            return os.path.getsize(self.index_path) // INDEX_RECORD.size
+        except FileNotFoundError:
+            return 0
+
+    def record(self, f, position):
+        f.seek(position * INDEX_RECORD.size)
+        return INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))
+
+    def bisect(self, f, timestamp, count):
+        """Position of the first frame at or after ``timestamp``"""
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if self.record(f, middle)[0] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def end(self):
+        count = self.count
+        if not count:
+            return self.start
+        with open(self.index_path, 'rb') as f:
+            return self.record(f, count - 1)[0]
+
+    def frames(self, start=None, end=None):
+        """Yield (timestamp, frame) for every frame with start <= timestamp <= end"""
+        count = self.count
+        with open(self.index_path, 'rb') as index, open(self.data_path, 'rb') as data:
+            position = self.bisect(index, start, count) if start is not None else 0
+            index.seek(position * INDEX_RECORD.size)
+            for _ in range(count - position):
+                timestamp, offset, length = INDEX_RECORD.unpack(index.read(INDEX_RECORD.size))
+                if end is not None and timestamp > end:
+                    break
+                data.seek(offset)
+                yield timestamp, data.read(length)
+
+    def frame_at(self, timestamp):
+        """Return (timestamp, frame) of the frame closest to ``timestamp``"""
+        count = self.count
+        if not count:
+            return None, None
+        with open(self.index_path, 'rb') as index:
+            position = self.bisect(index, timestamp, count)
+            candidates = [self.record(index, p) for p in (position - 1, position) if 0 <= p < count]
+        frame_timestamp, offset, length = min(candidates, key=lambda record: abs(record[0] - timestamp))
+        with open(self.data_path, 'rb') as data:
+            data.seek(offset)
+            return frame_timestamp, data.read(length)
+
+    def delete(self):
+        for path in (self.index_path, self.data_path):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+class TimelapseStore:
+    """Read side of a timelapse directory, safe to use while a writer is appending"""
+
+    def __init__(self, directory=CAMERA_TIMELAPSE_DIR):
+        self.directory = directory
+
+    def segments(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [Segment(self.directory, name[:-len(INDEX_SUFFIX)]) for name in sorted(names) if name.endswith(INDEX_SUFFIX)]
+
+    def _segments_from(self, segments, timestamp):
+        """Index of the segment that would contain ``timestamp``"""
+        starts = [segment.start for segment in segments]
+        return max(0, bisect.bisect_right(starts, timestamp) - 1)
+
+    def frames(self, start=None, end=None):
+        """Yield (timestamp, frame) in time order for the given range"""
+        segments = self.segments()
+        first = self._segments_from(segments, start) if start is not None else 0
+        for segment in segments[first:]:
+            if end is not None and segment.start > end:
+                break
+            yield from segment.frames(start, end)
+
+    def frame_at(self, timestamp):
+        """Return (timestamp, frame) of the recorded frame closest to ``timestamp``"""
+        segments = [segment for segment in self.segments() if segment.count]
+        if not segments:
+            return None, None
+
+        position = self._segments_from(segments, timestamp)
+        best = (None, None)
+        # The closest frame is in this segment or at the start of the next one
+        for segment in segments[position:position + 2]:
+            frame_timestamp, frame = segment.frame_at(timestamp)
+            if best[0] is None or abs(frame_timestamp - timestamp) < abs(best[0] - timestamp):
+                best = (frame_timestamp, frame)
+        return best
+
+    def summary(self):
+        return [
+            {
+                'start': segment.start,
+                'end': segment.end(),
+                'frames': segment.count,
+                'bytes': segment.size,
+            }
+            for segment in self.segments()
+        ]
+
+
+class TimelapseRecorder:
+    """Thread that copies the broadcaster's latest frame into a TimelapseWriter every interval"""
+
+    def __init__(self, broadcaster, writer=None, interval=CAMERA_TIMELAPSE_INTERVAL):
+        self.broadcaster = broadcaster
+        self.writer = writer or TimelapseWriter()
+        self.interval = interval
+        self.is_running = False
+        self.thread = None
+        self.frames = 0
+
+    def start(self):
+        self.is_running = True
+        self.thread = threading.Thread(target=self._run, name='camera-timelapse', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.is_running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    def _run(self):
+        next_due = time.monotonic()
+
+        try:
+            while self.is_running and self.broadcaster.is_running:
+                delay = next_due - time.monotonic()
+                if delay > 0:
+                    time.sleep(min(delay, 1.0))  # Stay responsive to stop()
+                    continue
+                # Keep the schedule, but don't burst to catch up after a stall
+                next_due = max(next_due + self.interval, time.monotonic())
+
+                _, frame, timestamp = self.broadcaster.latest()
+                if frame is None:
+                    continue
+                try:
+                    self.writer.add(frame, timestamp)
+                    self.frames += 1
+                except OSError:
+                    print(f"Error writing timelapse frame: {traceback.format_exc()}")
+        finally:
+            try:
+                self.writer.close()
+            except OSError:
+                print(f"Error flushing timelapse: {traceback.format_exc()}")
@@ -1,374 +1,127 @@
 import os
-import io
-import base64
+import asyncio
+import contextlib
 import threading
 import time
 import subprocess
 import traceback
 import sys
-from PIL import Image
 
-from django.http import StreamingHttpResponse, JsonResponse
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse, JsonResponse
+from django.utils.http import parse_etags
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 
-# Get settings from environment variables
-CAMERA_RESOLUTION_WIDTH = int(os.environ.get('CAMERA_RESOLUTION_WIDTH', '640'))
-CAMERA_RESOLUTION_HEIGHT = int(os.environ.get('CAMERA_RESOLUTION_HEIGHT', '480'))
-CAMERA_FRAMERATE = int(os.environ.get('CAMERA_FRAMERATE', '30'))
-CAMERA_ROTATION = int(os.environ.get('CAMERA_ROTATION', '0'))
-CAMERA_HQ = os.environ.get('CAMERA_HQ', 'false').lower() == 'true'
-CAMERA_AWB_MODE = os.environ.get('CAMERA_AWB_MODE', 'auto')
-CAMERA_USE_LEGACY_DRIVER = os.environ.get('CAMERA_USE_LEGACY_DRIVER', 'false').lower() == 'true'
-# Skip hardware detection checks (useful for non-standard setups or when vcgencmd is unavailable)
-CAMERA_SKIP_HARDWARE_CHECK = os.environ.get('CAMERA_SKIP_HARDWARE_CHECK', 'true').lower() == 'true'
-# Use mock camera for development
-CAMERA_MOCK_MODE = os.environ.get('CAMERA_MOCK_MODE', 'false').lower() == 'true'
-# Enable autofocus for compatible cameras
-CAMERA_AUTOFOCUS = os.environ.get('CAMERA_AUTOFOCUS', 'true').lower() == 'true'
+from camera.broadcaster import FrameBroadcaster
+from camera.framebus import FrameBusReader, bus_path, CAMERA_FRAME_BUS, CAMERA_FRAME_BUS_PATH
+from camera.timelapse import TimelapseStore, CAMERA_TIMELAPSE_DIR
+from xenolab.history import parse_time
+from camera.stream import (
+    create_camera,
+    PROFILES,
+    DEFAULT_PROFILE,
+    CAMERA_USE_LEGACY_DRIVER,
+    CAMERA_SKIP_HARDWARE_CHECK,
+    CAMERA_MOCK_MODE,
+    CAMERA_AUTOFOCUS,
+)
 
-
-class PiCameraStream:
-    def __init__(self, resolution=(640, 480), framerate=30, rotation=0, hq=True, awb_mode='auto', use_legacy=False, autofocus=True):
-        self.resolution = resolution
-        self.framerate = framerate
-        self.rotation = rotation
-        self.hq = hq
-        self.awb_mode = awb_mode
-        self.camera = None
-        self.is_running = False
-        self.output = None
-        self.use_legacy = use_legacy
-        self.last_error = None
-        self.mock_mode = CAMERA_MOCK_MODE
-        self.autofocus = autofocus
-        
-    def check_camera_present(self):
-        """Check if the Raspberry Pi camera module is properly connected"""
-        if CAMERA_SKIP_HARDWARE_CHECK:
-            return True, "Hardware check skipped due to CAMERA_SKIP_HARDWARE_CHECK=true"
-            
-        if self.mock_mode:
-            return True, "Using mock camera mode"
-            
-        try:
-            # First, check if we're on a Raspberry Pi
-            if not os.path.exists('/opt/vc/bin/vcgencmd') and not os.path.exists('/usr/bin/vcgencmd'):
-                return False, "vcgencmd not found - may not be running on a Raspberry Pi or VC tools not installed"
-            
-            # Check for the camera using vcgencmd
-            cmd = '/opt/vc/bin/vcgencmd' if os.path.exists('/opt/vc/bin/vcgencmd') else '/usr/bin/vcgencmd'
-            result = subprocess.run([cmd, 'get_camera'], 
-                                stdout=subprocess.PIPE, 
-                                stderr=subprocess.PIPE, 
-                                universal_newlines=True)
-            if result.returncode != 0:
-                return False, f"vcgencmd failed with return code {result.returncode}: {result.stderr}"
-                
-            output = result.stdout.strip()
-            
-            # Output should be "supported=1 detected=1" if camera is present
-            if "detected=1" in output:
-                return True, output
-            return False, f"Camera not detected in vcgencmd output: {output}"
-        except Exception as e:
-            error_trace = traceback.format_exc()
-            return False, f"Error checking camera presence: {str(e)}\n{error_trace}"
-    
-    def create_test_image(self):
-        """Create a test image with timestamp for mock mode"""
-        from PIL import Image, ImageDraw, ImageFont
-        import random
-        
-        # Create a gradient background
-        width, height = self.resolution
-        image = Image.new('RGB', (width, height), color=(64, 64, 64))
-        draw = ImageDraw.Draw(image)
-        
-        # Draw timestamp and info
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-        text = f"MOCK CAMERA\n{timestamp}\n{width}x{height} @ {self.framerate}fps"
-        
-        # Try to use a system font
-        try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 20)
-        except:
-            try:
-                # Fallback to a different common font location
-                font = ImageFont.truetype("/usr/share/fonts/TTF/Arial.ttf", 20)
-            except:
-                font = ImageFont.load_default()
-        
-        # Center the text
-        text_width, text_height = draw.textbbox((0, 0), text, font=font)[2:4]
-        position = ((width - text_width) // 2, (height - text_height) // 2)
-        
-        # Add the text
-        draw.text(position, text, fill=(255, 255, 255), font=font)
-        
-        # Add some random colored squares for visual interest
-        for i in range(10):
-            x = random.randint(0, width - 50)
-            y = random.randint(0, height - 50)
-            size = random.randint(20, 50)
-            color = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-            draw.rectangle([x, y, x + size, y + size], fill=color)
-        
-        return image
-    
-    def start(self):
-        if not self.is_running:
-            # For mock mode, just set is_running to True and return
-            if self.mock_mode:
-                print("Starting in mock camera mode")
-                self.is_running = True
-                self.last_error = None
-                return True
-                
-            try:
-                # First check if camera is present
-                is_present, msg = self.check_camera_present()
-                if not is_present and not CAMERA_SKIP_HARDWARE_CHECK:
-                    self.last_error = msg
-                    print(f"Camera module not detected: {msg}")
-                    return False
-                
-                # Import libraries inside try block to handle import errors
-                if self.use_legacy:
-                    # Use legacy picamera module for older Raspberry Pi models/OS
-                    try:
-                        import picamera
-                        import picamera.array
-                    except ImportError as e:
-                        self.last_error = f"Failed to import picamera: {str(e)}. Try installing with 'pip install picamera'."
-                        print(self.last_error)
-                        return False
-                    
-                    # Initialize the camera
-                    self.camera = picamera.PiCamera()
-                    self.camera.resolution = self.resolution
-                    self.camera.framerate = self.framerate
-                    self.camera.rotation = self.rotation
-                    self.camera.awb_mode = self.awb_mode
-                    
-                    # Set camera mode for better quality if hq is True
-                    if self.hq:
-                        self.camera.sensor_mode = 3  # High quality mode
-                else:
-                    # Use picamera2 for newer Raspberry Pi models/OS
-                    try:
-                        from picamera2 import Picamera2
-                        from picamera2.controls import Controls
-                    except ImportError as e:
-                        self.last_error = f"Failed to import picamera2: {str(e)}. Try installing with 'pip install picamera2'."
-                        print(self.last_error)
-                        return False
-                    
-                    try:
-                        # Initialize the camera
-                        self.camera = Picamera2()
-                        config = self.camera.create_still_configuration(
-                            main={"size": self.resolution},
-                            lores={"size": (320, 240)},
-                            display="lores",
-                            queue=False
-                        )
-                        self.camera.configure(config)
-                        
-                        # Handle AWB mode conversion - in picamera2 this needs numeric constants
-                        controls = {}
-                        
-                        # Convert string AWB mode to the appropriate picamera2 constant
-                        # AWB modes in picamera2 are integers, not strings
-                        try:
-                            # Common AWB modes
-                            awb_mode_map = {
-                                'auto': 0,         # LIBCAMERA_AWB_AUTO
-                                'incandescent': 1, # LIBCAMERA_AWB_INCANDESCENT 
-                                'tungsten': 1,     # Alias for incandescent
-                                'fluorescent': 2,  # LIBCAMERA_AWB_FLUORESCENT
-                                'indoor': 2,       # Alias for fluorescent
-                                'daylight': 3,     # LIBCAMERA_AWB_DAYLIGHT
-                                'outdoor': 3,      # Alias for daylight
-                                'cloudy': 4,       # LIBCAMERA_AWB_CLOUDY
-                                'custom': 5,       # LIBCAMERA_AWB_CUSTOM
-                                'off': 6           # Not an official mode but some cameras support it
-                            }
-                            
-                            if isinstance(self.awb_mode, str) and self.awb_mode.lower() in awb_mode_map:
-                                controls["AwbMode"] = awb_mode_map[self.awb_mode.lower()]
-                            elif isinstance(self.awb_mode, int):
-                                controls["AwbMode"] = self.awb_mode
-                            else:
-                                # Default to auto if not found
-                                controls["AwbMode"] = 0
-                                print(f"Warning: Unknown AWB mode '{self.awb_mode}'. Using 'auto' instead.")
-                        except Exception as e:
-                            print(f"Warning: Error setting AWB mode: {e}. Using default.")
-                        
-                        # Set rotation if needed
-                        if self.rotation != 0:
-                            controls["RotationDegrees"] = self.rotation
-                        
-                        # Set autofocus if enabled
-                        if self.autofocus:
-                            # Enable continuous autofocus (value 2)
-                            controls["AfMode"] = 2  # LIBCAMERA_AF_CONTINUOUS
-                            print("Enabling continuous autofocus")
-                        else:
-                            # Default to fixed focus (value 0)
-                            controls["AfMode"] = 0  # LIBCAMERA_AF_MANUAL
-                            
-                        # Apply all controls
-                        if controls:
-                            self.camera.set_controls(controls)
-                            
-                        self.camera.start()
-                    except Exception as e:
-                        # If picamera2 fails with specific error messages, provide helpful guidance
-                        error_msg = str(e).lower()
-                        if "no cameras available" in error_msg:
-                            self.last_error = (
-                                f"No cameras found by picamera2. Error: {str(e)}\n"
-                                "Make sure the camera is enabled with 'sudo raspi-config' -> Interface Options -> Camera\n"
-                                "Also ensure the ribbon cable is properly connected and not damaged.\n"
-                                "You may need to reboot after enabling the camera."
-                            )
-                        elif "permission" in error_msg:
-                            self.last_error = (
-                                f"Permission error accessing camera: {str(e)}\n"
-                                "Make sure your user has permissions to access the camera.\n"
-                                "Try adding your user to the 'video' group: sudo usermod -a -G video $USER"
-                            )
-                        else:
-                            self.last_error = f"Error initializing picamera2: {str(e)}"
-                        
-                        print(self.last_error)
-                        return False
-                
-                # Warm up the camera
-                time.sleep(2)
-                
-                self.is_running = True
-                self.last_error = None
-                return True
-            except Exception as e:
-                error_trace = traceback.format_exc()
-                self.last_error = f"Error starting Pi camera: {str(e)}\n{error_trace}"
-                print(self.last_error)
-                return False
-        return True
-    
-    def stop(self):
-        if self.is_running:
-            self.is_running = False
-            
-            # No need to close anything in mock mode
-            if self.mock_mode:
-                return
-            
-            if self.camera is not None:
-                try:
-                    if self.use_legacy:
-                        self.camera.close()
-                    else:
-                        self.camera.stop()
-                        self.camera.close()
-                except Exception as e:
-                    print(f"Error closing camera: {str(e)}")
-                self.camera = None
-    
-    def get_jpeg_frame(self):
-        if not self.is_running:
-            return None
-        
-        # In mock mode, generate a test pattern
-        if self.mock_mode:
-            try:
-                image = self.create_test_image()
-                stream = io.BytesIO()
-                image.save(stream, format='JPEG')
-                stream.seek(0)
-                return stream.getvalue()
-            except Exception as e:
-                self.last_error = f"Error creating mock frame: {str(e)}"
-                print(self.last_error)
-                return None
-        
-        if self.camera is None:
-            return None
-            
-        try:
-            if self.use_legacy:
-                # For legacy picamera
-                stream = io.BytesIO()
-                self.camera.capture(stream, format='jpeg', use_video_port=True)
-                stream.seek(0)
-                return stream.getvalue()
-            else:
-                # For picamera2
-                array = self.camera.capture_array()
-                image = Image.fromarray(array)
-                stream = io.BytesIO()
-                image.save(stream, format='JPEG')
-                stream.seek(0)
-                return stream.getvalue()
-        except Exception as e:
-            error_trace = traceback.format_exc()
-            self.last_error = f"Error capturing frame: {str(e)}\n{error_trace}"
-            print(self.last_error)
-            return None
-    
-    def get_base64_frame(self):
-        jpeg_data = self.get_jpeg_frame()
-        if jpeg_data is None:
-            return None
-        
-        return base64.b64encode(jpeg_data).decode('utf-8')
-
-# Global camera instance and lock
+# Global camera instance, capture lock and one frame broadcaster per stream profile
 _pi_camera = None
 _camera_lock = threading.Lock()
+_broadcasters = {}
 
 def _get_pi_camera():
     """Get the Pi camera instance (singleton)"""
     global _pi_camera
     if _pi_camera is None:
-        _pi_camera = PiCameraStream(
-            resolution=(CAMERA_RESOLUTION_WIDTH, CAMERA_RESOLUTION_HEIGHT),
-            framerate=CAMERA_FRAMERATE,
-            rotation=CAMERA_ROTATION,
-            hq=CAMERA_HQ,
-            awb_mode=CAMERA_AWB_MODE,
+        _pi_camera = create_camera(
             use_legacy=CAMERA_USE_LEGACY_DRIVER,
+            mock_mode=CAMERA_MOCK_MODE,
             autofocus=CAMERA_AUTOFOCUS
         )
     return _pi_camera
 
-def generate_frames():
-    """Generator function to yield camera frames for streaming"""
-    camera = _get_pi_camera()
+def _get_frame_source(profile):
+    """Frames come from the shared-memory bus when a capture process owns the camera"""
+    if CAMERA_FRAME_BUS:
+        return FrameBusReader(bus_path(profile))
+    return _get_pi_camera()
+
+def _release_idle_camera():
+    """Stop the Pi camera and its encoders once every profile's capture thread has parked"""
+    if CAMERA_FRAME_BUS or _pi_camera is None:
+        return
+    broadcasters = [broadcaster for _, broadcaster in sorted(_broadcasters.items())]
+    with contextlib.ExitStack() as stack:
+        # Hold every broadcaster's condition so none can start capturing while the camera stops
+        for broadcaster in broadcasters:
+            stack.enter_context(broadcaster.condition)
+        if any(broadcaster.is_running for broadcaster in broadcasters):
+            return
+        with _camera_lock:
+            _pi_camera.stop()
+
+def _get_broadcaster(profile=DEFAULT_PROFILE):
+    """Get the frame broadcaster for a profile of the current frame source (one per profile)"""
+    broadcaster = _broadcasters.get(profile)
+    if broadcaster is None or (not CAMERA_FRAME_BUS and broadcaster.camera is not _get_pi_camera()):
+        broadcaster = FrameBroadcaster(_get_frame_source(profile), profile=profile, capture_lock=_camera_lock, on_idle=_release_idle_camera)
+        _broadcasters[profile] = broadcaster
+    return broadcaster
+
+def _get_profile(request):
+    """Read the ?profile= parameter, or None if it isn't a known profile"""
+    profile = request.GET.get('profile', DEFAULT_PROFILE)
+    return profile if profile in PROFILES else None
+
+def _invalid_profile_response():
+    return JsonResponse({
+        'error': 'Invalid profile',
+        'details': f"profile must be one of: {', '.join(PROFILES)}"
+    }, status=400)
+
+def _stop_broadcaster():
+    """Stop every capture thread and release the camera"""
+    for broadcaster in list(_broadcasters.values()):
+        broadcaster.stop()
+        with _camera_lock:
+            broadcaster.camera.stop()
+    _broadcasters.clear()
+    with _camera_lock:
+        if _pi_camera is not None:
+            _pi_camera.stop()
+
+def generate_frames(profile=DEFAULT_PROFILE, max_fps=None, remote_addr=None):
+    """Generator function to yield the latest broadcast camera frames for streaming"""
+    broadcaster = _get_broadcaster(profile)
     
-    if not camera.start():
-        error_message = camera.last_error or "Unknown error"
+    if not broadcaster.start():
+        error_message = broadcaster.last_error or "Unknown error"
         yield f'--frame\r\nContent-Type: text/plain\r\n\r\nCamera Error: Failed to start Pi Camera\n{error_message}\r\n'.encode('utf-8')
         return
     
+    client = broadcaster.register_client(max_fps=max_fps, remote_addr=remote_addr)
+    
     try:
-        while True:
-            with _camera_lock:
-                jpeg_frame = camera.get_jpeg_frame()
+        while broadcaster.is_running:
+            # Wait until this client's next frame is due, then jump to the newest
+            # frame; anything produced while it was still sending is dropped
+            delay = client.delay()
+            if delay:
+                time.sleep(delay)
+            
+            sequence, jpeg_frame, _ = broadcaster.wait_for_frame(client.last_sequence, timeout=1.0)
             
             if jpeg_frame is None:
-                time.sleep(0.1)  # Sleep to prevent CPU overuse
                 continue
-                
+            
+            client.record(sequence, jpeg_frame)
             yield (b'--frame\r\n'
                    b'Content-Type: image/jpeg\r\n\r\n' + jpeg_frame + b'\r\n')
             
-            # Control frame rate
-            time.sleep(1/camera.framerate)
-            
     except Exception as e:
         error_trace = traceback.format_exc()
         error_message = f"Error in frame generation: {str(e)}\n{error_trace}"
@@ -376,46 +129,270 @@ def generate_frames():
         yield f'--frame\r\nContent-Type: text/plain\r\n\r\nCamera Error: Stream interrupted\n{error_message}\r\n'.encode('utf-8')
     finally:
         # Don't stop the stream here - it will be managed separately
-        pass
+        broadcaster.unregister_client(client)
+
+async def generate_frames_async(profile=DEFAULT_PROFILE, max_fps=None, remote_addr=None):
+    """Async generator yielding broadcast frames; idle viewers cost an awaiting coroutine, not a thread"""
+    broadcaster = _get_broadcaster(profile)
+    
+    # Starting the camera blocks while it warms up, so keep it off the event loop
+    if not await sync_to_async(broadcaster.start, thread_sensitive=False)():
+        error_message = broadcaster.last_error or "Unknown error"
+        yield f'--frame\r\nContent-Type: text/plain\r\n\r\nCamera Error: Failed to start Pi Camera\n{error_message}\r\n'.encode('utf-8')
+        return
+    
+    client = broadcaster.register_client(max_fps=max_fps, remote_addr=remote_addr)
+    
+    try:
+        while broadcaster.is_running:
+            delay = client.delay()
+            if delay:
+                await asyncio.sleep(delay)
+            
+            sequence, jpeg_frame, _ = await broadcaster.wait_for_frame_async(client.last_sequence, timeout=1.0)
+            
+            if jpeg_frame is None:
+                continue
+            
+            client.record(sequence, jpeg_frame)
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + jpeg_frame + b'\r\n')
+            
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        error_message = f"Error in frame generation: {str(e)}\n{error_trace}"
+        print(error_message)
+        yield f'--frame\r\nContent-Type: text/plain\r\n\r\nCamera Error: Stream interrupted\n{error_message}\r\n'.encode('utf-8')
+    finally:
+        broadcaster.unregister_client(client)
 
 @require_http_methods(["GET"])
 def camera_stream(request, camera_id=None):
     """Stream camera frames as multipart HTTP response"""
+    profile = _get_profile(request)
+    if profile is None:
+        return _invalid_profile_response()
+    
+    # Optional per-client frame rate cap, e.g. ?fps=5 for slow links
+    max_fps = None
+    if 'fps' in request.GET:
+        try:
+            max_fps = float(request.GET['fps'])
+        except ValueError:
+            max_fps = 0
+        if not max_fps > 0:
+            return JsonResponse({
+                'error': 'Invalid fps',
+                'details': 'fps must be a positive number'
+            }, status=400)
+    
+    remote_addr = request.META.get('REMOTE_ADDR')
+    
+    # Under ASGI stream from the event loop instead of pinning a worker thread per viewer
+    if isinstance(request, ASGIRequest):
+        frames = generate_frames_async(profile, max_fps=max_fps, remote_addr=remote_addr)
+    else:
+        frames = generate_frames(profile, max_fps=max_fps, remote_addr=remote_addr)
+    
     return StreamingHttpResponse(
-        generate_frames(),
+        frames,
         content_type='multipart/x-mixed-replace; boundary=frame'
     )
 
+def _latest_frame(broadcaster, timeout=5.0):
+    """Return the cached frame, waiting for the first capture if there isn't one yet"""
+    sequence, jpeg_frame, timestamp = broadcaster.latest()
+    if jpeg_frame is None:
+        sequence, jpeg_frame, timestamp = broadcaster.wait_for_frame(sequence, timeout=timeout)
+    return sequence, jpeg_frame, timestamp
+
+@require_http_methods(["GET"])
+def camera_snapshot(request, camera_id=None):
+    """Return the latest frame as a raw JPEG, or 304 if the client already has it"""
+    profile = _get_profile(request)
+    if profile is None:
+        return _invalid_profile_response()
+    
+    broadcaster = _get_broadcaster(profile)
+    
+    if not broadcaster.start():
+        return JsonResponse({
+            'error': 'Failed to start Pi camera', 
+            'details': broadcaster.last_error or "Unknown error"
+        }, status=500)
+    
+    sequence, jpeg_frame, timestamp = _latest_frame(broadcaster)
+    
+    if jpeg_frame is None:
+        return JsonResponse({
+            'error': 'Failed to capture frame',
+            'details': broadcaster.last_error or "Unknown error"
+        }, status=500)
+    
+    etag = broadcaster.etag(timestamp)
+    if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    
+    if etag in if_none_match or '*' in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(jpeg_frame, content_type='image/jpeg')
+    
+    response['ETag'] = etag
+    # Frames change faster than max-age can express in whole seconds; revalidate every time, the ETag makes that a 304
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
 @require_http_methods(["GET"])
 def camera_frame(request, camera_id=None):
-    """Return a single frame as base64 encoded JPEG"""
-    camera = _get_pi_camera()
+    """Return the latest broadcast frame as base64 encoded JPEG"""
+    profile = _get_profile(request)
+    if profile is None:
+        return _invalid_profile_response()
     
-    if not camera.is_running and not camera.start():
+    broadcaster = _get_broadcaster(profile)
+    
+    if not broadcaster.start():
         return JsonResponse({
             'error': 'Failed to start Pi camera', 
-            'details': camera.last_error or "Unknown error"
+            'details': broadcaster.last_error or "Unknown error"
         }, status=500)
     
-    with _camera_lock:
-        base64_frame = camera.get_base64_frame()
+    sequence, jpeg_frame, timestamp = _latest_frame(broadcaster)
     
-    if base64_frame is None:
+    if jpeg_frame is None:
         return JsonResponse({
             'error': 'Failed to capture frame',
-            'details': camera.last_error or "Unknown error"
+            'details': broadcaster.last_error or "Unknown error"
         }, status=500)
     
+    # Shares the snapshot's cached frame; the base64 copy is made once per frame
+    sequence, base64_frame, timestamp = broadcaster.latest_base64()
+    
     return JsonResponse({
         'frame': base64_frame,
-        'timestamp': time.time(),
+        'timestamp': timestamp,
+        'sequence': sequence,
+        'profile': profile,
         'content_type': 'image/jpeg'
     })
 
+def _invalid_time_response(name):
+    return JsonResponse({
+        'error': f'Invalid {name}',
+        'details': f'{name} must be a Unix timestamp or an ISO 8601 datetime'
+    }, status=400)
+
+@require_http_methods(["GET"])
+def camera_timelapse(request):
+    """List the recorded timelapse segments"""
+    segments = TimelapseStore(CAMERA_TIMELAPSE_DIR).summary()
+    return JsonResponse({
+        'segments': segments,
+        'frames': sum(segment['frames'] for segment in segments),
+        'bytes': sum(segment['bytes'] for segment in segments),
+        'start': segments[0]['start'] if segments else None,
+        'end': segments[-1]['end'] if segments else None,
+    })
+
+@require_http_methods(["GET"])
+def camera_timelapse_frame(request):
+    """Return the recorded frame closest to ?at= as a raw JPEG"""
+    at = parse_time(request.GET.get('at', ''))
+    if at is None:
+        return _invalid_time_response('at')
+    
+    timestamp, jpeg_frame = TimelapseStore(CAMERA_TIMELAPSE_DIR).frame_at(at)
+    if jpeg_frame is None:
+        return JsonResponse({'error': 'No timelapse frames recorded'}, status=404)
+    
+    # Recorded frames never change, so the frame's own timestamp identifies it
+    etag = f'"timelapse-{int(timestamp * 1000000)}"'
+    if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    
+    if etag in if_none_match or '*' in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(jpeg_frame, content_type='image/jpeg')
+    
+    response['ETag'] = etag
+    response['X-Frame-Timestamp'] = f'{timestamp:.6f}'
+    response['Cache-Control'] = 'private, max-age=60'
+    return response
+
+def generate_timelapse_frames(start=None, end=None, fps=10):
+    """Generator yielding recorded frames in a time range, paced to ``fps``"""
+    interval = 1.0 / fps
+    next_due = time.monotonic()
+    
+    for _, jpeg_frame in TimelapseStore(CAMERA_TIMELAPSE_DIR).frames(start, end):
+        delay = next_due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        next_due = max(next_due + interval, time.monotonic())
+        yield (b'--frame\r\n'
+               b'Content-Type: image/jpeg\r\n\r\n' + jpeg_frame + b'\r\n')
+
+async def generate_timelapse_frames_async(start=None, end=None, fps=10):
+    """Async version of generate_timelapse_frames; segment reads run in a worker thread, pacing on the event loop"""
+    frames = TimelapseStore(CAMERA_TIMELAPSE_DIR).frames(start, end)
+    read_next = sync_to_async(next, thread_sensitive=False)
+    interval = 1.0 / fps
+    next_due = time.monotonic()
+    
+    try:
+        while True:
+            record = await read_next(frames, None)
+            if record is None:
+                break
+            
+            delay = next_due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            next_due = max(next_due + interval, time.monotonic())
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + record[1] + b'\r\n')
+    finally:
+        # A read cancelled mid-flight still owns the generator; garbage collection closes it once that read returns
+        with contextlib.suppress(ValueError):
+            frames.close()
+
+@require_http_methods(["GET"])
+def camera_timelapse_stream(request):
+    """Play back the timelapse between ?start= and ?end= as an MJPEG stream"""
+    bounds = {}
+    for name in ('start', 'end'):
+        if name in request.GET:
+            bounds[name] = parse_time(request.GET[name])
+            if bounds[name] is None:
+                return _invalid_time_response(name)
+    
+    try:
+        fps = float(request.GET.get('fps', '10'))
+    except ValueError:
+        fps = 0
+    if not fps > 0:
+        return JsonResponse({
+            'error': 'Invalid fps',
+            'details': 'fps must be a positive number'
+        }, status=400)
+    
+    # Under ASGI a sync generator would be consumed whole before the first byte is sent
+    if isinstance(request, ASGIRequest):
+        frames = generate_timelapse_frames_async(bounds.get('start'), bounds.get('end'), fps)
+    else:
+        frames = generate_timelapse_frames(bounds.get('start'), bounds.get('end'), fps)
+    
+    return StreamingHttpResponse(
+        frames,
+        content_type='multipart/x-mixed-replace; boundary=frame'
+    )
+
 @require_http_methods(["GET"])
 def camera_status(request, camera_id=None):
     """Get camera status"""
     camera = _get_pi_camera()
+    broadcaster = _get_broadcaster()
+    broadcasters = {profile: _get_broadcaster(profile) for profile in PROFILES}
     
     # Check if camera hardware is present
     is_present, msg = camera.check_camera_present()
@@ -445,19 +422,32 @@ def camera_status(request, camera_id=None):
         pass
     
     return JsonResponse({
-        'status': 'on' if camera.is_running else 'off',
+        'status': 'on' if broadcaster.camera.is_running else 'off',
         'hardware_detected': is_present,
         'hardware_info': msg,
         'resolution': f"{camera.resolution[0]}x{camera.resolution[1]}",
+        'thumb_resolution': f"{camera.thumb_resolution[0]}x{camera.thumb_resolution[1]}",
         'framerate': camera.framerate,
         'rotation': camera.rotation,
         'hq_mode': camera.hq,
+        'encoder': camera.encoder,
+        'encoder_active': camera.encoder_active,
+        'jpeg_quality': camera.quality,
         'awb_mode': camera.awb_mode,
         'using_legacy_driver': camera.use_legacy,
         'mock_mode': camera.mock_mode,
         'autofocus': camera.autofocus,
         'skip_hardware_check': CAMERA_SKIP_HARDWARE_CHECK,
-        'last_error': camera.last_error,
+        'last_error': broadcaster.last_error,
+        'frame_bus': CAMERA_FRAME_BUS_PATH if CAMERA_FRAME_BUS else None,
+        'profiles': {
+            profile: {
+                'capture_running': profile_broadcaster.is_running,
+                'frame_sequence': profile_broadcaster.sequence,
+                'clients': profile_broadcaster.client_stats(),
+            }
+            for profile, profile_broadcaster in broadcasters.items()
+        },
         'system_info': system_info
     })
 
@@ -470,100 +460,96 @@ def camera_control(request, camera_id=None):
     if action not in ['start', 'stop', 'toggle_driver', 'toggle_mock', 'toggle_autofocus']:
         return JsonResponse({'error': 'Invalid action'}, status=400)
     
-    camera = _get_pi_camera()
+    if CAMERA_FRAME_BUS and action != 'start':
+        # This worker only reads the bus; the settings belong to the capture process
+        return JsonResponse({
+            'error': 'Camera is owned by the capture process',
+            'details': f"'{action}' has no effect while CAMERA_FRAME_BUS is enabled; "
+                       "change the CAMERA_* settings of the `manage.py camera` program and restart it"
+        }, status=409)
+    
+    global _pi_camera
     
     try:
         if action == 'start':
-            with _camera_lock:
-                result = camera.start()
-            if result:
+            broadcaster = _get_broadcaster()
+            if broadcaster.start():
                 return JsonResponse({'status': 'started'})
             else:
                 return JsonResponse({
                     'error': 'Failed to start Pi camera',
-                    'details': camera.last_error or "Unknown error"
+                    'details': broadcaster.last_error or "Unknown error"
                 }, status=500)
         
         elif action == 'stop':
-            with _camera_lock:
-                camera.stop()
+            _stop_broadcaster()
             return JsonResponse({'status': 'stopped'})
             
         elif action == 'toggle_driver':
-            global _pi_camera
-            with _camera_lock:
-                if camera.is_running:
-                    camera.stop()
-                
-                # Reset the camera with opposite driver setting
-                _pi_camera = None
-                global CAMERA_USE_LEGACY_DRIVER
-                CAMERA_USE_LEGACY_DRIVER = not CAMERA_USE_LEGACY_DRIVER
-                
-                # Get new camera instance with toggled driver
-                camera = _get_pi_camera()
-                result = camera.start()
-                
-                if result:
-                    return JsonResponse({
-                        'status': 'driver_toggled',
-                        'using_legacy_driver': CAMERA_USE_LEGACY_DRIVER
-                    })
-                else:
-                    return JsonResponse({
-                        'error': 'Failed to start camera with new driver',
-                        'details': camera.last_error or "Unknown error"
-                    }, status=500)
+            _stop_broadcaster()
+            
+            # Reset the camera with opposite driver setting
+            _pi_camera = None
+            global CAMERA_USE_LEGACY_DRIVER
+            CAMERA_USE_LEGACY_DRIVER = not CAMERA_USE_LEGACY_DRIVER
+            
+            # Get new camera instance with toggled driver
+            broadcaster = _get_broadcaster()
+            
+            if broadcaster.start():
+                return JsonResponse({
+                    'status': 'driver_toggled',
+                    'using_legacy_driver': CAMERA_USE_LEGACY_DRIVER
+                })
+            else:
+                return JsonResponse({
+                    'error': 'Failed to start camera with new driver',
+                    'details': broadcaster.last_error or "Unknown error"
+                }, status=500)
         
         elif action == 'toggle_mock':
             global CAMERA_MOCK_MODE
-            with _camera_lock:
-                if camera.is_running:
-                    camera.stop()
-                
-                # Reset the camera with opposite mock setting
-                _pi_camera = None
-                CAMERA_MOCK_MODE = not CAMERA_MOCK_MODE
-                
-                # Get new camera instance with toggled mock mode
-                camera = _get_pi_camera()
-                result = camera.start()
-                
-                if result:
-                    return JsonResponse({
-                        'status': 'mock_mode_toggled',
-                        'mock_mode': CAMERA_MOCK_MODE
-                    })
-                else:
-                    return JsonResponse({
-                        'error': 'Failed to start camera in mock mode',
-                        'details': camera.last_error or "Unknown error"
-                    }, status=500)
+            _stop_broadcaster()
+            
+            # Reset the camera with opposite mock setting
+            _pi_camera = None
+            CAMERA_MOCK_MODE = not CAMERA_MOCK_MODE
+            
+            # Get new camera instance with toggled mock mode
+            broadcaster = _get_broadcaster()
+            
+            if broadcaster.start():
+                return JsonResponse({
+                    'status': 'mock_mode_toggled',
+                    'mock_mode': CAMERA_MOCK_MODE
+                })
+            else:
+                return JsonResponse({
+                    'error': 'Failed to start camera in mock mode',
+                    'details': broadcaster.last_error or "Unknown error"
+                }, status=500)
         
         elif action == 'toggle_autofocus':
             global CAMERA_AUTOFOCUS
-            with _camera_lock:
-                if camera.is_running:
-                    camera.stop()
-                
-                # Reset the camera with opposite autofocus setting
-                _pi_camera = None
-                CAMERA_AUTOFOCUS = not CAMERA_AUTOFOCUS
-                
-                # Get new camera instance with toggled autofocus
-                camera = _get_pi_camera()
-                result = camera.start()
-                
-                if result:
-                    return JsonResponse({
-                        'status': 'autofocus_toggled',
-                        'autofocus': CAMERA_AUTOFOCUS
-                    })
-                else:
-                    return JsonResponse({
-                        'error': 'Failed to start camera with new autofocus setting',
-                        'details': camera.last_error or "Unknown error"
-                    }, status=500)
+            _stop_broadcaster()
+            
+            # Reset the camera with opposite autofocus setting
+            _pi_camera = None
+            CAMERA_AUTOFOCUS = not CAMERA_AUTOFOCUS
+            
+            # Get new camera instance with toggled autofocus
+            broadcaster = _get_broadcaster()
+            
+            if broadcaster.start():
+                return JsonResponse({
+                    'status': 'autofocus_toggled',
+                    'autofocus': CAMERA_AUTOFOCUS
+                })
+            else:
+                return JsonResponse({
+                    'error': 'Failed to start camera with new autofocus setting',
+                    'details': broadcaster.last_error or "Unknown error"
+                }, status=500)
             
     except Exception as e:
         error_trace = traceback.format_exc()
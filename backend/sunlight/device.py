@@ -0,0 +1,127 @@
+import datetime
+import os
+import time
+
+import board
+import loguru
+import neopixel
+
+from sunlight.models import Sunlight, SunlightRollup
+from sunlight.render import FrameClock
+from sunlight.schedule import LightSchedule, pixel_color
+from xenolab.daemon import Device
+from xenolab.scheduler import XENOLAB_TIMEZONE
+from xenolab.state import StatePublisher
+from xenolab.writebuffer import ReadingBuffer
+
+# Readings are only stored when a channel moves more than this (0-1 scale) or the status changes
+SUNLIGHT_DEADBAND = float(os.environ.get('XENOLAB_SUNLIGHT_DEADBAND', '0.01'))
+# Stored readings are written in batches of this many rows, or this often
+SUNLIGHT_FLUSH_ROWS = int(os.environ.get('XENOLAB_SUNLIGHT_FLUSH_ROWS', '60'))
+SUNLIGHT_FLUSH_SECONDS = float(os.environ.get('XENOLAB_SUNLIGHT_FLUSH_SECONDS', '300'))
+# A reading is stored at least this often even if nothing changed
+SUNLIGHT_HEARTBEAT_SECONDS = float(os.environ.get('XENOLAB_SUNLIGHT_HEARTBEAT_SECONDS', '3600'))
+# Highest frame rate during fast transitions; slow ones render only as often as the output changes
+SUNLIGHT_FPS = float(os.environ.get('XENOLAB_SUNLIGHT_FPS', '30'))
+# Longest sleep between frames when nothing is changing
+SUNLIGHT_IDLE_SECONDS = float(os.environ.get('XENOLAB_SUNLIGHT_IDLE_SECONDS', '60'))
+# Gamma applied to the output; 1.0 drives the LEDs linearly
+SUNLIGHT_GAMMA = float(os.environ.get('XENOLAB_SUNLIGHT_GAMMA', '2.2'))
+# How often frame timing stats are logged
+SUNLIGHT_STATS_SECONDS = float(os.environ.get('XENOLAB_SUNLIGHT_STATS_SECONDS', '600'))
+
+
+class SunlightDevice(Device):
+    """Sunlight simulator with sunrise and sunset transitions on a 24 LED NeoPixel strip"""
+
+    name = 'sunlight'
+
+    def start(self):
+        self.buffer = ReadingBuffer(
+            Sunlight,
+            fields=('r', 'g', 'b', 'brightness'),
+            status_field='status',
+            rollup_model=SunlightRollup,
+            deadband=SUNLIGHT_DEADBAND,
+            max_rows=SUNLIGHT_FLUSH_ROWS,
+            max_age=SUNLIGHT_FLUSH_SECONDS,
+            heartbeat=SUNLIGHT_HEARTBEAT_SECONDS,
+            writer=self.writer,
+            on_write=self._written
+        )
+
+        # Frames are pushed explicitly with show() and brightness is applied to the colour before filling
+        self.pixels = neopixel.NeoPixel(board.D12, 24, brightness=1.0, auto_write=False)
+        self.schedule = None
+        self.schedule_date = None
+        self.shown = None
+        self.clock = FrameClock()
+        self.state = StatePublisher(self.name)
+        self.last_stats = time.monotonic()
+        loguru.logger.info("Starting sunlight simulation")
+
+    def tick(self):
+        self.clock.woke()
+        now = datetime.datetime.now(XENOLAB_TIMEZONE)
+
+        # Reload the lifeform's schedule once a day so edits apply from the next day
+        if now.date() != self.schedule_date:
+            self.schedule = LightSchedule.from_lifeform()
+            self.schedule_date = now.date()
+
+        seconds = now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
+        frame = self.schedule.frame(seconds, len(self.pixels))
+        colors = [pixel_color(rgb, brightness, SUNLIGHT_GAMMA) for rgb, brightness in frame]
+
+        # Only push a frame to the strip when the output actually changes
+        if colors != self.shown:
+            self.pixels[:] = colors
+            self.pixels.show()
+            self.shown = colors
+
+        # The first pixel leads any sweep; it stands for the strip in the readings
+        rgb, brightness = frame[0]
+        status = Sunlight.STATUS_SUNLIGHT_ON if any(map(any, colors)) else Sunlight.STATUS_SUNLIGHT_OFF
+        r, g, b = (channel / 255.0 for channel in rgb) if status else (0, 0, 0)
+        self._record_data(r, g, b, brightness if status else 0, status)
+
+        if time.monotonic() - self.last_stats >= SUNLIGHT_STATS_SECONDS:
+            self._report_timing()
+            self.last_stats = time.monotonic()
+
+        # Sleep until the output is due to change, within the frame rate and idle limits
+        interval = self.schedule.frame_interval(seconds, SUNLIGHT_GAMMA)
+        return self.clock.schedule(min(max(interval, 1 / SUNLIGHT_FPS), SUNLIGHT_IDLE_SECONDS))
+
+    def stop(self):
+        self.pixels.fill((0, 0, 0))
+        self.pixels.show()
+        self._report_timing()
+        written = self.buffer.flush()
+        loguru.logger.info(
+            f"Sunlight simulation stopped; flushed {written} readings, stored {self.buffer.kept} of "
+            f"{self.buffer.offered} readings in {self.buffer.flushes} writes"
+        )
+
+    def _report_timing(self):
+        stats = self.clock.stats()
+        loguru.logger.info(
+            f"Rendered {stats['frames']} frames ({stats['overruns']} overruns); wake-up lateness "
+            f"mean {stats['mean_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms, max {stats['max_ms']:.2f} ms"
+        )
+
+    def _record_data(self, r, g, b, brightness, status):
+        """Offer the current light settings to the write buffer; only changes reach the database"""
+        flushes = self.buffer.flushes
+        if self.buffer.add(r=r, g=g, b=b, brightness=brightness, status=status):
+            loguru.logger.info(f"Recorded: r={r:.2f}, g={g:.2f}, b={b:.2f}, brightness={brightness:.2f}, status={status}")
+        if self.buffer.flushes != flushes:
+            loguru.logger.info(f"Wrote batch {self.buffer.flushes}: {self.buffer.kept} of {self.buffer.offered} readings stored so far")
+
+    def _written(self, readings):
+        """Publish the newest reading of a committed batch, so the state never runs ahead of the database"""
+        reading = readings[-1]
+        self.state.publish(
+            timestamp=reading.timestamp.isoformat(), status=reading.status,
+            r=reading.r, g=reading.g, b=reading.b, brightness=reading.brightness
+        )
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sunlight', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SunlightRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily')], max_length=8)),
+                ('start', models.DateTimeField(help_text='Start of the bucket (UTC aligned)')),
+                ('count', models.IntegerField(default=0, help_text='Number of readings in the bucket')),
+                ('r_min', models.FloatField(blank=True, null=True)),
+                ('r_max', models.FloatField(blank=True, null=True)),
+                ('r_sum', models.FloatField(default=0.0)),
+                ('g_min', models.FloatField(blank=True, null=True)),
+                ('g_max', models.FloatField(blank=True, null=True)),
+                ('g_sum', models.FloatField(default=0.0)),
+                ('b_min', models.FloatField(blank=True, null=True)),
+                ('b_max', models.FloatField(blank=True, null=True)),
+                ('b_sum', models.FloatField(default=0.0)),
+                ('brightness_min', models.FloatField(blank=True, null=True)),
+                ('brightness_max', models.FloatField(blank=True, null=True)),
+                ('brightness_sum', models.FloatField(default=0.0)),
+                ('status_min', models.FloatField(blank=True, null=True)),
+                ('status_max', models.FloatField(blank=True, null=True)),
+                ('status_sum', models.FloatField(default=0.0)),
+                ('on_seconds', models.FloatField(default=0.0, help_text='Seconds the sunlight was on')),
+            ],
+            options={
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('period', 'start'), name='sunlight_sunlightrollup_period_start')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sunlight', '0002_sunlightrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sunlight',
+            index=models.Index(fields=['-timestamp'], name='sunlight_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sunlight',
+            index=models.Index(fields=['status', '-timestamp'], name='sunlight_status_timestamp_idx'),
+        ),
+    ]
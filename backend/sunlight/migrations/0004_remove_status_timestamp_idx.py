@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:57
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sunlight', '0003_timestamp_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='sunlight',
+            name='sunlight_status_timestamp_idx',
+        ),
+    ]
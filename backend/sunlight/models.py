@@ -1,6 +1,8 @@
 from django.db import models
 from django.utils import timezone
 
+from xenolab.rollups import Rollup
+
 
 class Sunlight(models.Model):
     """
@@ -24,5 +26,40 @@ class Sunlight(models.Model):
     
     brightness = models.FloatField(help_text="Brightness of sunlight", default=0.8)
     
+    class Meta:
+        # Latest-row lookups are index seeks
+        indexes = [
+            models.Index(fields=['-timestamp'], name='sunlight_timestamp_idx'),
+        ]
+    
     def __str__(self):
         return f"Sunlight: r={self.r}, g={self.g}, b={self.b}, brightness={self.brightness} at {self.timestamp}"
+
+
+class SunlightRollup(Rollup):
+    """
+    Hourly and daily aggregates of Sunlight readings, see xenolab.rollups
+    """
+    
+    SOURCE = Sunlight
+    FIELDS = ('r', 'g', 'b', 'brightness', 'status')
+    STATUS_FIELD = 'status'
+    STATUS_ON = Sunlight.STATUS_SUNLIGHT_ON
+    
+    r_min = models.FloatField(null=True, blank=True)
+    r_max = models.FloatField(null=True, blank=True)
+    r_sum = models.FloatField(default=0.0)
+    g_min = models.FloatField(null=True, blank=True)
+    g_max = models.FloatField(null=True, blank=True)
+    g_sum = models.FloatField(default=0.0)
+    b_min = models.FloatField(null=True, blank=True)
+    b_max = models.FloatField(null=True, blank=True)
+    b_sum = models.FloatField(default=0.0)
+    brightness_min = models.FloatField(null=True, blank=True)
+    brightness_max = models.FloatField(null=True, blank=True)
+    brightness_sum = models.FloatField(default=0.0)
+    status_min = models.FloatField(null=True, blank=True)
+    status_max = models.FloatField(null=True, blank=True)
+    status_sum = models.FloatField(default=0.0)
+    
+    on_seconds = models.FloatField(help_text="Seconds the sunlight was on", default=0.0)
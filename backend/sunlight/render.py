@@ -0,0 +1,46 @@
+import statistics
+import time
+
+
+class FrameClock:
+    """
+    Paces a render loop against absolute deadlines and records how late each
+    frame woke up, so scheduling jitter shows up in the logs. The caller does
+    the sleeping, so the same clock works under time.sleep and asyncio.
+    """
+
+    def __init__(self):
+        self.deadline = time.monotonic()
+        self.lateness = []
+        self.frames = 0
+        self.overruns = 0
+
+    def schedule(self, interval):
+        """Set the next deadline ``interval`` seconds after the previous one; returns how long to sleep"""
+        self.deadline += interval
+        now = time.monotonic()
+        if self.deadline < now:
+            # The frame took longer than its slot; start again from now rather than bursting to catch up
+            self.overruns += 1
+            self.deadline = now
+        return self.deadline - now
+
+    def woke(self):
+        """Record how late the current frame started against its deadline"""
+        self.lateness.append(time.monotonic() - self.deadline)
+        self.frames += 1
+
+    def stats(self):
+        """Frames, overruns and lateness (ms) since the last call, then start a new window"""
+        lateness = sorted(self.lateness)
+        stats = {
+            'frames': self.frames,
+            'overruns': self.overruns,
+            'mean_ms': statistics.fmean(lateness) * 1000 if lateness else 0.0,
+            'p99_ms': lateness[int(len(lateness) * 0.99)] * 1000 if lateness else 0.0,
+            'max_ms': lateness[-1] * 1000 if lateness else 0.0,
+        }
+        self.lateness = []
+        self.frames = 0
+        self.overruns = 0
+        return stats
@@ -0,0 +1,130 @@
+import bisect
+import math
+
+from xenolab.lifeform import LIFEFORM_PATH, load_lifeform
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# How the output moves from one keyframe to the next, as a function of progress 0..1
+EASINGS = {
+    'linear': lambda u: u,
+    'step': lambda u: 0.0,
+    'sine-in': lambda u: 1.0 - math.cos(u * math.pi / 2),
+    'sine-out': lambda u: math.sin(u * math.pi / 2),
+    'sine-in-out': lambda u: (1.0 - math.cos(u * math.pi)) / 2,
+}
+
+# The original hardcoded day, used when the lifeform doesn't define "light".
+# Keyframes with the same time make a jump; the later one starts the next segment.
+# "spread" delays the far end of the strip by up to that many seconds, so the
+# transition travels along the LEDs instead of changing them all at once.
+DEFAULT_KEYFRAMES = [
+    # Sunrise: deep orange to bright white, sweeping along the strip over ten minutes
+    {'time': '08:00', 'rgb': [204, 76, 25], 'brightness': 0.3, 'spread': 600},
+    {'time': '09:00', 'rgb': [255, 255, 255], 'brightness': 1.0},
+    # Daytime: white, brightness follows a sine arch 0.3 -> 1.0 -> 0.3
+    {'time': '09:00', 'rgb': [255, 255, 255], 'brightness': 0.3, 'ease': 'sine-out'},
+    {'time': '13:30', 'rgb': [255, 255, 255], 'brightness': 1.0, 'ease': 'sine-in'},
+    {'time': '18:00', 'rgb': [255, 255, 255], 'brightness': 0.3},
+    # Sunset: white to deep red/orange
+    {'time': '18:00', 'rgb': [255, 255, 255], 'brightness': 1.0},
+    {'time': '19:00', 'rgb': [255, 76, 25], 'brightness': 0.3},
+    # Night: off until sunrise
+    {'time': '19:00', 'rgb': [0, 0, 0], 'brightness': 0.0, 'ease': 'step'},
+]
+
+
+def _parse_clock(value):
+    """Seconds since midnight for "HH:MM" or "HH:MM:SS\""""
+    parts = [int(part) for part in value.split(':')]
+    hours, minutes, seconds = (parts + [0, 0])[:3]
+    return hours * 3600 + minutes * 60 + seconds
+
+
+class LightSchedule:
+    """
+    A day of light output described by keyframes in local wall-clock time.
+
+    Keyframes are parsed and sorted once; looking up a time is a bisect plus
+    one interpolation. The last keyframe wraps around to the first one of the
+    next day.
+    """
+
+    def __init__(self, keyframes):
+        if not keyframes:
+            raise ValueError('A light schedule needs at least one keyframe')
+
+        self.keyframes = []
+        for keyframe in keyframes:
+            ease = keyframe.get('ease', 'linear')
+            if ease not in EASINGS:
+                raise ValueError(f"Unknown ease '{ease}', expected one of: {', '.join(EASINGS)}")
+            self.keyframes.append((
+                _parse_clock(keyframe['time']),
+                tuple(float(channel) for channel in keyframe['rgb']),
+                float(keyframe['brightness']),
+                EASINGS[ease],
+                float(keyframe.get('spread', 0)),
+            ))
+        # Stable sort keeps same-time keyframes in file order
+        self.keyframes.sort(key=lambda keyframe: keyframe[0])
+        self.times = [keyframe[0] for keyframe in self.keyframes]
+
+    @classmethod
+    def from_lifeform(cls, path=LIFEFORM_PATH):
+        """Load the "light" keyframes of the active lifeform, falling back to the default day"""
+        return cls(load_lifeform(path).get('light', {}).get('keyframes') or DEFAULT_KEYFRAMES)
+
+    def _segment(self, seconds):
+        """The keyframes either side of ``seconds``, the segment length and how far into it we are"""
+        seconds %= SECONDS_PER_DAY
+        index = bisect.bisect_right(self.times, seconds) - 1  # -1 wraps to yesterday's last keyframe
+        start = self.keyframes[index]
+        end = self.keyframes[(index + 1) % len(self.keyframes)]
+        span = (end[0] - start[0]) % SECONDS_PER_DAY or SECONDS_PER_DAY
+        return start, end, span, (seconds - start[0]) % SECONDS_PER_DAY
+
+    def at(self, seconds, position=0.0):
+        """
+        Return ((r, g, b), brightness) for a time of day in seconds since midnight.
+
+        ``position`` is where the pixel sits along the strip (0 to 1); it only
+        matters inside segments with a spread.
+        """
+        (_, start_rgb, start_brightness, ease, spread), (_, end_rgb, end_brightness, _, _), span, elapsed = self._segment(seconds)
+
+        # Every pixel still starts and finishes with the segment; later ones just move faster
+        spread = min(spread, span - 1)
+        u = min(1.0, max(0.0, elapsed - spread * position) / (span - spread))
+        u = ease(u)
+
+        rgb = tuple(a + (b - a) * u for a, b in zip(start_rgb, end_rgb))
+        brightness = start_brightness + (end_brightness - start_brightness) * u
+        return rgb, brightness
+
+    def frame(self, seconds, count):
+        """((r, g, b), brightness) for each of ``count`` pixels along the strip"""
+        last = max(count - 1, 1)
+        return [self.at(seconds, index / last) for index in range(count)]
+
+    def frame_interval(self, seconds, gamma=1.0):
+        """
+        Roughly how long the output holds still from ``seconds``.
+
+        Static segments hold until the next keyframe. Otherwise it is the
+        segment length over the number of output steps it moves through, halved
+        to allow for easing and gamma being steeper than average in places.
+        """
+        (_, start_rgb, start_brightness, ease, _), (_, end_rgb, end_brightness, _, _), span, elapsed = self._segment(seconds)
+        delta = max(abs(b * end_brightness - a * start_brightness) for a, b in zip(start_rgb, end_rgb))
+        if ease is EASINGS['step'] or delta < 1:
+            return span - elapsed
+        return span / (delta * max(gamma, 1.0) * 2)
+
+
+def pixel_color(rgb, brightness, gamma=1.0):
+    """
+    The bytes the strip actually shows: each channel scaled by brightness, then
+    gamma corrected so equal steps in the schedule look like equal steps to the eye.
+    """
+    return tuple(round(255 * min(1.0, max(0.0, channel / 255 * brightness)) ** gamma) for channel in rgb)
@@ -1,24 +1,43 @@
 from django.http import JsonResponse
-from sunlight.models import Sunlight
+from sunlight.models import Sunlight, SunlightRollup
+from xenolab.history import history_response_data, is_range_request, is_since_request, parse_num_records, since_response_data
+
+
+def serialize_reading(record):
+    return {
+        'timestamp': record.timestamp,
+        'r': record.r,
+        'g': record.g,
+        'b': record.b,
+        'brightness': record.brightness,
+        'status': record.status
+    }
 
 
 def sunlight_data(request):
 
-    num_records = request.GET.get('num_records', 100)
+    # ?start=&end=&resolution=/points= returns min/mean/max buckets computed by the database
+    if is_range_request(request):
+        data, error = history_response_data(request, Sunlight.objects.all(), ['r', 'g', 'b', 'brightness', 'status'], SunlightRollup)
+        if error:
+            return JsonResponse({'error': 'Invalid range', 'details': error}, status=400)
+        return JsonResponse(data, safe=False)
+
+    # ?since=<next_cursor> returns only the rows recorded after the cursor, plus the next cursor
+    if is_since_request(request):
+        data, error = since_response_data(request, Sunlight.objects.all(), serialize_reading)
+        if error:
+            return JsonResponse({'error': 'Invalid cursor', 'details': error}, status=400)
+        return JsonResponse(data)
+
+    try:
+        num_records = parse_num_records(request)
+    except ValueError as e:
+        return JsonResponse({'error': 'Invalid num_records', 'details': str(e)}, status=400)
     
     latest_data = Sunlight.objects.order_by('-timestamp').all()[:num_records]
     
-    data = [
-        {
-            'timestamp': record.timestamp,
-            'r': record.r,
-            'g': record.g,
-            'b': record.b,
-            'brightness': record.brightness,
-            'status': record.status
-        }
-        for record in latest_data
-    ]
+    data = [serialize_reading(record) for record in latest_data]
     
     return JsonResponse(data, safe=False)
 
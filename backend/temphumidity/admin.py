@@ -1,4 +1,5 @@
 from django.contrib import admin
-from .models import TempHumidityReading
+from .models import TempHumidityReading, TempHumidityRollup
 
 admin.site.register(TempHumidityReading)
+admin.site.register(TempHumidityRollup)
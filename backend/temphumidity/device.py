@@ -0,0 +1,85 @@
+import datetime
+import statistics
+import time
+
+import adafruit_dht
+import board
+import loguru
+from django.db import transaction
+
+from temphumidity.models import TempHumidityReading, TempHumidityRollup
+from xenolab.daemon import Device
+from xenolab.scheduler import Scheduler, XENOLAB_TIMEZONE
+from xenolab.state import StatePublisher
+
+SAMPLES = 10
+
+
+def _record(reading, state):
+    with transaction.atomic():
+        reading.save()
+        TempHumidityRollup.record([reading])
+    # Only advertise the reading once /temphumidity/?since= can return it
+    state.publish(timestamp=reading.timestamp.isoformat(), temperature=reading.temperature, humidity=reading.humidity)
+
+
+class TempHumidityDevice(Device):
+    """Read temperature and humidity from DHT11 sensor on the lifeform's schedule (default hourly at minute 00)"""
+
+    name = 'temphumidity'
+
+    def start(self):
+        self.dhtDevice = adafruit_dht.DHT11(board.D4)  # GPIO4 == board.D4
+        self.state = StatePublisher(self.name)
+        self.scheduler = Scheduler.for_device(self.name)
+        self.schedule_date = datetime.datetime.now(XENOLAB_TIMEZONE).date()
+        loguru.logger.info("Starting temperature and humidity worker")
+
+    def tick(self):
+        now = datetime.datetime.now(XENOLAB_TIMEZONE)
+        if 'read' in self.scheduler.pop_due(now):
+            self.take_reading()
+
+        # Reload the lifeform's schedule once a day so edits apply from the next day
+        if now.date() != self.schedule_date:
+            self.scheduler = Scheduler.for_device(self.name, now=now)
+            self.schedule_date = now.date()
+
+        return self.scheduler.sleep_seconds()
+
+    def take_reading(self):
+        temp_readings = []
+        humidity_readings = []
+
+        loguru.logger.info(f"Taking {SAMPLES} readings to average...")
+
+        # Take the readings with 1 second gap
+        for i in range(SAMPLES):
+            try:
+                temperature = self.dhtDevice.temperature
+                humidity = self.dhtDevice.humidity
+
+                if temperature is not None and humidity is not None:
+                    temp_readings.append(temperature)
+                    humidity_readings.append(humidity)
+                    loguru.logger.debug(f"Reading {i+1}/{SAMPLES}: Temp={temperature}°C, Humidity={humidity}%")
+
+            except Exception as e:
+                loguru.logger.error(f"Error on reading {i+1}: {e}")
+
+            # Wait 1 second between readings
+            time.sleep(1)
+
+        # Calculate averages if we have valid readings
+        if temp_readings and humidity_readings:
+            avg_temp = statistics.mean(temp_readings)
+            avg_humidity = statistics.mean(humidity_readings)
+
+            loguru.logger.info(f"Hourly reading (averaged from {len(temp_readings)} samples) - Temperature: {avg_temp:.1f}°C, Humidity: {avg_humidity:.1f}%")
+            reading = TempHumidityReading(temperature=avg_temp, humidity=avg_humidity)
+            self.write(_record, reading, self.state)
+        else:
+            loguru.logger.error(f"Failed to get any valid readings in {SAMPLES} attempts")
+
+    def stop(self):
+        self.dhtDevice.exit()
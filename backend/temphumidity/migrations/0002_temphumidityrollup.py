@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('temphumidity', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TempHumidityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily')], max_length=8)),
+                ('start', models.DateTimeField(help_text='Start of the bucket (UTC aligned)')),
+                ('count', models.IntegerField(default=0, help_text='Number of readings in the bucket')),
+                ('temperature_min', models.FloatField(blank=True, null=True)),
+                ('temperature_max', models.FloatField(blank=True, null=True)),
+                ('temperature_sum', models.FloatField(default=0.0)),
+                ('humidity_min', models.FloatField(blank=True, null=True)),
+                ('humidity_max', models.FloatField(blank=True, null=True)),
+                ('humidity_sum', models.FloatField(default=0.0)),
+            ],
+            options={
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('period', 'start'), name='temphumidity_temphumidityrollup_period_start')],
+            },
+        ),
+    ]
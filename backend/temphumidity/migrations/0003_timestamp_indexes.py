@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('temphumidity', '0002_temphumidityrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='temphumidityreading',
+            index=models.Index(fields=['-timestamp'], name='temphumidity_timestamp_idx'),
+        ),
+    ]
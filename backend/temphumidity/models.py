@@ -1,6 +1,8 @@
 from django.db import models
 from django.utils import timezone
 
+from xenolab.rollups import Rollup
+
 
 class TempHumidityReading(models.Model):
     """
@@ -10,5 +12,26 @@ class TempHumidityReading(models.Model):
     temperature = models.FloatField(help_text="Temperature value in Celsius")
     humidity = models.FloatField(help_text="Humidity value in percentage")
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['-timestamp'], name='temphumidity_timestamp_idx'),
+        ]
+    
     def __str__(self):
         return f"Humidity: {self.value}%, Temp: {self.temperature}°C at {self.timestamp}"
+
+
+class TempHumidityRollup(Rollup):
+    """
+    Hourly and daily aggregates of temperature and humidity readings, see xenolab.rollups
+    """
+    
+    SOURCE = TempHumidityReading
+    FIELDS = ('temperature', 'humidity')
+    
+    temperature_min = models.FloatField(null=True, blank=True)
+    temperature_max = models.FloatField(null=True, blank=True)
+    temperature_sum = models.FloatField(default=0.0)
+    humidity_min = models.FloatField(null=True, blank=True)
+    humidity_max = models.FloatField(null=True, blank=True)
+    humidity_sum = models.FloatField(default=0.0)
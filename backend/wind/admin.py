@@ -1,4 +1,5 @@
 from django.contrib import admin
-from .models import Wind
+from .models import Wind, WindRollup
 
 admin.site.register(Wind)
+admin.site.register(WindRollup)
@@ -0,0 +1,91 @@
+import datetime
+import os
+import time
+
+import loguru
+import serial
+from django.db import transaction
+from django.utils import timezone
+
+from wind.models import Wind, WindRollup
+from xenolab.daemon import Device
+from xenolab.scheduler import Scheduler, XENOLAB_TIMEZONE
+from xenolab.state import StatePublisher
+
+
+def _record(reading, state):
+    with transaction.atomic():
+        reading.save()
+        WindRollup.record([reading])
+    # Only advertise the reading once /wind/?since= can return it
+    state.publish(timestamp=reading.timestamp.isoformat(), status=reading.status, speed=reading.speed)
+
+
+class WindDevice(Device):
+    """Control wind system on the lifeform's schedule (default on at 8:00am and off at 8:00pm daily)"""
+
+    name = 'wind'
+
+    def start(self):
+        port_name = os.environ.get("XENOLAB_WIND_PORT", "/dev/ttyACM0")
+        baud_rate = os.environ.get("XENOLAB_WIND_BAUD_RATE", 19200)
+        timeout = os.environ.get("XENOLAB_WIND_TIMEOUT", 5)
+
+        wind_relay = os.environ.get("XENOLAB_WIND_RELAY", 1)
+        self.relay_on_command = f"relay on {wind_relay}\r"
+        self.relay_off_command = f"relay off {wind_relay}\r"
+
+        self.ser_port = serial.Serial(port_name, baud_rate, timeout=timeout)
+        loguru.logger.info(f"Wind starting up with port {port_name} and baud rate {baud_rate} and timeout {timeout}")
+
+        self.state = StatePublisher(self.name)
+        self.scheduler = Scheduler.for_device(self.name)
+        self.schedule_date = datetime.datetime.now(XENOLAB_TIMEZONE).date()
+
+        # Put the relay in whatever state the schedule last asked for
+        self.wind_is_on = False
+        if self.scheduler.last_action() == 'on':
+            self.turn_on()
+        else:
+            self.send_command(self.relay_off_command)
+
+    def tick(self):
+        now = datetime.datetime.now(XENOLAB_TIMEZONE)
+        for action in self.scheduler.pop_due(now):
+            if action == 'on' and not self.wind_is_on:
+                self.turn_on()
+            elif action == 'off' and self.wind_is_on:
+                self.turn_off()
+
+        # Reload the lifeform's schedule once a day so edits apply from the next day
+        if now.date() != self.schedule_date:
+            self.scheduler = Scheduler.for_device(self.name, now=now)
+            self.schedule_date = now.date()
+
+        return self.scheduler.sleep_seconds()
+
+    def turn_on(self):
+        self.send_command(self.relay_on_command)
+        loguru.logger.info(f"Wind turned ON at {datetime.datetime.now(XENOLAB_TIMEZONE).strftime('%H:%M:%S')}")
+        self.wind_is_on = True
+        self._record(Wind.STATUS_WIND_ON)
+
+    def turn_off(self):
+        self.send_command(self.relay_off_command)
+        loguru.logger.info(f"Wind turned OFF at {datetime.datetime.now(XENOLAB_TIMEZONE).strftime('%H:%M:%S')}")
+        self.wind_is_on = False
+        self._record(Wind.STATUS_WIND_OFF)
+
+    def _record(self, status):
+        reading = Wind(timestamp=timezone.now(), status=status)
+        self.write(_record, reading, self.state)
+
+    def stop(self):
+        self.ser_port.close()
+
+    def send_command(self, command):
+        """Send command to serial port and return response"""
+        self.ser_port.write(command.encode())
+        time.sleep(0.5)
+        response = self.ser_port.readline().decode().strip()
+        return response
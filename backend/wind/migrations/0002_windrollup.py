@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wind', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WindRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily')], max_length=8)),
+                ('start', models.DateTimeField(help_text='Start of the bucket (UTC aligned)')),
+                ('count', models.IntegerField(default=0, help_text='Number of readings in the bucket')),
+                ('speed_min', models.FloatField(blank=True, null=True)),
+                ('speed_max', models.FloatField(blank=True, null=True)),
+                ('speed_sum', models.FloatField(default=0.0)),
+                ('status_min', models.FloatField(blank=True, null=True)),
+                ('status_max', models.FloatField(blank=True, null=True)),
+                ('status_sum', models.FloatField(default=0.0)),
+                ('on_seconds', models.FloatField(default=0.0, help_text='Seconds the wind was on')),
+            ],
+            options={
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('period', 'start'), name='wind_windrollup_period_start')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wind', '0002_windrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wind',
+            index=models.Index(fields=['-timestamp'], name='wind_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wind',
+            index=models.Index(fields=['status', '-timestamp'], name='wind_status_timestamp_idx'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.utils import timezone
 
+from xenolab.rollups import Rollup
+
 
 class Wind(models.Model):
     """
@@ -19,5 +21,31 @@ class Wind(models.Model):
     speed = models.FloatField(help_text="Wind speed value in m/s", default=0.2)
     status = models.IntegerField(help_text="Wind status value", choices=STATUS_CHOICES, default=STATUS_WIND_OFF)
     
+    class Meta:
+        # Latest-row lookups are index seeks
+        indexes = [
+            models.Index(fields=['-timestamp'], name='wind_timestamp_idx'),
+        ]
+    
     def __str__(self):
         return f"Wind: {self.speed} m/s, Status: {self.status} at {self.timestamp}"
+
+
+class WindRollup(Rollup):
+    """
+    Hourly and daily aggregates of Wind readings, see xenolab.rollups
+    """
+    
+    SOURCE = Wind
+    FIELDS = ('speed', 'status')
+    STATUS_FIELD = 'status'
+    STATUS_ON = Wind.STATUS_WIND_ON
+    
+    speed_min = models.FloatField(null=True, blank=True)
+    speed_max = models.FloatField(null=True, blank=True)
+    speed_sum = models.FloatField(default=0.0)
+    status_min = models.FloatField(null=True, blank=True)
+    status_max = models.FloatField(null=True, blank=True)
+    status_sum = models.FloatField(default=0.0)
+    
+    on_seconds = models.FloatField(help_text="Seconds the wind was on", default=0.0)
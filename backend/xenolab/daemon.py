@@ -0,0 +1,159 @@
+import asyncio
+import concurrent.futures
+import os
+import signal
+import time
+
+from django.db import connection
+from django.utils.module_loading import import_string
+
+import loguru
+
+# Devices hosted by xenolabd, by name; XENOLAB_DEVICES picks a subset
+DEVICES = {
+    'sunlight': 'sunlight.device.SunlightDevice',
+    'wind': 'wind.device.WindDevice',
+    'temphumidity': 'temphumidity.device.TempHumidityDevice',
+    'retention': 'xenolab.device.RetentionDevice',
+}
+XENOLAB_DEVICES = [name.strip() for name in os.environ.get('XENOLAB_DEVICES', ','.join(DEVICES)).split(',') if name.strip()]
+# Restart delay after a device crashes, doubling per consecutive crash up to the maximum
+XENOLAB_RESTART_DELAY = float(os.environ.get('XENOLAB_RESTART_DELAY', '1'))
+XENOLAB_RESTART_MAX_DELAY = float(os.environ.get('XENOLAB_RESTART_MAX_DELAY', '60'))
+
+
+class DatabaseWriter:
+    """
+    Runs database writes one at a time on a single thread.
+
+    Devices hand their writes over instead of blocking on SQLite themselves,
+    so a slow or locked write never delays hardware timing, and the daemon
+    holds one connection instead of one per device.
+    """
+
+    def __init__(self):
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='xenolab-db')
+
+    def _run(self, fn, args):
+        try:
+            return fn(*args)
+        except Exception:
+            loguru.logger.exception(f"Database write {getattr(fn, '__qualname__', fn)} failed")
+
+    def submit(self, fn, *args):
+        return self.executor.submit(self._run, fn, args)
+
+    def close(self):
+        """Finish the queued writes and release the connection"""
+        self.executor.submit(connection.close)
+        self.executor.shutdown(wait=True)
+
+
+class Device:
+    """
+    One piece of hardware driven by a timer instead of a polling loop.
+
+    ``tick`` does whatever is due and returns how many seconds to sleep until
+    something is due again. ``start`` and ``stop`` acquire and release the
+    hardware. All three run on the device's own thread, so blocking serial or
+    GPIO calls only ever hold up that device.
+    """
+
+    name = None
+
+    def __init__(self, writer=None):
+        self.writer = writer
+
+    def write(self, fn, *args):
+        """Run a database write through the shared writer, or inline when running standalone"""
+        if self.writer is not None:
+            self.writer.submit(fn, *args)
+        else:
+            fn(*args)
+
+    def start(self):
+        pass
+
+    def tick(self):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+
+def run_standalone(device):
+    """Drive a single device from a management command, the way its old polling loop did"""
+    def terminate(signum, frame):
+        # Supervisor stops programs with SIGTERM; unwind the same way as Ctrl-C so stop() runs
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, terminate)
+    device.start()
+    try:
+        while True:
+            time.sleep(device.tick())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        device.stop()
+
+
+class Daemon:
+    """Hosts each device as an asyncio task and restarts it on its own when it crashes"""
+
+    def __init__(self, names=XENOLAB_DEVICES):
+        self.names = names
+        self.writer = DatabaseWriter()
+
+    async def _call(self, executor, fn):
+        return await asyncio.get_running_loop().run_in_executor(executor, fn)
+
+    async def _supervise(self, name):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'xenolab-{name}')
+        failures = 0
+        try:
+            while True:
+                device = None
+                started = time.monotonic()
+                try:
+                    device = import_string(DEVICES[name])(writer=self.writer)
+                    await self._call(executor, device.start)
+                    loguru.logger.info(f"Started {name}")
+                    while True:
+                        await asyncio.sleep(await self._call(executor, device.tick))
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    loguru.logger.exception(f"{name} crashed")
+                finally:
+                    if device is not None:
+                        try:
+                            # Shield so a cancelled daemon still waits for the hardware to be released
+                            await asyncio.shield(self._call(executor, device.stop))
+                        except Exception:
+                            loguru.logger.exception(f"{name} failed to stop cleanly")
+
+                # Back off on repeated crashes; a device that ran for a while starts over at the base delay
+                failures = 1 if time.monotonic() - started > XENOLAB_RESTART_MAX_DELAY else failures + 1
+                delay = min(XENOLAB_RESTART_DELAY * 2 ** (failures - 1), XENOLAB_RESTART_MAX_DELAY)
+                loguru.logger.info(f"Restarting {name} in {delay:g}s")
+                await asyncio.sleep(delay)
+        finally:
+            executor.shutdown(wait=True)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        stopping = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stopping.set)
+
+        tasks = [asyncio.create_task(self._supervise(name), name=name) for name in self.names]
+        loguru.logger.info(f"xenolabd running {', '.join(self.names)}")
+        try:
+            await stopping.wait()
+        finally:
+            loguru.logger.info("Stopping devices")
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await loop.run_in_executor(None, self.writer.close)
@@ -0,0 +1,136 @@
+import hashlib
+
+from sunlight.models import Sunlight
+from temphumidity.models import TempHumidityReading
+from temphumidity.views import serialize_reading
+from wind.models import Wind
+from xenolab.history import since_page, HISTORY_DEFAULT_RECORDS
+from xenolab.lifeform import lifeform_payload
+from xenolab.state import latest_state, read_state, state_etag
+
+# num_records -> (version, data) for the temperature/humidity series. Only the
+# default size the dashboard asks for is kept, so clients can't grow it with ?num_records=
+_series_cache = {}
+
+
+def _sunlight_snapshot():
+    """Latest Sunlight row in the shape the sunlight worker publishes, for cold starts"""
+    sunlight = Sunlight.objects.order_by('-timestamp').first()
+    if sunlight is None:
+        return None
+    return {
+        'version': 0,
+        'updated': sunlight.timestamp.timestamp(),
+        'timestamp': sunlight.timestamp.isoformat(),
+        'status': sunlight.status,
+        'r': sunlight.r,
+        'g': sunlight.g,
+        'b': sunlight.b,
+        'brightness': sunlight.brightness,
+    }
+
+
+def _wind_snapshot():
+    """Latest Wind row in the shape the wind worker publishes, for cold starts"""
+    wind = Wind.objects.order_by('-timestamp').first()
+    if wind is None:
+        return None
+    return {
+        'version': 0,
+        'updated': wind.timestamp.timestamp(),
+        'timestamp': wind.timestamp.isoformat(),
+        'status': wind.status,
+        'speed': wind.speed,
+    }
+
+
+def _temphumidity_snapshot():
+    """Latest TempHumidityReading in the shape the temphumidity worker publishes, for cold starts"""
+    reading = TempHumidityReading.objects.order_by('-timestamp').first()
+    if reading is None:
+        return None
+    return {
+        'version': 0,
+        'updated': reading.timestamp.timestamp(),
+        'timestamp': reading.timestamp.isoformat(),
+        'temperature': reading.temperature,
+        'humidity': reading.humidity,
+    }
+
+
+SNAPSHOT_FALLBACKS = {
+    'sunlight': _sunlight_snapshot,
+    'wind': _wind_snapshot,
+    'temphumidity': _temphumidity_snapshot,
+}
+
+
+def atmospherics_state():
+    """(payload, etag) for the current sunlight and wind state"""
+    # Served from the workers' snapshots; SQLite is only queried until they first publish
+    sunlight = latest_state('sunlight', _sunlight_snapshot)
+    wind = latest_state('wind', _wind_snapshot)
+
+    payload = {
+        'sunlight': {
+            'status': sunlight['status'],
+            'r': sunlight['r'],
+            'g': sunlight['g'],
+            'b': sunlight['b'],
+            'brightness': sunlight['brightness'],
+        } if sunlight else None,
+        'wind': {
+            'status': wind['status'],
+            'speed': wind['speed'],
+        } if wind else None,
+        'version': {
+            'sunlight': sunlight['version'] if sunlight else None,
+            'wind': wind['version'] if wind else None,
+        },
+    }
+    return payload, state_etag(sunlight, wind)
+
+
+def temphumidity_section(num_records):
+    """
+    (version, data) for the latest temperature/humidity readings, as a ?since= page.
+
+    The series is rebuilt only when the worker publishes a new reading; it
+    publishes after the row is committed, so the query always includes it.
+    """
+    snapshot = read_state('temphumidity')
+    if snapshot is not None:
+        version = str(snapshot['version'])
+        cached = _series_cache.get(num_records)
+        if cached is not None and cached[0] == version:
+            return cached
+
+    data = since_page(TempHumidityReading.objects.all(), '', num_records, serialize_reading)
+    if snapshot is None:
+        # Cold start: the newest row id identifies the series
+        return f"c{data['next_cursor']}", data
+
+    if num_records == HISTORY_DEFAULT_RECORDS:
+        _series_cache[num_records] = (version, data)
+    return version, data
+
+
+def dashboard_state(num_records):
+    """(payload, etag) for everything the dashboard shows on load"""
+    lifeform_version, lifeform = lifeform_payload()
+    atmospherics, atmospherics_etag = atmospherics_state()
+    temphumidity_version, temphumidity = temphumidity_section(num_records)
+
+    versions = {
+        'lifeform': lifeform_version,
+        'atmospherics': atmospherics_etag.strip('"'),
+        'temphumidity': temphumidity_version,
+    }
+    payload = {
+        'version': versions,
+        'lifeform': lifeform,
+        'atmospherics': atmospherics,
+        'temphumidity': temphumidity,
+    }
+    digest = hashlib.md5('|'.join(f'{name}={version}' for name, version in versions.items()).encode()).hexdigest()[:16]
+    return payload, f'"dashboard-{digest}"'
@@ -0,0 +1,43 @@
+import datetime
+
+import loguru
+from django.core.management import call_command
+from django.db import connection
+
+from xenolab.daemon import Device
+from xenolab.scheduler import Scheduler, XENOLAB_TIMEZONE
+
+
+class RetentionDevice(Device):
+    """
+    Run the prunereadings retention job on the lifeform's schedule (default daily at 3:30am).
+
+    The job deletes in short batches on this device's own thread and connection
+    rather than through the shared writer, so sensor writes get in between batches.
+    """
+
+    name = 'retention'
+
+    def start(self):
+        self.scheduler = Scheduler.for_device(self.name)
+        self.schedule_date = datetime.datetime.now(XENOLAB_TIMEZONE).date()
+
+    def tick(self):
+        now = datetime.datetime.now(XENOLAB_TIMEZONE)
+        if 'prune' in self.scheduler.pop_due(now):
+            self.prune()
+
+        # Reload the lifeform's schedule once a day so edits apply from the next day
+        if now.date() != self.schedule_date:
+            self.scheduler = Scheduler.for_device(self.name, now=now)
+            self.schedule_date = now.date()
+
+        return self.scheduler.sleep_seconds()
+
+    def prune(self):
+        loguru.logger.info("Running the retention job")
+        try:
+            call_command('prunereadings')
+        finally:
+            # Idle until tomorrow; don't hold a connection open in the meantime
+            connection.close()
@@ -0,0 +1,74 @@
+import json
+import os
+
+from xenolab.state import read_state
+
+# Devices whose state is pushed over /events/, in cursor order
+EVENT_DEVICES = ('sunlight', 'wind', 'temphumidity')
+# How often each stream checks the state files; a stat per device, no database
+XENOLAB_EVENTS_POLL = float(os.environ.get('XENOLAB_EVENTS_POLL', '1.0'))
+# Comment sent on quiet streams so proxies and the browser keep the connection open
+XENOLAB_EVENTS_KEEPALIVE = float(os.environ.get('XENOLAB_EVENTS_KEEPALIVE', '15'))
+# Reconnect delay suggested to EventSource clients, in milliseconds
+XENOLAB_EVENTS_RETRY = int(os.environ.get('XENOLAB_EVENTS_RETRY', '3000'))
+
+
+def parse_cursor(value):
+    """Versions per device from a Last-Event-ID like "12.3.7"; anything malformed means "send everything\""""
+    parts = (value or '').split('.')
+    if len(parts) != len(EVENT_DEVICES):
+        return {}
+    try:
+        return {device: int(part) for device, part in zip(EVENT_DEVICES, parts) if part != '-'}
+    except ValueError:
+        return {}
+
+
+def format_cursor(versions):
+    return '.'.join(str(versions[device]) if device in versions else '-' for device in EVENT_DEVICES)
+
+
+class StateEventStream:
+    """
+    Server-Sent Events for the devices' latest state.
+
+    Each event is one device's full snapshot, named after the device, and its
+    id is the cursor of every device's version. A client reconnecting with
+    Last-Event-ID only receives the devices that changed while it was away;
+    intermediate states are collapsed into the latest one.
+    """
+
+    def __init__(self, last_event_id=None, fallbacks=None):
+        self.versions = parse_cursor(last_event_id)
+        self.fallbacks = fallbacks or {}
+        self.quiet = 0.0
+
+    def _event(self, device, snapshot):
+        self.versions[device] = snapshot['version']
+        return f"id: {format_cursor(self.versions)}\nevent: {device}\ndata: {json.dumps(snapshot, default=str)}\n\n"
+
+    def initial(self):
+        """Retry hint plus every device the client hasn't seen, using the database until a device first publishes"""
+        chunks = [f"retry: {XENOLAB_EVENTS_RETRY}\n\n"]
+        for device in EVENT_DEVICES:
+            snapshot = read_state(device)
+            if snapshot is None and device in self.fallbacks:
+                snapshot = self.fallbacks[device]()
+            if snapshot is not None and self.versions.get(device) != snapshot['version']:
+                chunks.append(self._event(device, snapshot))
+        return ''.join(chunks).encode('utf-8')
+
+    def poll(self, elapsed):
+        """Events for devices republished since the last poll, a keepalive when quiet, or b''"""
+        chunks = []
+        for device in EVENT_DEVICES:
+            snapshot = read_state(device)
+            # Compare for inequality: versions restart if the state directory is wiped on reboot
+            if snapshot is not None and self.versions.get(device) != snapshot['version']:
+                chunks.append(self._event(device, snapshot))
+
+        self.quiet = 0.0 if chunks else self.quiet + elapsed
+        if self.quiet >= XENOLAB_EVENTS_KEEPALIVE:
+            self.quiet = 0.0
+            chunks.append(": keepalive\n\n")
+        return ''.join(chunks).encode('utf-8')
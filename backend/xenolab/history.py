@@ -0,0 +1,392 @@
+import datetime
+import itertools
+import math
+
+from django.db.models import Avg, Count, FloatField, Func, Max, Min, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from xenolab.rollups import PERIODS
+
+# Range queries return at most this many buckets, whatever ?points= or ?resolution= ask for
+HISTORY_MAX_POINTS = 2000
+HISTORY_DEFAULT_POINTS = 500
+HISTORY_DEFAULT_SPAN = datetime.timedelta(hours=24)
+# Rows per ?since= page when ?num_records= isn't given
+HISTORY_DEFAULT_RECORDS = 100
+# Row lists and ?since= pages return at most this many rows, whatever ?num_records= asks for
+HISTORY_MAX_RECORDS = 1000
+# Times outside these bounds can't be turned into a datetime, so they are rejected like malformed ones
+HISTORY_MIN_TIME = datetime.datetime(1, 1, 1, tzinfo=datetime.timezone.utc).timestamp()
+HISTORY_MAX_TIME = datetime.datetime(9999, 12, 31, tzinfo=datetime.timezone.utc).timestamp()
+
+
+class Epoch(Func):
+    """Seconds since the Unix epoch for a DateTimeField, computed by the database"""
+    output_field = FloatField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="CAST(strftime('%%%%s', %(expressions)s) AS REAL)", **extra_context)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='EXTRACT(EPOCH FROM %(expressions)s)', **extra_context)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='UNIX_TIMESTAMP(%(expressions)s)', **extra_context)
+
+
+def parse_time(value):
+    """
+    Accept a Unix timestamp or an ISO 8601 datetime; returns seconds since the
+    epoch, or None if the value is malformed, not finite or out of range.
+    """
+    try:
+        timestamp = float(value)
+    except ValueError:
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            return None  # Well formed but not a real date, e.g. February 30th
+        if parsed is None:
+            return None
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        timestamp = parsed.timestamp()
+    # Also false for nan and infinities
+    if not HISTORY_MIN_TIME <= timestamp <= HISTORY_MAX_TIME:
+        return None
+    return timestamp
+
+
+def is_range_request(request):
+    """Whether the request asks for a bucketed time range instead of the latest rows"""
+    return any(name in request.GET for name in ('start', 'end', 'resolution', 'points'))
+
+
+def parse_range(request):
+    """
+    Read ?start=, ?end=, ?resolution= (bucket seconds) and ?points= from a request.
+
+    Returns (start, end, bucket_seconds) as Unix timestamps; raises ValueError
+    with a message suitable for the client if a parameter is invalid.
+    """
+    end = parse_time(request.GET['end']) if 'end' in request.GET else timezone.now().timestamp()
+    if end is None:
+        raise ValueError('end must be a Unix timestamp or an ISO 8601 datetime')
+
+    start = parse_time(request.GET['start']) if 'start' in request.GET else max(end - HISTORY_DEFAULT_SPAN.total_seconds(), HISTORY_MIN_TIME)
+    if start is None:
+        raise ValueError('start must be a Unix timestamp or an ISO 8601 datetime')
+    if start >= end:
+        raise ValueError('start must be before end')
+
+    span = end - start
+
+    if 'resolution' in request.GET:
+        try:
+            resolution = float(request.GET['resolution'])
+        except ValueError:
+            resolution = 0
+        if not resolution > 0:
+            raise ValueError('resolution must be a positive number of seconds')
+        # Anything wider than the range is a single bucket
+        resolution = min(max(resolution, 1), span)
+    else:
+        try:
+            points = int(request.GET.get('points', HISTORY_DEFAULT_POINTS))
+        except ValueError:
+            points = 0
+        if points < 1:
+            raise ValueError('points must be a positive integer')
+        resolution = span / min(points, HISTORY_MAX_POINTS)
+
+    # Whole seconds keep bucket edges aligned, and the point cap bounds the response
+    # like HISTORY_MAX_RECORDS bounds row lists
+    bucket_seconds = max(math.ceil(resolution), math.ceil(span / HISTORY_MAX_POINTS), 1)
+    return start, end, bucket_seconds
+
+
+def _bucket(field, origin, bucket_seconds):
+    """floor((epoch(field) - origin) / width), computed by the database"""
+    return Func(
+        (Epoch(field) - origin) / bucket_seconds,
+        function='CAST', template='%(function)s(%(expressions)s AS INTEGER)'
+    )
+
+
+def _datetime(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc)
+
+
+def _on_time(queryset, status_field, status_on, start, end, origin, bucket_seconds):
+    """
+    Seconds the status was on in each bucket over [start, end), by bucket number.
+
+    Counted like the rollups count it: each reading's status holds until the
+    next reading, so the readings either side of the range are needed too.
+    """
+    readings = queryset.order_by('timestamp').values_list('timestamp', status_field)
+    previous = readings.filter(timestamp__lt=_datetime(start)).last()
+    following = readings.filter(timestamp__gte=_datetime(end)).first()
+    window = readings.filter(timestamp__gte=_datetime(start), timestamp__lt=_datetime(end)).iterator(chunk_size=2000)
+
+    on_time = {}
+    for reading in itertools.chain(window, [following] if following is not None else []):
+        if previous is not None and previous[1] == status_on:
+            interval_start = max(previous[0].timestamp(), start)
+            interval_end = min(reading[0].timestamp(), end)
+            bucket = int((interval_start - origin) // bucket_seconds)
+            while interval_start < interval_end:
+                bucket_end = origin + (bucket + 1) * bucket_seconds
+                on_time[bucket] = on_time.get(bucket, 0.0) + min(interval_end, bucket_end) - interval_start
+                interval_start = bucket_end
+                bucket += 1
+        previous = reading
+    return on_time
+
+
+def _raw_buckets(queryset, fields, start, end, origin, bucket_seconds, status_field=None, status_on=1):
+    """
+    Count, sum, min and max of every field for the rows in [start, end), bucketed
+    from origin, plus the on-time of ``status_field`` if it is given.
+    """
+    aggregates = {'count': Count('pk')}
+    for field in fields:
+        # An annotation can't reuse a field's name, hence the suffixes
+        aggregates[f'{field}_sum'] = Sum(field)
+        aggregates[f'{field}_min'] = Min(field)
+        aggregates[f'{field}_max'] = Max(field)
+
+    buckets = list(
+        queryset
+        .filter(timestamp__gte=_datetime(start), timestamp__lt=_datetime(end))
+        .annotate(bucket=_bucket('timestamp', origin, bucket_seconds))
+        .values('bucket')
+        .annotate(**aggregates)
+        .order_by('bucket')
+    )
+    if status_field is None:
+        return buckets
+
+    on_time = _on_time(queryset, status_field, status_on, start, end, origin, bucket_seconds)
+    for bucket in buckets:
+        bucket['on_seconds'] = on_time.pop(bucket['bucket'], 0.0)
+    # Like a rollup row, a bucket the status was on through has a point even without readings
+    for number, seconds in on_time.items():
+        bucket = {'bucket': number, 'count': 0, 'on_seconds': seconds}
+        for field in fields:
+            bucket.update({f'{field}_sum': 0.0, f'{field}_min': None, f'{field}_max': None})
+        buckets.append(bucket)
+    return sorted(buckets, key=lambda bucket: bucket['bucket'])
+
+
+def _rollup_buckets(rollup_model, fields, start, end, origin, bucket_seconds, period):
+    """Same as _raw_buckets, summed from the rollup rows of one period starting in [start, end)"""
+    aggregates = {'count_total': Sum('count')}
+    for field in fields:
+        aggregates[f'{field}_total'] = Sum(f'{field}_sum')
+        aggregates[f'{field}_lowest'] = Min(f'{field}_min')
+        aggregates[f'{field}_highest'] = Max(f'{field}_max')
+    if rollup_model.STATUS_FIELD:
+        aggregates['on_seconds_total'] = Sum('on_seconds')
+
+    rows = (
+        rollup_model.objects
+        .filter(period=period, start__gte=_datetime(start), start__lt=_datetime(end))
+        .annotate(bucket=_bucket('start', origin, bucket_seconds))
+        .values('bucket')
+        .annotate(**aggregates)
+        .order_by('bucket')
+    )
+
+    buckets = []
+    for row in rows:
+        bucket = {'bucket': row['bucket'], 'count': row['count_total']}
+        for field in fields:
+            bucket[f'{field}_sum'] = row[f'{field}_total']
+            bucket[f'{field}_min'] = row[f'{field}_lowest']
+            bucket[f'{field}_max'] = row[f'{field}_highest']
+        if rollup_model.STATUS_FIELD:
+            bucket['on_seconds'] = row['on_seconds_total']
+        buckets.append(bucket)
+    return buckets
+
+
+def _least(a, b):
+    return b if a is None else a if b is None else min(a, b)
+
+
+def _greatest(a, b):
+    return b if a is None else a if b is None else max(a, b)
+
+
+def _combine(buckets, fields):
+    """Merge partial aggregates of the same bucket, e.g. from rollups and raw rows; returns them by bucket"""
+    combined = {}
+    for bucket in buckets:
+        total = combined.get(bucket['bucket'])
+        if total is None:
+            combined[bucket['bucket']] = dict(bucket)
+            continue
+        total['count'] += bucket['count']
+        for field in fields:
+            total[f'{field}_sum'] += bucket[f'{field}_sum']
+            total[f'{field}_min'] = _least(total[f'{field}_min'], bucket[f'{field}_min'])
+            total[f'{field}_max'] = _greatest(total[f'{field}_max'], bucket[f'{field}_max'])
+        if 'on_seconds' in bucket:
+            total['on_seconds'] = total.get('on_seconds', 0.0) + bucket['on_seconds']
+    return [combined[key] for key in sorted(combined)]
+
+
+def _points(buckets, fields, start, origin, bucket_seconds):
+    """
+    One point per bucket with the row count and min/mean/max of every field;
+    the mean keeps the field's own name so a bucketed series plots like the raw one.
+    """
+    data = []
+    for bucket in buckets:
+        count = bucket['count']
+        point = {
+            # A bucket that began before the range only holds data from its start
+            'timestamp': _datetime(max(origin + bucket['bucket'] * bucket_seconds, start)),
+            'count': count,
+        }
+        for field in fields:
+            point[field] = bucket[f'{field}_sum'] / count if count else None
+            point[f'{field}_min'] = bucket[f'{field}_min']
+            point[f'{field}_max'] = bucket[f'{field}_max']
+        if 'on_seconds' in bucket:
+            point['on_seconds'] = bucket['on_seconds']
+        data.append(point)
+    return data
+
+
+def bucketed_history(queryset, fields, start, end, bucket_seconds, status_field=None, status_on=1):
+    """
+    Aggregate rows between start and end into fixed-width time buckets in the database.
+
+    With ``status_field`` each point also reports ``on_seconds``, the same as
+    a rollup-backed point for that bucket would.
+    """
+    buckets = _raw_buckets(queryset, fields, start, end, start, bucket_seconds, status_field, status_on)
+    return _points(buckets, fields, start, start, bucket_seconds)
+
+
+def rollup_period(bucket_seconds):
+    """The coarsest rollup period no wider than the requested buckets, or None for raw rows"""
+    periods = [period for period, seconds in PERIODS.items() if seconds <= bucket_seconds]
+    return max(periods, key=PERIODS.get) if periods else None
+
+
+def bucketed_rollups(rollup_model, queryset, fields, start, end, bucket_seconds, period):
+    """
+    Same output as bucketed_history, combined from precomputed rollup rows.
+
+    Buckets are widened to whole rollup periods and aligned to the period
+    grid, so every rollup row falls into exactly one bucket. The rollups only
+    cover whole periods; a partial period at either end of the range is
+    aggregated from the raw rows, so no bucket holds data from outside it.
+    """
+    seconds = PERIODS[period]
+    status = (rollup_model.STATUS_FIELD, rollup_model.STATUS_ON) if rollup_model.STATUS_FIELD else ()
+    origin = start // seconds * seconds
+    # Starting on the grid can add a bucket, so widen them to stay within the point cap
+    bucket_seconds = math.ceil(max(bucket_seconds, (end - origin) / HISTORY_MAX_POINTS) / seconds) * seconds
+
+    whole_start = math.ceil(start / seconds) * seconds
+    whole_end = end // seconds * seconds
+    if whole_start >= whole_end:
+        return _points(_raw_buckets(queryset, fields, start, end, origin, bucket_seconds, *status), fields, start, origin, bucket_seconds)
+
+    buckets = _rollup_buckets(rollup_model, fields, whole_start, whole_end, origin, bucket_seconds, period)
+    if start < whole_start:
+        buckets += _raw_buckets(queryset, fields, start, whole_start, origin, bucket_seconds, *status)
+    if whole_end < end:
+        buckets += _raw_buckets(queryset, fields, whole_end, end, origin, bucket_seconds, *status)
+    return _points(_combine(buckets, fields), fields, start, origin, bucket_seconds)
+
+
+def history_response_data(request, queryset, fields, rollup_model=None):
+    """
+    Return (data, error) for a range request against a model with a timestamp field.
+
+    Buckets of an hour or more are read from the coarsest rollup that fits,
+    so long ranges only touch the raw readings at their ragged ends. Points
+    have the same fields either way, including ``on_seconds`` for models
+    whose rollups track a status.
+    """
+    try:
+        start, end, bucket_seconds = parse_range(request)
+    except ValueError as e:
+        return None, str(e)
+
+    period = rollup_period(bucket_seconds) if rollup_model is not None else None
+    if period is not None:
+        return bucketed_rollups(rollup_model, queryset, fields, start, end, bucket_seconds, period), None
+    if rollup_model is not None and rollup_model.STATUS_FIELD:
+        return bucketed_history(queryset, fields, start, end, bucket_seconds, rollup_model.STATUS_FIELD, rollup_model.STATUS_ON), None
+    return bucketed_history(queryset, fields, start, end, bucket_seconds), None
+
+
+def is_since_request(request):
+    """Whether the request asks for the rows after a cursor (?since=, possibly empty)"""
+    return 'since' in request.GET
+
+
+def parse_num_records(request, default=HISTORY_DEFAULT_RECORDS):
+    """?num_records= capped at HISTORY_MAX_RECORDS; raises ValueError unless it is a positive integer"""
+    try:
+        num_records = int(request.GET.get('num_records', default))
+    except ValueError:
+        num_records = 0
+    if num_records < 1:
+        raise ValueError('num_records must be a positive integer')
+    return min(num_records, HISTORY_MAX_RECORDS)
+
+
+def since_page(queryset, since, num_records, serialize):
+    """
+    The rows after a cursor, oldest first, for a model with a timestamp field.
+
+    ``since`` is a row id from a previous ``next_cursor`` or an ISO 8601
+    datetime; empty means "the latest rows". Returns the rows with a
+    ``next_cursor`` for the following call and ``has_more`` if the page was
+    full, so a poller downloads each reading once and nothing when idle.
+    Raises ValueError for a malformed cursor.
+    """
+    if since == '':
+        records = list(queryset.order_by('-timestamp', '-pk')[:num_records])[::-1]
+        has_more = False
+    else:
+        if since.isdigit():
+            newer = queryset.filter(pk__gt=int(since)).order_by('pk')
+        else:
+            after = parse_datetime(since)
+            if after is None:
+                raise ValueError('since must be a cursor from next_cursor or an ISO 8601 datetime')
+            if timezone.is_naive(after):
+                after = timezone.make_aware(after)
+            newer = queryset.filter(timestamp__gt=after).order_by('timestamp', 'pk')
+        records = list(newer[:num_records + 1])
+        has_more = len(records) > num_records
+        records = records[:num_records]
+
+    if records:
+        next_cursor = str(records[-1].pk)
+    else:
+        # Nothing new: keep the caller's cursor, or start from the beginning for an empty table
+        next_cursor = since or '0'
+
+    return {
+        'results': [serialize(record) for record in records],
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+    }
+
+
+def since_response_data(request, queryset, serialize):
+    """Return (data, error) for a ?since= request, see since_page"""
+    try:
+        return since_page(queryset, request.GET['since'], parse_num_records(request), serialize), None
+    except ValueError as e:
+        return None, str(e)
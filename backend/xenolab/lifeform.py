@@ -0,0 +1,129 @@
+import json
+import os
+
+from django.conf import settings
+
+ASSETS_DIR = settings.BASE_DIR / 'assets'
+# The active lifeform; a copy of one of the assets/lifeform.<profile>.json profiles
+LIFEFORM_PATH = ASSETS_DIR / 'lifeform.json'
+PROFILE_PREFIX = 'lifeform.'
+PROFILE_SUFFIX = '.json'
+
+
+class FileAsset:
+    """A file under the assets directory with validators derived from its stat"""
+
+    def __init__(self, path, stat):
+        self.path = path
+        self.size = stat.st_size
+        self.modified = stat.st_mtime
+        self.version = f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+
+    @property
+    def etag(self):
+        return f'"{self.path.stem}-{self.version}"'
+
+
+class AssetRegistry:
+    """
+    Lifeform profiles and their images, loaded once and re-read only when a
+    file's mtime or size changes, so edits and profile switches apply without
+    a restart and an unchanged file costs one stat().
+    """
+
+    def __init__(self, directory=ASSETS_DIR, active_path=LIFEFORM_PATH):
+        self.directory = directory
+        self.active_path = active_path
+        # path -> ((mtime_ns, size), version, data)
+        self._json = {}
+
+    def _stat(self, path):
+        try:
+            return os.stat(path)
+        except FileNotFoundError:
+            return None
+
+    def json(self, path):
+        """(version, data) for a JSON asset; ('-', {}) if it doesn't exist"""
+        stat = self._stat(path)
+        if stat is None:
+            return '-', {}
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._json.get(path)
+        if cached is None or cached[0] != key:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            cached = self._json[path] = (key, FileAsset(path, stat).version, data)
+        return cached[1], cached[2]
+
+    def file(self, name):
+        """A FileAsset for a file in the assets directory, or None if missing or outside it"""
+        path = (self.directory / name).resolve()
+        if path.parent != self.directory.resolve():
+            return None
+        stat = self._stat(path)
+        return FileAsset(path, stat) if stat is not None else None
+
+    def profiles(self):
+        """Profile names, e.g. ['pitcher', 'sundew', 'venus']"""
+        # 'lifeform.json' itself matches the pattern with an empty name
+        return sorted(
+            name[len(PROFILE_PREFIX):-len(PROFILE_SUFFIX)]
+            for name in os.listdir(self.directory)
+            if name.startswith(PROFILE_PREFIX) and name.endswith(PROFILE_SUFFIX)
+            and len(name) > len(PROFILE_PREFIX) + len(PROFILE_SUFFIX)
+        )
+
+    def profile(self, name):
+        if name not in self.profiles():
+            raise ValueError(f"Unknown profile '{name}', expected one of: {', '.join(self.profiles())}")
+        return self.json(self.directory / f'{PROFILE_PREFIX}{name}{PROFILE_SUFFIX}')[1]
+
+    def active(self):
+        """(version, data) for the active lifeform"""
+        return self.json(self.active_path)
+
+    def active_profile(self, data=None):
+        """The active profile's name; copies made before switching was recorded are matched by content"""
+        data = self.active()[1] if data is None else data
+        if 'profile' in data:
+            return data['profile']
+        for name in self.profiles():
+            if self.profile(name) == data:
+                return name
+        return None
+
+    def map(self, data=None):
+        """The active lifeform's map image as a FileAsset, or None"""
+        data = self.active()[1] if data is None else data
+        return self.file(data['map']) if data.get('map') else None
+
+    def switch(self, name):
+        """Make ``name`` the active profile; readers in every process pick it up on their next stat()"""
+        data = {**self.profile(name), 'profile': name}
+        tmp_path = f"{self.active_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=4)
+        os.replace(tmp_path, self.active_path)
+        return data
+
+
+registry = AssetRegistry()
+
+
+def load_lifeform(path=LIFEFORM_PATH):
+    """The active lifeform's config, or an empty dict if none is installed"""
+    return registry.json(path)[1]
+
+
+def lifeform_payload():
+    """(version, data) for /lifeform/: the active lifeform plus its profile name and a versioned map URL"""
+    version, data = registry.active()
+    asset = registry.map(data)
+    payload = {
+        **data,
+        'profile': registry.active_profile(data),
+        'profiles': registry.profiles(),
+        'map_url': f'/map/?v={asset.version}' if asset else None,
+    }
+    return f"{version}-{asset.version if asset else '-'}", payload
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from xenolab.rollups import rollup_models
+
+import time
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the hourly and daily rollup tables from the raw readings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', help='Rollup models to rebuild, e.g. TempHumidityRollup (default: all)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Raw readings fetched per query')
+
+    def handle(self, *args, **options):
+        models = rollup_models()
+        if options['models']:
+            names = {name.lower() for name in options['models']}
+            models = [model for model in models if model.__name__.lower() in names]
+
+        for model in models:
+            started = time.perf_counter()
+            buckets = model.rebuild(chunk_size=options['chunk_size'])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(
+                f"{model.__name__}: rebuilt {buckets} buckets from {model.SOURCE.objects.count()} readings in {elapsed:.2f}s"
+            ))
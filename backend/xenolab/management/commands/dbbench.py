@@ -0,0 +1,146 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, OperationalError
+from django.test import Client
+from django.utils import timezone
+
+from sunlight.models import Sunlight
+from temphumidity.models import TempHumidityReading, TempHumidityRollup
+from wind.models import Wind
+from xenolab.settings import sqlite_options
+
+import datetime
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+# Django's stock SQLite connection against the tuned profile from settings
+PROFILES = {
+    'default': {},
+    'tuned': settings.SQLITE_PRAGMAS,
+}
+
+READ_ENDPOINTS = ['/temphumidity/', '/atmospherics/', '/temphumidity/?points=200']
+
+
+def _connect(path, pragmas):
+    connection.close()
+    connection.settings_dict['NAME'] = path
+    connection.settings_dict['OPTIONS'] = sqlite_options(pragmas) if pragmas else {}
+
+
+def _writer(path, pragmas, duration, interval, results):
+    """Insert readings and fold them into the rollups, like the sensor workers"""
+    _connect(path, pragmas)
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            reading = TempHumidityReading.objects.create(temperature=20 + random.random(), humidity=60 + random.random())
+            TempHumidityRollup.record([reading])
+            latencies.append(time.perf_counter() - started)
+        except OperationalError:
+            errors += 1
+        time.sleep(interval)
+    results.put(('write', latencies, errors))
+
+
+def _reader(path, pragmas, duration, results):
+    """Hit the history endpoints back to back, like dashboard clients"""
+    _connect(path, pragmas)
+    client = Client(raise_request_exception=False)
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        response = client.get(random.choice(READ_ENDPOINTS))
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+    results.put(('read', latencies, errors))
+
+
+class Command(BaseCommand):
+    help = 'Run parallel reader and writer processes against a scratch SQLite database with and without the connection tuning'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help='Reader processes (web workers)')
+        parser.add_argument('--writers', type=int, default=3, help='Writer processes (sensor workers)')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per profile')
+        parser.add_argument('--write-interval', type=float, default=0.01, help='Seconds between writes per writer')
+        parser.add_argument('--seed', type=int, default=50000, help='Readings to seed before the run')
+        parser.add_argument('--profiles', default=','.join(PROFILES), help='Comma separated profiles to compare')
+
+    def _prepare(self, path, pragmas, seed):
+        _connect(path, pragmas)
+        call_command('migrate', verbosity=0)
+        now = timezone.now()
+        TempHumidityReading.objects.bulk_create([
+            TempHumidityReading(timestamp=now - datetime.timedelta(minutes=i), temperature=20, humidity=60)
+            for i in range(seed)
+        ], batch_size=5000)
+        TempHumidityRollup.rebuild()
+        Sunlight.objects.create(status=Sunlight.STATUS_SUNLIGHT_ON)
+        Wind.objects.create(status=Wind.STATUS_WIND_ON)
+        connection.close()
+
+    def _run(self, path, pragmas, options):
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        processes = [
+            context.Process(target=_writer, args=(path, pragmas, options['duration'], options['write_interval'], results))
+            for _ in range(options['writers'])
+        ] + [
+            context.Process(target=_reader, args=(path, pragmas, options['duration'], results))
+            for _ in range(options['readers'])
+        ]
+        for process in processes:
+            process.start()
+
+        totals = {'read': ([], 0), 'write': ([], 0)}
+        for _ in processes:
+            kind, latencies, errors = results.get()
+            totals[kind] = (totals[kind][0] + latencies, totals[kind][1] + errors)
+        for process in processes:
+            process.join()
+        return totals
+
+    def handle(self, *args, **options):
+        original_name = connection.settings_dict['NAME']
+        original_options = connection.settings_dict['OPTIONS']
+        rows = []
+
+        try:
+            for profile in options['profiles'].split(','):
+                pragmas = PROFILES[profile]
+                directory = tempfile.mkdtemp(prefix='xenolab-dbbench-')
+                path = os.path.join(directory, 'db.sqlite3')
+                try:
+                    self._prepare(path, pragmas, options['seed'])
+                    totals = self._run(path, pragmas, options)
+                finally:
+                    for name in os.listdir(directory):
+                        os.unlink(os.path.join(directory, name))
+                    os.rmdir(directory)
+
+                for kind in ('read', 'write'):
+                    latencies, errors = totals[kind]
+                    latencies.sort()
+                    p50 = statistics.median(latencies) * 1000 if latencies else 0
+                    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+                    rows.append((profile, kind, len(latencies) / options['duration'], p50, p99, errors))
+        finally:
+            connection.close()
+            connection.settings_dict['NAME'] = original_name
+            connection.settings_dict['OPTIONS'] = original_options
+
+        self.stdout.write(f"SQLite concurrency benchmark ({options['readers']} readers, {options['writers']} writers, {options['duration']:g}s per profile)")
+        self.stdout.write(f"{'profile':<10}{'op':<7}{'ops/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+        for profile, kind, rate, p50, p99, errors in rows:
+            self.stdout.write(f"{profile:<10}{kind:<7}{rate:>9.1f}{p50:>9.2f}{p99:>9.2f}{errors:>8}")
@@ -0,0 +1,122 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+
+from sunlight.models import Sunlight
+from temphumidity.models import TempHumidityReading
+from wind.models import Wind
+
+import datetime
+import math
+import os
+import statistics
+import tempfile
+import time
+
+# Migrations that add the timestamp indexes, and the ones just before them
+INDEX_MIGRATIONS = {
+    'sunlight': ('0002', '0003'),
+    'wind': ('0002', '0003'),
+    'temphumidity': ('0002', '0003'),
+}
+
+ENDPOINTS = [
+    '/sunlight/',
+    '/wind/',
+    '/temphumidity/',
+    '/atmospherics/',
+    '/temphumidity/?points=500',
+]
+
+
+class Command(BaseCommand):
+    help = 'Seed a scratch database with readings and time the history endpoints with and without the timestamp indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365, help='Days of readings to seed')
+        parser.add_argument('--interval', type=int, default=300, help='Seconds between seeded readings')
+        parser.add_argument('--requests', type=int, default=50, help='Requests per endpoint')
+        parser.add_argument('--database', help='Scratch SQLite file to use (default: a temporary file)')
+
+    def _use_database(self, path):
+        """Point the default connection at another SQLite file"""
+        connection.close()
+        connection.settings_dict['NAME'] = path
+
+    def _seed(self, days, interval):
+        end = timezone.now()
+        count = days * 24 * 60 * 60 // interval
+        batch_size = 5000
+
+        for offset in range(0, count, batch_size):
+            timestamps = [end - datetime.timedelta(seconds=interval * i) for i in range(offset, min(offset + batch_size, count))]
+            Sunlight.objects.bulk_create([
+                Sunlight(timestamp=timestamp, status=int(timestamp.hour in range(8, 19)), brightness=0.5 + 0.5 * math.sin(timestamp.hour))
+                for timestamp in timestamps
+            ])
+            Wind.objects.bulk_create([
+                Wind(timestamp=timestamp, status=int(timestamp.hour in range(8, 20)))
+                for timestamp in timestamps
+            ])
+            TempHumidityReading.objects.bulk_create([
+                TempHumidityReading(timestamp=timestamp, temperature=20 + 5 * math.sin(timestamp.hour / 4), humidity=60 + 10 * math.cos(timestamp.hour / 4))
+                for timestamp in timestamps
+            ])
+        return count
+
+    def _time_endpoints(self, requests):
+        client = Client()
+        results = {}
+        for endpoint in ENDPOINTS:
+            client.get(endpoint)  # Warm the page cache
+            timings = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                response = client.get(endpoint)
+                timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{endpoint} returned {response.status_code}")
+            results[endpoint] = statistics.median(timings)
+        return results
+
+    def _query_plan(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {Sunlight.objects.order_by('-timestamp')[:1].query}")
+            return ' / '.join(row[-1] for row in cursor.fetchall())
+
+    def _migrate(self, index):
+        for app, (before, after) in INDEX_MIGRATIONS.items():
+            call_command('migrate', app, after if index else before, verbosity=0)
+
+    def handle(self, *args, **options):
+        original = connection.settings_dict['NAME']
+        path = options['database']
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix='xenolab-historybench-', suffix='.sqlite3')
+            os.close(fd)
+
+        try:
+            self._use_database(path)
+            call_command('migrate', verbosity=0)
+
+            started = time.perf_counter()
+            count = self._seed(options['days'], options['interval'])
+            self.stdout.write(f"Seeded {count} readings per model ({options['days']} days every {options['interval']}s) in {time.perf_counter() - started:.1f}s")
+
+            results = {}
+            for label, index in (('without indexes', False), ('with indexes', True)):
+                self._migrate(index)
+                self.stdout.write(f"Latest sunlight {label}: {self._query_plan()}")
+                results[label] = self._time_endpoints(options['requests'])
+
+            self.stdout.write(f"{'endpoint':<28}{'no index ms':>13}{'index ms':>10}{'speedup':>9}")
+            for endpoint in ENDPOINTS:
+                before = results['without indexes'][endpoint]
+                after = results['with indexes'][endpoint]
+                self.stdout.write(f"{endpoint:<28}{before:>13.2f}{after:>10.2f}{before / after:>8.1f}x")
+        finally:
+            self._use_database(original)
+            if options['database'] is None:
+                os.unlink(path)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from xenolab.lifeform import registry
+
+
+class Command(BaseCommand):
+    help = 'Show the lifeform profiles, or switch to one without restarting anything'
+
+    def add_arguments(self, parser):
+        parser.add_argument('profile', nargs='?', help='Profile to make active, e.g. venus')
+
+    def handle(self, *args, **options):
+        if options['profile']:
+            try:
+                data = registry.switch(options['profile'])
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(f"Switched to {options['profile']} ({data.get('lifeform')})")
+            return
+
+        active = registry.active_profile()
+        for name in registry.profiles():
+            self.stdout.write(f"{'*' if name == active else ' '} {name}")
@@ -0,0 +1,97 @@
+from django.core.management.base import BaseCommand
+
+from camera.models import MotionEvent
+from xenolab.retention import (
+    compact,
+    convert_to_incremental_vacuum,
+    database_size,
+    free_pages,
+    incremental_vacuum,
+    prune,
+    retention_cutoff,
+    XENOLAB_RETENTION_BATCH_SIZE,
+    XENOLAB_RETENTION_DAYS,
+    XENOLAB_RETENTION_PAUSE,
+)
+from xenolab.rollups import rollup_models
+
+import os
+import time
+
+
+class Command(BaseCommand):
+    help = 'Compact raw readings older than the retention window into rollups, delete them in batches and vacuum the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=XENOLAB_RETENTION_DAYS, help='Days of raw readings to keep')
+        parser.add_argument('--batch-size', type=int, default=XENOLAB_RETENTION_BATCH_SIZE, help='Rows deleted per transaction')
+        parser.add_argument('--pause', type=float, default=XENOLAB_RETENTION_PAUSE, help='Seconds to pause between batches')
+        parser.add_argument('--no-vacuum', action='store_true', help='Skip the incremental vacuum')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be removed')
+        parser.add_argument(
+            '--convert-vacuum', action='store_true',
+            help='Only switch the database to incremental auto-vacuum, which the nightly vacuum needs. '
+                 'Runs a full VACUUM that locks the database throughout: stop xenolabd and the web server first'
+        )
+
+    def handle(self, *args, **options):
+        if options['convert_vacuum']:
+            return self.convert_vacuum()
+
+        cutoff = retention_cutoff(options['days'])
+        size_before = database_size()
+        started = time.perf_counter()
+        self.stdout.write(f"Keeping raw readings from {cutoff.isoformat()} ({options['days']:g} days)")
+
+        total = 0
+        for rollup_model in rollup_models():
+            model = rollup_model.SOURCE
+            if options['dry_run']:
+                removed = model.objects.filter(timestamp__lt=cutoff).count()
+                self.stdout.write(f"{model.__name__}: would remove {removed} rows")
+            else:
+                buckets = compact(rollup_model, cutoff)
+                removed = prune(model, cutoff, options['batch_size'], options['pause'])
+                self.stdout.write(f"{model.__name__}: compacted into {buckets} rollup buckets, removed {removed} rows")
+            total += removed
+
+        # Motion events have no rollup; their snapshots go with them
+        expired_events = MotionEvent.objects.filter(timestamp__lt=cutoff)
+        if options['dry_run']:
+            removed = expired_events.count()
+            self.stdout.write(f"MotionEvent: would remove {removed} rows")
+        else:
+            for snapshot in expired_events.exclude(snapshot='').values_list('snapshot', flat=True).iterator():
+                try:
+                    os.unlink(snapshot)
+                except FileNotFoundError:
+                    pass
+            removed = prune(MotionEvent, cutoff, options['batch_size'], options['pause'])
+            self.stdout.write(f"MotionEvent: removed {removed} rows")
+        total += removed
+
+        if not options['dry_run'] and not options['no_vacuum']:
+            pages = free_pages()
+            if incremental_vacuum(pause=options['pause']):
+                self.stdout.write(f"Incremental vacuum released {pages} free pages")
+            else:
+                self.stdout.write(self.style.WARNING(
+                    "Skipped the vacuum: the database isn't in incremental auto-vacuum mode "
+                    "(run prunereadings --convert-vacuum once during downtime)"
+                ))
+
+        size_after = database_size()
+        verb = 'Would remove' if options['dry_run'] else 'Removed'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {total} rows in {time.perf_counter() - started:.1f}s; "
+            f"database {size_before / 1024 / 1024:.1f} MiB -> {size_after / 1024 / 1024:.1f} MiB"
+        ))
+
+    def convert_vacuum(self):
+        size_before = database_size()
+        started = time.perf_counter()
+        convert_to_incremental_vacuum()
+        self.stdout.write(self.style.SUCCESS(
+            f"Enabled incremental auto-vacuum in {time.perf_counter() - started:.1f}s; "
+            f"database {size_before / 1024 / 1024:.1f} MiB -> {database_size() / 1024 / 1024:.1f} MiB"
+        ))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sunlight.schedule import LightSchedule
+from xenolab.daemon import Daemon, DEVICES, XENOLAB_DEVICES
+from xenolab.scheduler import Scheduler, DEFAULT_SCHEDULES, XENOLAB_TIMEZONE
+
+import asyncio
+
+
+class Command(BaseCommand):
+    help = 'Run the sunlight, wind and temperature/humidity devices and the retention job in one asyncio process'
+
+    def add_arguments(self, parser):
+        parser.add_argument('devices', nargs='*', default=XENOLAB_DEVICES, help=f"Devices to run (default: {', '.join(XENOLAB_DEVICES)})")
+        parser.add_argument('--dry-run', action='store_true', help='Print the upcoming scheduled actions instead of running the devices')
+        parser.add_argument('--count', type=int, default=10, help='Firings per device to print with --dry-run')
+
+    def handle(self, *args, **options):
+        unknown = set(options['devices']) - set(DEVICES)
+        if unknown:
+            raise CommandError(f"Unknown devices: {', '.join(sorted(unknown))}; expected some of: {', '.join(DEVICES)}")
+
+        if options['dry_run']:
+            self._dry_run(options['devices'], options['count'])
+            return
+
+        asyncio.run(Daemon(options['devices']).run())
+
+    def _dry_run(self, devices, count):
+        self.stdout.write(f"Times in {XENOLAB_TIMEZONE.key}")
+        for name in devices:
+            if name not in DEFAULT_SCHEDULES:
+                # Sunlight follows its keyframes rather than discrete actions
+                times = sorted({f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}" for seconds in LightSchedule.from_lifeform().times})
+                self.stdout.write(f"{name}: light keyframes at {', '.join(times)}")
+                continue
+
+            try:
+                scheduler = Scheduler.for_device(name)
+            except ValueError as e:
+                raise CommandError(f"Invalid {name} schedule: {e}")
+            self.stdout.write(f"{name}:")
+            for when, rule, action in scheduler.upcoming(count):
+                self.stdout.write(f"  {when.strftime('%a %Y-%m-%d %H:%M:%S %Z')}  {action:<6} ({rule})")
@@ -0,0 +1,126 @@
+import datetime
+import os
+import time
+
+from django.db import connection
+from django.utils import timezone
+
+from xenolab.rollups import PERIOD_DAY, period_start
+
+# Raw readings older than this are compacted into rollups and deleted
+XENOLAB_RETENTION_DAYS = float(os.environ.get('XENOLAB_RETENTION_DAYS', '90'))
+# Rows deleted per transaction; small batches keep each write lock short
+XENOLAB_RETENTION_BATCH_SIZE = int(os.environ.get('XENOLAB_RETENTION_BATCH_SIZE', '1000'))
+# Pause between batches so the sensor workers can get their writes in
+XENOLAB_RETENTION_PAUSE = float(os.environ.get('XENOLAB_RETENTION_PAUSE', '0.05'))
+# Free pages released per incremental vacuum step
+XENOLAB_VACUUM_PAGES = int(os.environ.get('XENOLAB_VACUUM_PAGES', '1000'))
+
+# PRAGMA auto_vacuum value for INCREMENTAL mode
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def retention_cutoff(days=XENOLAB_RETENTION_DAYS, now=None):
+    """Start of the oldest day to keep; cutting on day boundaries keeps daily rollups whole"""
+    now = now or timezone.now()
+    return period_start(now - datetime.timedelta(days=days), PERIOD_DAY)
+
+
+def compact(rollup_model, cutoff):
+    """
+    Build the rollups for days before ``cutoff`` that have raw readings but no
+    rollups yet, e.g. history recorded before rollups existed, so pruning
+    doesn't lose them; returns the number of buckets written.
+
+    Days that already have rollups are left alone. Rollup.record keeps them
+    up to date, and rebuilding them would drop on-time carried over from a
+    reading that an earlier run has already deleted.
+    """
+    readings = rollup_model.SOURCE.objects.order_by('timestamp')
+    oldest = readings.first()
+    if oldest is None or oldest.timestamp >= cutoff:
+        return 0
+
+    day = period_start(oldest.timestamp, PERIOD_DAY)
+    compacted = set(
+        rollup_model.objects
+        .filter(period=PERIOD_DAY, start__gte=day, start__lt=cutoff)
+        .values_list('start', flat=True)
+    )
+
+    buckets = 0
+    while day < cutoff:
+        following = day + datetime.timedelta(days=1)
+        if day not in compacted:
+            buckets += rollup_model.rebuild(start=day, end=following)
+        # Skip straight over days without readings
+        later = readings.filter(timestamp__gte=following).first()
+        if later is None:
+            break
+        day = period_start(later.timestamp, PERIOD_DAY)
+    return buckets
+
+
+def prune(model, cutoff, batch_size=XENOLAB_RETENTION_BATCH_SIZE, pause=XENOLAB_RETENTION_PAUSE):
+    """Delete rows older than ``cutoff`` oldest first, one short transaction per batch"""
+    expired = model.objects.filter(timestamp__lt=cutoff).order_by('timestamp')
+    removed = 0
+
+    while True:
+        ids = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return removed
+        removed += model.objects.filter(pk__in=ids).delete()[0]
+        if pause:
+            time.sleep(pause)
+
+
+def database_size():
+    """Bytes used by the database file (page count times page size)"""
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA page_count')
+        page_count = cursor.fetchone()[0]
+        cursor.execute('PRAGMA page_size')
+        page_size = cursor.fetchone()[0]
+    return page_count * page_size
+
+
+def free_pages():
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA freelist_count')
+        return cursor.fetchone()[0]
+
+
+def auto_vacuum_mode():
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA auto_vacuum')
+        return cursor.fetchone()[0]
+
+
+def convert_to_incremental_vacuum():
+    """
+    Switch the database to auto_vacuum=INCREMENTAL, which only takes effect
+    after a full VACUUM. That rewrites the whole file under an exclusive lock,
+    so it is a one-off for a maintenance window, never part of the nightly job.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        cursor.execute('VACUUM')
+
+
+def incremental_vacuum(pages=XENOLAB_VACUUM_PAGES, pause=XENOLAB_RETENTION_PAUSE):
+    """
+    Return free pages to the filesystem a few at a time. Does nothing and
+    returns False unless the database is already in incremental mode (see
+    convert_to_incremental_vacuum).
+    """
+    if auto_vacuum_mode() != AUTO_VACUUM_INCREMENTAL:
+        return False
+
+    with connection.cursor() as cursor:
+        while free_pages():
+            cursor.execute(f'PRAGMA incremental_vacuum({int(pages)})')
+            cursor.fetchall()  # The pragma frees pages as its rows are stepped through
+            if pause:
+                time.sleep(pause)
+    return True
@@ -0,0 +1,194 @@
+import datetime
+
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest, Least
+
+# Rollup buckets are aligned to UTC hours and days
+PERIOD_HOUR = 'hour'
+PERIOD_DAY = 'day'
+PERIODS = {
+    PERIOD_HOUR: 60 * 60,
+    PERIOD_DAY: 24 * 60 * 60,
+}
+
+
+def period_start(timestamp, period):
+    """Start of the rollup bucket containing ``timestamp`` (an aware datetime)"""
+    seconds = PERIODS[period]
+    epoch = int(timestamp.timestamp()) // seconds * seconds
+    return datetime.datetime.fromtimestamp(epoch, tz=datetime.timezone.utc)
+
+
+class Rollup(models.Model):
+    """
+    Hourly and daily aggregates of a reading model.
+
+    Subclasses set SOURCE to the reading model and FIELDS to the fields to
+    aggregate, and declare ``<field>_min``, ``<field>_max`` and ``<field>_sum``
+    columns for each (the mean is sum / count). If STATUS_FIELD is set they also
+    declare ``on_seconds``: how long the status was STATUS_ON during the bucket,
+    assuming each reading's status holds until the next reading.
+    """
+
+    SOURCE = None
+    FIELDS = ()
+    STATUS_FIELD = None
+    STATUS_ON = 1
+
+    PERIOD_CHOICES = [
+        (PERIOD_HOUR, 'Hourly'),
+        (PERIOD_DAY, 'Daily'),
+    ]
+
+    period = models.CharField(max_length=8, choices=PERIOD_CHOICES)
+    start = models.DateTimeField(help_text="Start of the bucket (UTC aligned)")
+    count = models.IntegerField(help_text="Number of readings in the bucket", default=0)
+
+    class Meta:
+        abstract = True
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'start'], name='%(app_label)s_%(class)s_period_start'),
+        ]
+
+    def __str__(self):
+        return f"{self.__class__.__name__}: {self.period} from {self.start}, {self.count} readings"
+
+    @classmethod
+    def _empty(cls):
+        delta = {'count': 0}
+        for field in cls.FIELDS:
+            delta[f'{field}_min'] = None
+            delta[f'{field}_max'] = None
+            delta[f'{field}_sum'] = 0.0
+        if cls.STATUS_FIELD:
+            delta['on_seconds'] = 0.0
+        return delta
+
+    @classmethod
+    def _accumulate(cls, deltas, readings, previous=None):
+        """Fold readings (oldest first) into per-bucket deltas keyed by (period, start)"""
+        for reading in readings:
+            for period in PERIODS:
+                delta = deltas.setdefault((period, period_start(reading.timestamp, period)), cls._empty())
+                delta['count'] += 1
+                for field in cls.FIELDS:
+                    value = getattr(reading, field)
+                    delta[f'{field}_sum'] += value
+                    delta[f'{field}_min'] = value if delta[f'{field}_min'] is None else min(delta[f'{field}_min'], value)
+                    delta[f'{field}_max'] = value if delta[f'{field}_max'] is None else max(delta[f'{field}_max'], value)
+
+            if cls.STATUS_FIELD and previous is not None and getattr(previous, cls.STATUS_FIELD) == cls.STATUS_ON:
+                cls._add_on_time(deltas, previous.timestamp, reading.timestamp)
+            previous = reading
+        return previous
+
+    @classmethod
+    def _add_on_time(cls, deltas, start, end):
+        """Spread an interval of on-time over the buckets it covers"""
+        for period, seconds in PERIODS.items():
+            bucket = period_start(start, period)
+            while bucket < end:
+                bucket_end = bucket + datetime.timedelta(seconds=seconds)
+                overlap = (min(end, bucket_end) - max(start, bucket)).total_seconds()
+                deltas.setdefault((period, bucket), cls._empty())['on_seconds'] += overlap
+                bucket = bucket_end
+
+    @classmethod
+    def record(cls, readings):
+        """
+        Fold newly saved readings into the rollups: one UPDATE (or INSERT) per
+        touched bucket, however many readings there are.
+        """
+        readings = sorted(readings, key=lambda reading: reading.timestamp)
+        if not readings:
+            return
+
+        previous = None
+        if cls.STATUS_FIELD:
+            previous = cls.SOURCE.objects.filter(timestamp__lt=readings[0].timestamp).order_by('-timestamp').first()
+
+        deltas = {}
+        cls._accumulate(deltas, readings, previous)
+
+        with transaction.atomic():
+            for (period, start), delta in deltas.items():
+                updates = {'count': F('count') + delta['count']}
+                for field in cls.FIELDS:
+                    if delta[f'{field}_min'] is not None:
+                        updates[f'{field}_sum'] = F(f'{field}_sum') + delta[f'{field}_sum']
+                        updates[f'{field}_min'] = Least(F(f'{field}_min'), delta[f'{field}_min'])
+                        updates[f'{field}_max'] = Greatest(F(f'{field}_max'), delta[f'{field}_max'])
+                if cls.STATUS_FIELD:
+                    updates['on_seconds'] = F('on_seconds') + delta['on_seconds']
+
+                rollups = cls.objects.filter(period=period, start=start)
+                if not rollups.exists():
+                    cls.objects.create(period=period, start=start, **delta)
+                    continue
+
+                # Buckets created by on-time alone have no min/max yet, and
+                # Least/Greatest against NULL would keep them that way
+                for field in cls.FIELDS:
+                    if delta[f'{field}_min'] is not None:
+                        rollups.filter(**{f'{field}_min__isnull': True}).update(**{
+                            f'{field}_min': delta[f'{field}_min'],
+                            f'{field}_max': delta[f'{field}_max'],
+                        })
+                rollups.update(**updates)
+
+    @classmethod
+    def rebuild(cls, start=None, end=None, chunk_size=2000):
+        """
+        Recompute the buckets in [start, end) from the raw readings; returns the
+        number of buckets written. Bounds must be day aligned. ``start`` defaults
+        to the day of the oldest raw reading, so buckets compacted from readings
+        that retention has since deleted are kept.
+        """
+        readings = cls.SOURCE.objects.order_by('timestamp')
+        if start is None:
+            oldest = readings.first()
+            if oldest is None:
+                return 0
+            start = period_start(oldest.timestamp, PERIOD_DAY)
+
+        window = readings.filter(timestamp__gte=start)
+        if end is not None:
+            window = window.filter(timestamp__lt=end)
+
+        previous = None
+        if cls.STATUS_FIELD:
+            previous = readings.filter(timestamp__lt=start).last()
+
+        # Stream the readings; only the buckets are held in memory
+        deltas = {}
+        last = cls._accumulate(deltas, window.iterator(chunk_size=chunk_size), previous)
+
+        # On-time running past the end of the window belongs to its last buckets
+        if end is not None and last is not None and cls.STATUS_FIELD and getattr(last, cls.STATUS_FIELD) == cls.STATUS_ON:
+            following = readings.filter(timestamp__gte=end).first()
+            if following is not None:
+                cls._add_on_time(deltas, last.timestamp, following.timestamp)
+
+        deltas = {
+            (period, bucket): delta for (period, bucket), delta in deltas.items()
+            if bucket >= start and (end is None or bucket < end)
+        }
+
+        buckets = cls.objects.filter(start__gte=start)
+        if end is not None:
+            buckets = buckets.filter(start__lt=end)
+
+        with transaction.atomic():
+            buckets.delete()
+            cls.objects.bulk_create(
+                [cls(period=period, start=start, **delta) for (period, start), delta in deltas.items()],
+                batch_size=500
+            )
+        return len(deltas)
+
+
+def rollup_models():
+    """Every concrete rollup model in the project"""
+    return [model for model in apps.get_models() if issubclass(model, Rollup)]
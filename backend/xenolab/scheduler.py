@@ -0,0 +1,222 @@
+import datetime
+import os
+from zoneinfo import ZoneInfo
+
+from xenolab.lifeform import LIFEFORM_PATH, load_lifeform
+
+# Wall-clock schedules are evaluated in this zone
+XENOLAB_TIMEZONE = ZoneInfo(os.environ.get("XENOLAB_TIMEZONE", "Pacific/Auckland"))
+# Longest a device sleeps on a schedule. The Pi has no RTC and its clock can jump
+# when NTP syncs after boot; waking hourly re-checks the plan against the new time.
+XENOLAB_SCHEDULER_MAX_SLEEP = float(os.environ.get('XENOLAB_SCHEDULER_MAX_SLEEP', '3600'))
+
+# Used when the lifeform has no "schedule" entry for a device
+DEFAULT_SCHEDULES = {
+    'wind': [
+        {'cron': '0 8 * * *', 'action': 'on'},
+        {'cron': '0 20 * * *', 'action': 'off'},
+    ],
+    'temphumidity': [
+        {'cron': '0 * * * *', 'action': 'read'},
+    ],
+    'retention': [
+        {'cron': '30 3 * * *', 'action': 'prune'},
+    ],
+}
+# Actions each device understands
+ACTIONS = {
+    'wind': ('on', 'off'),
+    'temphumidity': ('read',),
+    'retention': ('prune',),
+}
+
+# How far back to look for the most recent firing, e.g. to restore a relay's state on start
+LOOKBACK = datetime.timedelta(days=8)
+# Cron expressions that never match (e.g. "0 0 31 2 *") give up after this many days
+SEARCH_DAYS = 4 * 366
+
+CRON_FIELDS = (
+    ('minute', 0, 59),
+    ('hour', 0, 23),
+    ('day of month', 1, 31),
+    ('month', 1, 12),
+    ('day of week', 0, 7),
+)
+
+
+def _parse_field(value, name, low, high):
+    values = set()
+    try:
+        for part in value.split(','):
+            part, _, step = part.partition('/')
+            step = int(step) if step else 1
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (int(bound) for bound in part.split('-', 1))
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+            if not low <= start <= end <= high or step < 1:
+                raise ValueError
+            values.update(range(start, end + 1, step))
+    except ValueError:
+        raise ValueError(f"Invalid {name} '{value}', expected values {low}-{high}") from None
+    return values
+
+
+class CronRule:
+    """
+    A five field cron expression (minute hour day-of-month month day-of-week)
+    evaluated in local wall-clock time.
+
+    Across DST changes a time that is skipped fires as soon as the clock
+    jumps past it, and a time that happens twice fires once, the first time.
+    """
+
+    def __init__(self, expression, tz=XENOLAB_TIMEZONE):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Invalid cron expression '{expression}', expected 5 fields")
+        self.expression = expression
+        self.tz = tz
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            sorted(_parse_field(value, *spec)) for value, spec in zip(fields, CRON_FIELDS)
+        )
+        self.weekdays = {day % 7 for day in self.weekdays}  # 7 is Sunday too
+        # Like cron, a restricted day of month and day of week match either
+        self.any_day = fields[2] == '*' or fields[4] == '*'
+
+    def __str__(self):
+        return f"cron {self.expression}"
+
+    def _day_matches(self, date):
+        in_month = date.day in self.days
+        in_week = (date.weekday() + 1) % 7 in self.weekdays
+        if self.any_day:
+            return in_month and in_week
+        return in_month or in_week
+
+    def _resolve(self, naive):
+        """The instant a local wall-clock time fires at, moving skipped times to the end of the gap"""
+        local = naive.replace(tzinfo=self.tz)
+        while local.astimezone(datetime.timezone.utc).astimezone(self.tz).replace(tzinfo=None) != local.replace(tzinfo=None):
+            local += datetime.timedelta(minutes=1)
+        return local
+
+    def next_after(self, after):
+        """The first firing strictly after the aware datetime ``after``"""
+        start = after.astimezone(self.tz)
+        date = start.date()
+        for _ in range(SEARCH_DAYS):
+            if date.month in self.months and self._day_matches(date):
+                first_day = date == start.date()
+                for hour in self.hours:
+                    if first_day and hour < start.hour:
+                        continue
+                    for minute in self.minutes:
+                        if first_day and hour == start.hour and minute < start.minute:
+                            continue
+                        fire = self._resolve(datetime.datetime.combine(date, datetime.time(hour, minute)))
+                        if _instant(fire) > _instant(after):
+                            return fire
+            date += datetime.timedelta(days=1)
+        return None
+
+
+class IntervalRule:
+    """Fires every ``seconds``, aligned to multiples of the interval since the Unix epoch"""
+
+    def __init__(self, seconds, tz=XENOLAB_TIMEZONE):
+        if seconds <= 0:
+            raise ValueError(f"Invalid interval {seconds}, expected a positive number of seconds")
+        self.seconds = seconds
+        self.tz = tz
+
+    def __str__(self):
+        return f"every {self.seconds:g}s"
+
+    def next_after(self, after):
+        timestamp = (after.timestamp() // self.seconds + 1) * self.seconds
+        return datetime.datetime.fromtimestamp(timestamp, self.tz)
+
+
+def _instant(when):
+    """
+    Sort key for aware datetimes. Datetimes sharing a tzinfo compare by wall
+    time and ignore ``fold``, which gets the repeated hour after a DST change wrong.
+    """
+    return when.timestamp()
+
+
+def parse_rule(entry, tz=XENOLAB_TIMEZONE):
+    if 'cron' in entry:
+        return CronRule(entry['cron'], tz)
+    if 'every' in entry:
+        return IntervalRule(float(entry['every']), tz)
+    raise ValueError(f"Schedule entry {entry} needs a 'cron' or 'every' rule")
+
+
+class Scheduler:
+    """
+    Tracks the next firing of each (rule, action) pair so a device can sleep
+    until exactly the next one instead of polling the clock.
+    """
+
+    def __init__(self, entries, actions=None, tz=XENOLAB_TIMEZONE, now=None):
+        self.tz = tz
+        self.entries = []
+        for entry in entries:
+            if actions is not None and entry.get('action') not in actions:
+                raise ValueError(f"Unknown action '{entry.get('action')}', expected one of: {', '.join(actions)}")
+            self.entries.append((parse_rule(entry, tz), entry.get('action')))
+        now = now or datetime.datetime.now(tz)
+        self.pending = [rule.next_after(now) for rule, _ in self.entries]
+
+    @classmethod
+    def for_device(cls, name, path=LIFEFORM_PATH, **kwargs):
+        """The device's schedule from the active lifeform's "schedule" block, or its default"""
+        entries = load_lifeform(path).get('schedule', {}).get(name) or DEFAULT_SCHEDULES[name]
+        return cls(entries, actions=ACTIONS.get(name), **kwargs)
+
+    def pop_due(self, now=None):
+        """Actions due at ``now``, oldest first; each fires once even if several firings were missed"""
+        now = now or datetime.datetime.now(self.tz)
+        due = []
+        for index, (rule, action) in enumerate(self.entries):
+            if self.pending[index] is not None and _instant(self.pending[index]) <= _instant(now):
+                due.append((self.pending[index], action))
+                self.pending[index] = rule.next_after(now)
+        return [action for _, action in sorted(due, key=lambda firing: _instant(firing[0]))]
+
+    def sleep_seconds(self, now=None, max_sleep=XENOLAB_SCHEDULER_MAX_SLEEP):
+        """Seconds until the next firing, capped at ``max_sleep``"""
+        now = now or datetime.datetime.now(self.tz)
+        upcoming = [when for when in self.pending if when is not None]
+        if not upcoming:
+            return max_sleep
+        return min(max(min(map(_instant, upcoming)) - now.timestamp(), 0), max_sleep)
+
+    def last_action(self, now=None):
+        """The action of the most recent firing before ``now``, or None if nothing fired in LOOKBACK"""
+        now = now or datetime.datetime.now(self.tz)
+        latest = None
+        for rule, action in self.entries:
+            when = rule.next_after(now - LOOKBACK)
+            while when is not None and _instant(when) <= _instant(now):
+                if latest is None or _instant(when) > _instant(latest[0]):
+                    latest = (when, action)
+                when = rule.next_after(when)
+        return latest[1] if latest else None
+
+    def upcoming(self, count, after=None):
+        """The next ``count`` firings as (when, rule, action), for dry runs"""
+        after = after or datetime.datetime.now(self.tz)
+        cursors = [rule.next_after(after) for rule, _ in self.entries]
+        firings = []
+        while len(firings) < count and any(when is not None for when in cursors):
+            index = min((i for i, when in enumerate(cursors) if when is not None), key=lambda i: _instant(cursors[i]))
+            rule, action = self.entries[index]
+            firings.append((cursors[index], rule, action))
+            cursors[index] = rule.next_after(cursors[index])
+        return firings
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
     'wind',
     'sunlight',
     'camera',
+    'xenolab',
 ]
 
 MIDDLEWARE = [
@@ -84,10 +86,45 @@ WSGI_APPLICATION = 'xenolab.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# The sensor workers write while the web workers read, so every SQLite connection
+# runs these pragmas: WAL lets readers and a writer proceed concurrently, and the
+# busy timeout makes a second writer wait instead of failing with "database is
+# locked". Set a XENOLAB_SQLITE_* variable to an empty string to skip that pragma.
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('XENOLAB_SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('XENOLAB_SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': os.environ.get('XENOLAB_SQLITE_BUSY_TIMEOUT', '5000'),  # milliseconds
+    'mmap_size': os.environ.get('XENOLAB_SQLITE_MMAP_SIZE', str(64 * 1024 * 1024)),  # bytes
+    'cache_size': os.environ.get('XENOLAB_SQLITE_CACHE_SIZE', '-8000'),  # negative means KiB
+    'temp_store': os.environ.get('XENOLAB_SQLITE_TEMP_STORE', 'MEMORY'),
+}
+
+
+def sqlite_options(pragmas):
+    """Connection OPTIONS that run the given pragmas on every new SQLite connection"""
+    options = {
+        'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in pragmas.items() if value),
+        # Take the write lock at BEGIN, so writers queue on the busy timeout
+        # instead of failing when a read transaction tries to upgrade
+        'transaction_mode': 'IMMEDIATE',
+    }
+    if pragmas.get('busy_timeout'):
+        options['timeout'] = int(pragmas['busy_timeout']) / 1000
+    return options
+
+
+# Seconds to keep a connection between requests, or "none" to keep it forever
+# (the long-running workers). Keep it at 0 under ASGI, where requests may run
+# on a new thread each time.
+XENOLAB_DB_CONN_MAX_AGE = os.environ.get('XENOLAB_DB_CONN_MAX_AGE', '0')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': sqlite_options(SQLITE_PRAGMAS),
+        'CONN_MAX_AGE': None if XENOLAB_DB_CONN_MAX_AGE.lower() == 'none' else int(XENOLAB_DB_CONN_MAX_AGE),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -0,0 +1,84 @@
+import json
+import os
+import time
+
+import loguru
+
+# Latest state per device, written by the device workers and read by the web workers
+XENOLAB_STATE_DIR = os.environ.get('XENOLAB_STATE_DIR', '/dev/shm/xenolab-state')
+
+# device -> ((inode, mtime), snapshot) so unchanged files are served without reading them
+_cache = {}
+
+
+def state_path(device, directory=XENOLAB_STATE_DIR):
+    return os.path.join(directory, f'{device}.json')
+
+
+class StatePublisher:
+    """
+    Writer side of the latest-state store, one per device.
+
+    Each publish replaces the device's snapshot file atomically and bumps its
+    version, so readers never see a partial write and can tell when it changed.
+    """
+
+    def __init__(self, device, directory=XENOLAB_STATE_DIR):
+        self.device = device
+        self.path = state_path(device, directory)
+        os.makedirs(directory, exist_ok=True)
+        # Carry the version on across restarts so clients' cached versions stay comparable
+        self.version = (read_state(device, directory) or {}).get('version', 0)
+
+    def publish(self, **values):
+        self.version += 1
+        snapshot = {'version': self.version, 'updated': time.time(), **values}
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f, default=str)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            loguru.logger.warning(f"Failed to publish {self.device} state: {e}")
+        return snapshot
+
+
+def read_state(device, directory=XENOLAB_STATE_DIR):
+    """The device's latest snapshot, or None if nothing has been published since boot"""
+    path = state_path(device, directory)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    key = (stat.st_ino, stat.st_mtime_ns)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    try:
+        with open(path, 'r') as f:
+            snapshot = json.load(f)
+    except (FileNotFoundError, ValueError):
+        # Replaced or torn between the stat and the read; serve the previous snapshot if there is one
+        return cached[1] if cached else None
+    _cache[path] = (key, snapshot)
+    return snapshot
+
+
+def latest_state(device, fallback):
+    """
+    The device's snapshot, falling back to ``fallback()`` (normally a database
+    query) on a cold start before its worker has published anything.
+    """
+    snapshot = read_state(device)
+    if snapshot is None:
+        snapshot = fallback()
+    return snapshot
+
+
+def state_etag(*snapshots):
+    """ETag covering a set of snapshots; changes whenever any of them is republished"""
+    versions = '.'.join(str(snapshot['version']) if snapshot else '-' for snapshot in snapshots)
+    updated = max((snapshot['updated'] for snapshot in snapshots if snapshot), default=0)
+    return f'"state-{versions}-{int(updated * 1000000):x}"'
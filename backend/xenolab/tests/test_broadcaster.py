@@ -0,0 +1,80 @@
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from camera.broadcaster import FrameBroadcaster
+from camera.management.commands.camera import Command
+
+
+class FakeCamera:
+    framerate = 50
+    last_error = None
+
+    def __init__(self):
+        self.is_running = False
+
+    def start(self):
+        self.is_running = True
+        return True
+
+    def get_jpeg_frame(self, profile):
+        return b'jpeg'
+
+
+class FakeWriter:
+
+    def __init__(self):
+        self.published = 0
+
+    def publish(self, frame, timestamp):
+        self.published += 1
+
+
+class IdleParkingTests(SimpleTestCase):
+
+    def _broadcaster(self, **kwargs):
+        broadcaster = FrameBroadcaster(FakeCamera(), **kwargs)
+        self.addCleanup(broadcaster.stop)
+        self.assertTrue(broadcaster.start())
+        return broadcaster
+
+    def test_parks_once_the_last_client_has_gone(self):
+        broadcaster = self._broadcaster(idle_timeout=0.05)
+        broadcaster.thread.join(timeout=2)
+        self.assertFalse(broadcaster.is_running)
+        self.assertIsNone(broadcaster.latest()[1])
+
+    def test_client_keeps_capture_running(self):
+        broadcaster = self._broadcaster(idle_timeout=0.05)
+        client = broadcaster.register_client()
+        time.sleep(0.2)
+        self.assertTrue(broadcaster.is_running)
+
+        broadcaster.unregister_client(client)
+        broadcaster.thread.join(timeout=2)
+        self.assertFalse(broadcaster.is_running)
+
+    def test_frame_bus_publisher_runs_past_the_idle_timeout(self):
+        # The capture command's broadcasters have no stream clients at all
+        broadcaster = self._broadcaster(idle_timeout=None)
+        writer = FakeWriter()
+        threading.Thread(target=Command()._publish, args=(broadcaster, writer), daemon=True).start()
+
+        time.sleep(0.3)
+        published = writer.published
+        self.assertTrue(broadcaster.is_running)
+        time.sleep(0.1)
+        self.assertGreater(writer.published, published)
+
+
+class FrameBusControlTests(SimpleTestCase):
+
+    @mock.patch('camera.views.CAMERA_FRAME_BUS', True)
+    def test_settings_toggles_are_refused(self):
+        for action in ('stop', 'toggle_driver', 'toggle_mock', 'toggle_autofocus'):
+            with self.subTest(action=action):
+                response = self.client.post('/camera/control/', {'action': action})
+                self.assertEqual(response.status_code, 409)
+                self.assertIn('CAMERA_FRAME_BUS', response.json()['details'])
@@ -0,0 +1,26 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from xenolab import dashboard
+from xenolab.history import HISTORY_DEFAULT_RECORDS
+
+
+class DashboardSeriesCacheTests(TestCase):
+
+    def setUp(self):
+        dashboard._series_cache.clear()
+        self.addCleanup(dashboard._series_cache.clear)
+        patcher = mock.patch('xenolab.dashboard.read_state', return_value={'version': 7, 'updated': 0.0})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_only_the_default_size_is_cached(self):
+        for num_records in range(1, 50):
+            self.assertEqual(dashboard.temphumidity_section(num_records)[0], '7')
+        self.assertEqual(dashboard._series_cache, {})
+
+        dashboard.temphumidity_section(HISTORY_DEFAULT_RECORDS)
+        self.assertEqual(list(dashboard._series_cache), [HISTORY_DEFAULT_RECORDS])
+        with self.assertNumQueries(0):
+            dashboard.temphumidity_section(HISTORY_DEFAULT_RECORDS)
@@ -0,0 +1,242 @@
+import datetime
+
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from temphumidity.models import TempHumidityReading, TempHumidityRollup
+from temphumidity.views import serialize_reading
+from wind.models import Wind, WindRollup
+from xenolab.history import (
+    HISTORY_DEFAULT_RECORDS, HISTORY_MAX_POINTS, HISTORY_MAX_RECORDS, bucketed_history, parse_num_records, parse_range, since_page
+)
+
+UTC = datetime.timezone.utc
+
+
+def at(hour):
+    return datetime.datetime(2025, 3, 1, hour, tzinfo=UTC)
+
+
+class SincePageTests(TestCase):
+
+    def setUp(self):
+        self.readings = [
+            TempHumidityReading.objects.create(timestamp=at(hour), temperature=20 + hour, humidity=50.0)
+            for hour in range(6)
+        ]
+
+    def _page(self, since, num_records=10):
+        return since_page(TempHumidityReading.objects.all(), since, num_records, serialize_reading)
+
+    def _temperatures(self, page):
+        return [row['temperature'] for row in page['results']]
+
+    def test_empty_cursor_returns_the_latest_rows_oldest_first(self):
+        page = self._page('', num_records=3)
+        self.assertEqual(self._temperatures(page), [23, 24, 25])
+        self.assertEqual(page['next_cursor'], str(self.readings[-1].pk))
+        self.assertFalse(page['has_more'])
+
+    def test_row_id_cursor_returns_only_newer_rows(self):
+        page = self._page(str(self.readings[3].pk))
+        self.assertEqual(self._temperatures(page), [24, 25])
+        self.assertEqual(page['next_cursor'], str(self.readings[5].pk))
+
+    def test_cursor_is_kept_when_nothing_is_new(self):
+        cursor = str(self.readings[-1].pk)
+        self.assertEqual(self._page(cursor), {'results': [], 'next_cursor': cursor, 'has_more': False})
+
+    def test_backlog_is_paged(self):
+        page = self._page('0', num_records=4)
+        self.assertEqual(self._temperatures(page), [20, 21, 22, 23])
+        self.assertTrue(page['has_more'])
+
+        page = self._page(page['next_cursor'], num_records=4)
+        self.assertEqual(self._temperatures(page), [24, 25])
+        self.assertFalse(page['has_more'])
+
+    def test_datetime_cursor(self):
+        self.assertEqual(self._temperatures(self._page('2025-03-01T03:00:00+00:00')), [24, 25])
+        # Naive datetimes are in the server's time zone (UTC in settings)
+        self.assertEqual(self._temperatures(self._page('2025-03-01T04:30:00')), [25])
+
+    def test_malformed_cursor_is_rejected(self):
+        for since in ('yesterday', '-1', '3.5'):
+            with self.subTest(since=since), self.assertRaises(ValueError):
+                self._page(since)
+
+    def test_empty_table_starts_from_zero(self):
+        TempHumidityReading.objects.all().delete()
+        self.assertEqual(self._page(''), {'results': [], 'next_cursor': '0', 'has_more': False})
+
+
+class SinceViewTests(TestCase):
+
+    def test_since_envelope_and_errors(self):
+        reading = TempHumidityReading.objects.create(timestamp=at(1), temperature=21.0, humidity=55.0)
+
+        response = self.client.get('/temphumidity/', {'since': '0'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['next_cursor'], str(reading.pk))
+        self.assertEqual(len(response.json()['results']), 1)
+
+        self.assertEqual(self.client.get('/temphumidity/', {'since': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get('/temphumidity/', {'since': '', 'num_records': '0'}).status_code, 400)
+
+
+class NumRecordsTests(SimpleTestCase):
+
+    def _parse(self, **params):
+        return parse_num_records(RequestFactory().get('/', params))
+
+    def test_default_and_cap(self):
+        self.assertEqual(self._parse(), HISTORY_DEFAULT_RECORDS)
+        self.assertEqual(self._parse(num_records='25'), 25)
+        self.assertEqual(self._parse(num_records=str(10 ** 9)), HISTORY_MAX_RECORDS)
+
+    def test_invalid_values_are_rejected(self):
+        for value in ('0', '-5', 'all', ''):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                self._parse(num_records=value)
+
+
+class ParseRangeTests(SimpleTestCase):
+
+    def _parse(self, **params):
+        return parse_range(RequestFactory().get('/', params))
+
+    def test_resolution_is_clamped_to_the_range(self):
+        self.assertEqual(self._parse(start='0', end='7200', resolution='600'), (0, 7200, 600))
+        self.assertEqual(self._parse(start='0', end='600', resolution='0.25')[2], 1)
+        self.assertEqual(self._parse(start='0', end='7200', resolution='1e300')[2], 7200)
+        self.assertEqual(self._parse(start='0', end='7200', resolution='inf')[2], 7200)
+
+    def test_bucket_count_is_capped(self):
+        span = 10 ** 7
+        for params in ({'points': str(10 ** 9)}, {'resolution': '1'}):
+            with self.subTest(params=params):
+                _, _, bucket_seconds = self._parse(start='0', end=str(span), **params)
+                self.assertLessEqual(-(-span // bucket_seconds), HISTORY_MAX_POINTS)
+
+    def test_iso_and_unix_times(self):
+        start, end, _ = self._parse(start='2025-03-01T00:00:00Z', end=str(at(1).timestamp()))
+        self.assertEqual((start, end), (at(0).timestamp(), at(1).timestamp()))
+
+    def test_invalid_values_are_rejected(self):
+        for params in (
+            {'start': '0', 'end': 'inf'},
+            {'start': '0', 'end': '1e15'},
+            {'start': '-1e12', 'end': '0'},
+            {'start': 'nan'},
+            {'start': '2025-02-30T00:00:00'},
+            {'start': 'yesterday'},
+            {'start': '10', 'end': '10'},
+            {'start': '0', 'end': '60', 'resolution': 'nan'},
+            {'start': '0', 'end': '60', 'resolution': '-1'},
+            {'start': '0', 'end': '60', 'points': '0'},
+        ):
+            with self.subTest(params=params), self.assertRaises(ValueError):
+                self._parse(**params)
+
+
+class RangeViewTests(TestCase):
+    """Readings every 10 minutes from 00:00 to 05:50, temperature 20 + minutes past the hour / 10"""
+
+    def setUp(self):
+        readings = [
+            TempHumidityReading.objects.create(timestamp=at(0) + datetime.timedelta(minutes=minutes), temperature=20 + minutes % 60 // 10, humidity=50.0)
+            for minutes in range(0, 6 * 60, 10)
+        ]
+        TempHumidityRollup.record(readings)
+        self.base = at(0).timestamp()
+
+    def _get(self, **params):
+        response = self.client.get('/temphumidity/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def _summary(self, data):
+        return [(point['timestamp'], point['count'], point['temperature'], point['temperature_min'], point['temperature_max']) for point in data]
+
+    def test_raw_buckets(self):
+        data = self._get(start=str(self.base), end=str(self.base + 3600), resolution='1200')
+        self.assertEqual(self._summary(data), [
+            ('2025-03-01T00:00:00Z', 2, 20.5, 20.0, 21.0),
+            ('2025-03-01T00:20:00Z', 2, 22.5, 22.0, 23.0),
+            ('2025-03-01T00:40:00Z', 2, 24.5, 24.0, 25.0),
+        ])
+
+    def test_rollup_buckets_match_the_raw_rows(self):
+        start, end = self.base, self.base + 6 * 3600
+        data = self._get(start=str(start), end=str(end), resolution='7200')
+        self.assertEqual(self._summary(data), [
+            ('2025-03-01T00:00:00Z', 12, 22.5, 20.0, 25.0),
+            ('2025-03-01T02:00:00Z', 12, 22.5, 20.0, 25.0),
+            ('2025-03-01T04:00:00Z', 12, 22.5, 20.0, 25.0),
+        ])
+        raw = bucketed_history(TempHumidityReading.objects.all(), ['temperature', 'humidity'], start, end, 7200)
+        self.assertEqual(len(raw), len(data))
+        self.assertEqual([point['count'] for point in raw], [point['count'] for point in data])
+
+    def test_rollup_buckets_do_not_reach_outside_the_range(self):
+        # Half an hour into the first hour and half an hour before the last one ends
+        data = self._get(start=str(self.base + 1800), end=str(self.base + 3 * 3600 - 1800), resolution='3600')
+        self.assertEqual(self._summary(data), [
+            ('2025-03-01T00:30:00Z', 3, 24.0, 23.0, 25.0),
+            ('2025-03-01T01:00:00Z', 6, 22.5, 20.0, 25.0),
+            ('2025-03-01T02:00:00Z', 3, 21.0, 20.0, 22.0),
+        ])
+
+    def test_range_inside_one_rollup_period(self):
+        data = self._get(start=str(self.base + 600), end=str(self.base + 3000), resolution='3600')
+        self.assertEqual(self._summary(data), [('2025-03-01T00:10:00Z', 4, 22.5, 21.0, 24.0)])
+
+    def test_invalid_ranges_are_client_errors(self):
+        for params, name in (
+            ({'start': '0', 'end': 'inf'}, 'end'),
+            ({'start': '0', 'end': '1e15'}, 'end'),
+            ({'start': '-1e12', 'end': '0'}, 'start'),
+            ({'start': 'nan'}, 'start'),
+        ):
+            with self.subTest(params=params):
+                response = self.client.get('/temphumidity/', params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['details'], f'{name} must be a Unix timestamp or an ISO 8601 datetime')
+
+    def test_huge_resolution_is_one_bucket(self):
+        data = self._get(start=str(self.base), end=str(self.base + 6 * 3600), resolution='1e300')
+        self.assertEqual(self._summary(data), [('2025-03-01T00:00:00Z', 36, 22.5, 20.0, 25.0)])
+
+
+class OnTimeRangeTests(TestCase):
+    """Wind on 00:30-02:15 and 03:40-04:00"""
+
+    def setUp(self):
+        for hour, minute, status in ((0, 30, Wind.STATUS_WIND_ON), (2, 15, Wind.STATUS_WIND_OFF), (3, 40, Wind.STATUS_WIND_ON), (4, 0, Wind.STATUS_WIND_OFF)):
+            WindRollup.record([Wind.objects.create(timestamp=at(hour) + datetime.timedelta(minutes=minute), status=status)])
+        self.base = at(0).timestamp()
+
+    def _get(self, resolution):
+        response = self.client.get('/wind/', {'start': str(self.base), 'end': str(self.base + 5 * 3600), 'resolution': resolution})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def _on_time(self, data):
+        return [(point['timestamp'][11:16], point['count'], point['on_seconds']) for point in data]
+
+    def test_raw_and_rollup_points_have_the_same_fields(self):
+        raw, rollups = self._get('1800'), self._get('3600')
+        self.assertEqual({frozenset(point) for point in raw}, {frozenset(point) for point in rollups})
+        self.assertIn('on_seconds', raw[0])
+
+    def test_raw_on_time_matches_the_rollups(self):
+        self.assertEqual(self._on_time(self._get('3600')), [
+            ('00:00', 1, 1800), ('01:00', 0, 3600), ('02:00', 1, 900), ('03:00', 1, 1200), ('04:00', 1, 0),
+        ])
+        # Half-hour buckets come from the raw rows, including the ones the wind was on through without a reading
+        self.assertEqual(self._on_time(self._get('1800')), [
+            ('00:30', 1, 1800), ('01:00', 0, 1800), ('01:30', 0, 1800), ('02:00', 1, 900), ('03:30', 1, 1200), ('04:00', 1, 0),
+        ])
+
+    def test_ragged_rollup_edges_count_on_time_from_the_raw_rows(self):
+        response = self.client.get('/wind/', {'start': str(self.base + 2700), 'end': str(self.base + 2 * 3600 + 600), 'resolution': '3600'})
+        self.assertEqual(self._on_time(response.json()), [('00:45', 0, 900), ('01:00', 0, 3600), ('02:00', 0, 600)])
@@ -0,0 +1,91 @@
+from django.test import SimpleTestCase
+
+from sunlight.schedule import DEFAULT_KEYFRAMES, LightSchedule, pixel_color, SECONDS_PER_DAY
+
+
+def clock(hours, minutes=0):
+    return hours * 3600 + minutes * 60
+
+
+class LightScheduleTests(SimpleTestCase):
+
+    def test_interpolates_between_keyframes(self):
+        schedule = LightSchedule([
+            {'time': '06:00', 'rgb': [0, 0, 0], 'brightness': 0.0},
+            {'time': '12:00', 'rgb': [200, 100, 0], 'brightness': 1.0},
+        ])
+        rgb, brightness = schedule.at(clock(9))
+        self.assertEqual(rgb, (100.0, 50.0, 0.0))
+        self.assertAlmostEqual(brightness, 0.5)
+
+    def test_last_keyframe_wraps_around_midnight(self):
+        schedule = LightSchedule([
+            {'time': '06:00', 'rgb': [0, 0, 0], 'brightness': 0.0},
+            {'time': '18:00', 'rgb': [100, 100, 100], 'brightness': 1.0},
+        ])
+        # 18:00 -> 06:00 is twelve hours; midnight is halfway back down
+        self.assertAlmostEqual(schedule.at(0)[1], 0.5)
+        self.assertEqual(schedule.at(SECONDS_PER_DAY + clock(18)), schedule.at(clock(18)))
+
+    def test_keyframes_are_sorted_and_same_time_keyframes_jump(self):
+        schedule = LightSchedule([
+            {'time': '20:00', 'rgb': [255, 0, 0], 'brightness': 1.0},
+            {'time': '20:00', 'rgb': [0, 0, 0], 'brightness': 0.0, 'ease': 'step'},
+            {'time': '08:00', 'rgb': [255, 255, 255], 'brightness': 1.0},
+        ])
+        self.assertEqual(schedule.times, [clock(8), clock(20), clock(20)])
+        self.assertEqual(schedule.at(clock(19, 59))[1], 1.0)
+        # The later of two same-time keyframes starts the next segment
+        self.assertEqual(schedule.at(clock(20)), ((0.0, 0.0, 0.0), 0.0))
+        # A step holds its value until the next keyframe
+        self.assertEqual(schedule.at(clock(7, 59)), ((0.0, 0.0, 0.0), 0.0))
+
+    def test_easing_shapes_the_transition(self):
+        keyframes = [
+            {'time': '00:00', 'rgb': [255, 255, 255], 'brightness': 0.0, 'ease': 'sine-in-out'},
+            {'time': '12:00', 'rgb': [255, 255, 255], 'brightness': 1.0},
+        ]
+        schedule = LightSchedule(keyframes)
+        self.assertAlmostEqual(schedule.at(clock(6))[1], 0.5)
+        self.assertLess(schedule.at(clock(3))[1], 0.25)
+
+    def test_unknown_ease_is_rejected(self):
+        with self.assertRaises(ValueError):
+            LightSchedule([{'time': '08:00', 'rgb': [0, 0, 0], 'brightness': 0, 'ease': 'bounce'}])
+        with self.assertRaises(ValueError):
+            LightSchedule([])
+
+    def test_spread_delays_the_far_end_of_the_strip(self):
+        schedule = LightSchedule([
+            {'time': '08:00', 'rgb': [0, 0, 0], 'brightness': 0.0, 'spread': 600},
+            {'time': '09:00', 'rgb': [0, 0, 0], 'brightness': 1.0},
+        ])
+        first, *_, last = schedule.frame(clock(8, 5), 10)
+        self.assertGreater(first[1], 0)
+        self.assertEqual(last[1], 0)
+        # Both ends still finish with the segment
+        self.assertEqual({pixel[1] for pixel in schedule.frame(clock(9), 10)}, {1.0})
+
+    def test_default_day(self):
+        schedule = LightSchedule(DEFAULT_KEYFRAMES)
+        self.assertEqual(schedule.at(clock(3)), ((0.0, 0.0, 0.0), 0.0))
+        self.assertEqual(schedule.at(clock(13, 30)), ((255.0, 255.0, 255.0), 1.0))
+        self.assertEqual(schedule.at(clock(18, 30))[0], (255.0, 165.5, 140.0))
+
+    def test_frame_interval(self):
+        schedule = LightSchedule(DEFAULT_KEYFRAMES)
+        # Night holds until sunrise
+        self.assertEqual(schedule.frame_interval(clock(19)), clock(13))
+        # Sunrise's blue channel moves furthest, 25 * 0.3 -> 255, over an hour
+        self.assertAlmostEqual(schedule.frame_interval(clock(8, 30)), 3600 / (255 - 25 * 0.3) / 2)
+
+
+class PixelColorTests(SimpleTestCase):
+
+    def test_scales_by_brightness_and_clamps(self):
+        self.assertEqual(pixel_color((255, 128, 0), 0.5), (128, 64, 0))
+        self.assertEqual(pixel_color((255, 255, 255), 2.0), (255, 255, 255))
+
+    def test_gamma_darkens_mid_tones(self):
+        self.assertEqual(pixel_color((255, 255, 255), 0.5, gamma=2.2), (55, 55, 55))
+        self.assertEqual(pixel_color((255, 0, 0), 1.0, gamma=2.2), (255, 0, 0))
@@ -0,0 +1,65 @@
+import datetime
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from temphumidity.models import TempHumidityReading, TempHumidityRollup
+from wind.models import Wind, WindRollup
+from xenolab.retention import AUTO_VACUUM_INCREMENTAL, auto_vacuum_mode, compact, prune
+from xenolab.rollups import PERIOD_DAY, PERIOD_HOUR
+
+UTC = datetime.timezone.utc
+
+
+def day(number, hours=0):
+    return datetime.datetime(2025, 3, number, tzinfo=UTC) + datetime.timedelta(hours=hours)
+
+
+class CompactTests(TestCase):
+
+    def _retain(self, rollup_model, cutoff):
+        compact(rollup_model, cutoff)
+        prune(rollup_model.SOURCE, cutoff, pause=0)
+
+    def _on_seconds(self, start):
+        return WindRollup.objects.get(period=PERIOD_DAY, start=start).on_seconds
+
+    def test_on_time_carried_across_midnight_survives_later_runs(self):
+        # On from 19:00 on the 1st to 07:00 on the 2nd, and from 19:00 on the 2nd to midnight on the 3rd
+        for when, status in ((day(2, -5), Wind.STATUS_WIND_ON), (day(2, 7), Wind.STATUS_WIND_OFF), (day(2, 19), Wind.STATUS_WIND_ON), (day(4), Wind.STATUS_WIND_OFF)):
+            WindRollup.record([Wind.objects.create(timestamp=when, status=status)])
+        self.assertEqual((self._on_seconds(day(1)), self._on_seconds(day(2))), (5 * 3600, 12 * 3600))
+
+        self._retain(WindRollup, day(2))
+        self.assertEqual(Wind.objects.filter(timestamp__lt=day(2)).count(), 0)
+        self.assertEqual((self._on_seconds(day(1)), self._on_seconds(day(2))), (5 * 3600, 12 * 3600))
+
+        # The reading that switched the wind on before midnight is gone by now
+        self._retain(WindRollup, day(3))
+        self.assertEqual(Wind.objects.count(), 1)
+        self.assertEqual((self._on_seconds(day(1)), self._on_seconds(day(2)), self._on_seconds(day(3))), (5 * 3600, 12 * 3600, 24 * 3600))
+
+    def test_readings_without_rollups_are_compacted_before_pruning(self):
+        # Recorded before rollups existed, so only the 3rd was rolled up as it came in
+        for hours in (1, 2, 25):
+            TempHumidityReading.objects.create(timestamp=day(1, hours), temperature=20.0 + hours, humidity=50.0)
+        TempHumidityRollup.record([TempHumidityReading.objects.create(timestamp=day(3, 1), temperature=30.0, humidity=50.0)])
+
+        self._retain(TempHumidityRollup, day(3))
+        self.assertEqual(TempHumidityReading.objects.count(), 1)
+        days = TempHumidityRollup.objects.filter(period=PERIOD_DAY).order_by('start')
+        self.assertEqual([(rollup.start, rollup.count, rollup.temperature_sum) for rollup in days], [
+            (day(1), 2, 43.0), (day(2), 1, 45.0), (day(3), 1, 30.0),
+        ])
+        self.assertEqual(TempHumidityRollup.objects.filter(period=PERIOD_HOUR).count(), 4)
+
+
+class PruneReadingsTests(TestCase):
+
+    def test_nightly_run_never_converts_the_vacuum_mode(self):
+        self.assertNotEqual(auto_vacuum_mode(), AUTO_VACUUM_INCREMENTAL)
+        output = io.StringIO()
+        call_command('prunereadings', stdout=output)
+        self.assertIn('Skipped the vacuum', output.getvalue())
+        self.assertNotEqual(auto_vacuum_mode(), AUTO_VACUUM_INCREMENTAL)
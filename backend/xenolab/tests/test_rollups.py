@@ -0,0 +1,83 @@
+import datetime
+
+from django.test import TestCase
+
+from temphumidity.models import TempHumidityReading, TempHumidityRollup
+from wind.models import Wind, WindRollup
+from xenolab.rollups import PERIOD_DAY, PERIOD_HOUR, period_start
+
+UTC = datetime.timezone.utc
+
+
+def at(hour, minute=0, day=1):
+    return datetime.datetime(2025, 3, day, hour, minute, tzinfo=UTC)
+
+
+class PeriodStartTests(TestCase):
+
+    def test_buckets_are_utc_aligned(self):
+        timestamp = datetime.datetime(2025, 3, 1, 14, 37, 12, tzinfo=UTC)
+        self.assertEqual(period_start(timestamp, PERIOD_HOUR), at(14))
+        self.assertEqual(period_start(timestamp, PERIOD_DAY), at(0))
+
+    def test_aware_local_times_use_the_utc_bucket(self):
+        local = datetime.datetime(2025, 3, 2, 1, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=13)))
+        self.assertEqual(period_start(local, PERIOD_DAY), at(0))
+
+
+class RecordTests(TestCase):
+
+    def _reading(self, timestamp, temperature, humidity):
+        return TempHumidityReading.objects.create(timestamp=timestamp, temperature=temperature, humidity=humidity)
+
+    def test_record_folds_readings_into_hour_and_day_buckets(self):
+        TempHumidityRollup.record([self._reading(at(10, 5), 20.0, 60.0), self._reading(at(10, 50), 24.0, 50.0)])
+        TempHumidityRollup.record([self._reading(at(11, 10), 18.0, 70.0)])
+
+        hour = TempHumidityRollup.objects.get(period=PERIOD_HOUR, start=at(10))
+        self.assertEqual(hour.count, 2)
+        self.assertEqual((hour.temperature_min, hour.temperature_max, hour.temperature_sum), (20.0, 24.0, 44.0))
+        self.assertEqual((hour.humidity_min, hour.humidity_max), (50.0, 60.0))
+
+        day = TempHumidityRollup.objects.get(period=PERIOD_DAY, start=at(0))
+        self.assertEqual(day.count, 3)
+        self.assertEqual((day.temperature_min, day.temperature_max, day.temperature_sum), (18.0, 24.0, 62.0))
+
+    def test_rebuild_matches_incremental_records(self):
+        for minute, temperature in ((0, 21.0), (30, 19.5), (90, 23.0), (200, 22.0)):
+            TempHumidityRollup.record([self._reading(at(8) + datetime.timedelta(minutes=minute), temperature, 55.0)])
+        incremental = list(TempHumidityRollup.objects.order_by('period', 'start').values())
+
+        # Hours 08:00, 09:00 and 11:00 plus the day
+        self.assertEqual(TempHumidityRollup.rebuild(), 4)
+        rebuilt = list(TempHumidityRollup.objects.order_by('period', 'start').values())
+        strip = lambda rows: [{key: value for key, value in row.items() if key != 'id'} for row in rows]
+        self.assertEqual(strip(rebuilt), strip(incremental))
+
+
+class OnTimeTests(TestCase):
+
+    def _reading(self, timestamp, status):
+        return Wind.objects.create(timestamp=timestamp, status=status)
+
+    def test_on_time_is_split_across_the_buckets_it_covers(self):
+        WindRollup.record([self._reading(at(9, 40), Wind.STATUS_WIND_ON)])
+        # Recorded separately, so the previous reading comes from the database
+        WindRollup.record([self._reading(at(10, 10), Wind.STATUS_WIND_OFF)])
+
+        self.assertEqual(WindRollup.objects.get(period=PERIOD_HOUR, start=at(9)).on_seconds, 20 * 60)
+        self.assertEqual(WindRollup.objects.get(period=PERIOD_HOUR, start=at(10)).on_seconds, 10 * 60)
+        self.assertEqual(WindRollup.objects.get(period=PERIOD_DAY, start=at(0)).on_seconds, 30 * 60)
+
+    def test_off_time_is_not_counted(self):
+        WindRollup.record([self._reading(at(9), Wind.STATUS_WIND_OFF), self._reading(at(9, 30), Wind.STATUS_WIND_ON)])
+        self.assertEqual(WindRollup.objects.get(period=PERIOD_HOUR, start=at(9)).on_seconds, 0)
+
+    def test_bucket_created_by_on_time_gets_min_and_max_later(self):
+        WindRollup.record([self._reading(at(9, 30), Wind.STATUS_WIND_ON)])
+        WindRollup.record([self._reading(at(12, 15), Wind.STATUS_WIND_OFF)])
+
+        # 10:00 and 11:00 only saw on-time, 12:00 also has the off reading
+        self.assertIsNone(WindRollup.objects.get(period=PERIOD_HOUR, start=at(11)).speed_min)
+        noon = WindRollup.objects.get(period=PERIOD_HOUR, start=at(12))
+        self.assertEqual((noon.count, noon.status_min, noon.status_max, noon.on_seconds), (1, 0, 0, 15 * 60))
@@ -0,0 +1,139 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+from django.test import SimpleTestCase
+
+from xenolab.scheduler import CronRule, DEFAULT_SCHEDULES, IntervalRule, Scheduler
+
+AUCKLAND = ZoneInfo('Pacific/Auckland')
+UTC = datetime.timezone.utc
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def local(year, month, day, hour=0, minute=0, fold=0):
+    return datetime.datetime(year, month, day, hour, minute, tzinfo=AUCKLAND, fold=fold)
+
+
+def wall(when):
+    """Local wall-clock time and UTC offset in hours, e.g. ('03:00', 13)"""
+    when = when.astimezone(AUCKLAND)
+    return when.strftime('%H:%M'), when.utcoffset().total_seconds() / 3600
+
+
+class SpringForwardTests(SimpleTestCase):
+    """2025-09-28: clocks go from 02:00 NZST straight to 03:00 NZDT"""
+
+    def test_skipped_time_fires_when_the_clock_jumps_past_it(self):
+        rule = CronRule('30 2 * * *', AUCKLAND)
+        fire = rule.next_after(local(2025, 9, 28, 1))
+        self.assertEqual(wall(fire), ('03:00', 13))
+        self.assertEqual(fire.astimezone(UTC), datetime.datetime(2025, 9, 27, 14, 0, tzinfo=UTC))
+
+    def test_skipped_time_fires_once_and_resumes_the_next_day(self):
+        rule = CronRule('30 2 * * *', AUCKLAND)
+        fire = rule.next_after(local(2025, 9, 28, 1))
+        following = rule.next_after(fire)
+        self.assertEqual((following.date(), wall(following)), (datetime.date(2025, 9, 29), ('02:30', 13)))
+
+    def test_hourly_rule_does_not_fire_twice_at_the_jump(self):
+        scheduler = Scheduler([{'cron': '0 * * * *', 'action': 'read'}], tz=AUCKLAND, now=local(2025, 9, 28, 0, 30))
+        firings = [wall(when) for when, _, _ in scheduler.upcoming(4, after=local(2025, 9, 28, 0, 30))]
+        self.assertEqual(firings, [('01:00', 12), ('03:00', 13), ('04:00', 13), ('05:00', 13)])
+
+
+class FallBackTests(SimpleTestCase):
+    """2025-04-06: clocks go from 03:00 NZDT back to 02:00 NZST, so 02:00-02:59 happens twice"""
+
+    def test_repeated_time_fires_once_the_first_time(self):
+        rule = CronRule('30 2 * * *', AUCKLAND)
+        fire = rule.next_after(local(2025, 4, 6, 1))
+        self.assertEqual(wall(fire), ('02:30', 13))
+
+        # Not again an hour later when 02:30 comes round in standard time
+        following = rule.next_after(fire)
+        self.assertEqual((following.date(), wall(following)), (datetime.date(2025, 4, 7), ('02:30', 12)))
+
+    def test_hourly_rule_fires_once_per_wall_clock_hour(self):
+        after = local(2025, 4, 6, 0, 30)
+        scheduler = Scheduler([{'cron': '0 * * * *', 'action': 'read'}], tz=AUCKLAND, now=after)
+        firings = [wall(when) for when, _, _ in scheduler.upcoming(4, after=after)]
+        self.assertEqual(firings, [('01:00', 13), ('02:00', 13), ('03:00', 12), ('04:00', 12)])
+
+    def test_rule_inside_the_repeated_hour_is_not_refired_from_the_second_pass(self):
+        rule = CronRule('45 2 * * *', AUCKLAND)
+        # 02:15 standard time, after the first 02:45 has already fired
+        after = local(2025, 4, 6, 2, 15, fold=1)
+        self.assertEqual(rule.next_after(after).date(), datetime.date(2025, 4, 7))
+
+    def test_scheduler_started_in_the_repeated_hour_waits_for_tomorrow(self):
+        # e.g. xenolabd restarting at 02:15 standard time
+        now = local(2025, 4, 6, 2, 15, fold=1)
+        scheduler = Scheduler([{'cron': '45 2 * * *', 'action': 'on'}], tz=AUCKLAND, now=now)
+        self.assertEqual(scheduler.pop_due(local(2025, 4, 6, 2, 50, fold=1)), [])
+        self.assertEqual(scheduler.sleep_seconds(now, max_sleep=SECONDS_PER_DAY), SECONDS_PER_DAY)
+
+
+class LastActionTests(SimpleTestCase):
+
+    def _wind(self, now):
+        return Scheduler(DEFAULT_SCHEDULES['wind'], tz=AUCKLAND, now=now)
+
+    def test_restores_the_most_recent_action(self):
+        for hour, expected in ((10, 'on'), (21, 'off'), (7, 'off'), (8, 'on')):
+            now = local(2025, 6, 10, hour)
+            self.assertEqual(self._wind(now).last_action(now), expected, f"at {hour}:00")
+
+    def test_restores_across_a_dst_change(self):
+        # Spring forward morning, before the wind comes on: yesterday's 20:00 off still applies
+        now = local(2025, 9, 28, 3, 30)
+        self.assertEqual(self._wind(now).last_action(now), 'off')
+
+    def test_nothing_fired_in_the_lookback(self):
+        now = local(2025, 6, 10, 12)
+        scheduler = Scheduler([{'cron': '0 0 31 2 *', 'action': 'on'}], tz=AUCKLAND, now=now)
+        self.assertIsNone(scheduler.last_action(now))
+
+
+class SchedulerTests(SimpleTestCase):
+
+    def test_missed_firings_are_collapsed(self):
+        start = local(2025, 6, 10, 12)
+        scheduler = Scheduler([{'every': 60, 'action': 'read'}], tz=AUCKLAND, now=start)
+        # Asleep for ten minutes: the action runs once, then waits for the next minute
+        now = start + datetime.timedelta(minutes=10, seconds=5)
+        self.assertEqual(scheduler.pop_due(now), ['read'])
+        self.assertEqual(scheduler.pop_due(now), [])
+        self.assertEqual(scheduler.sleep_seconds(now), 55)
+
+    def test_due_actions_come_out_oldest_first(self):
+        start = local(2025, 6, 10, 7, 30)
+        scheduler = Scheduler(DEFAULT_SCHEDULES['wind'], tz=AUCKLAND, now=start)
+        self.assertEqual(scheduler.pop_due(local(2025, 6, 10, 21)), ['on', 'off'])
+
+    def test_sleep_is_capped(self):
+        now = local(2025, 6, 10, 12)
+        scheduler = Scheduler(DEFAULT_SCHEDULES['wind'], tz=AUCKLAND, now=now)
+        self.assertEqual(scheduler.sleep_seconds(now, max_sleep=3600), 3600)
+
+    def test_interval_rule_is_aligned_to_the_epoch(self):
+        rule = IntervalRule(900, AUCKLAND)
+        self.assertEqual(wall(rule.next_after(local(2025, 6, 10, 12, 7))), ('12:15', 12))
+
+    def test_invalid_entries_are_rejected(self):
+        for entries in (
+            [{'cron': '0 25 * * *', 'action': 'on'}],
+            [{'cron': '0 8 * *', 'action': 'on'}],
+            [{'cron': 'x 8 * * *', 'action': 'on'}],
+            [{'every': 0, 'action': 'on'}],
+            [{'action': 'on'}],
+            [{'cron': '0 8 * * *', 'action': 'spin'}],
+        ):
+            with self.subTest(entries=entries), self.assertRaises(ValueError):
+                Scheduler(entries, actions=('on', 'off'), tz=AUCKLAND)
+
+    def test_day_of_month_and_day_of_week_match_either(self):
+        # The 1st of the month or any Monday, like cron
+        rule = CronRule('0 9 1 * 1', AUCKLAND)
+        fire = rule.next_after(local(2025, 6, 1, 10))
+        self.assertEqual(fire.date(), datetime.date(2025, 6, 2))
+        self.assertEqual(rule.next_after(local(2025, 6, 28, 10)).date(), datetime.date(2025, 6, 30))
@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from sunlight.models import Sunlight, SunlightRollup
+from xenolab.writebuffer import ReadingBuffer
+
+
+def color(level, status=Sunlight.STATUS_SUNLIGHT_ON):
+    return {'r': level, 'g': level, 'b': level, 'brightness': level, 'status': status}
+
+
+class ReadingBufferTests(TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('xenolab.writebuffer.time.monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _buffer(self, **kwargs):
+        options = {'deadband': 0.01, 'max_rows': 60, 'max_age': 300, 'heartbeat': 3600, **kwargs}
+        return ReadingBuffer(Sunlight, fields=('r', 'g', 'b', 'brightness'), status_field='status', rollup_model=SunlightRollup, **options)
+
+    def test_changes_within_the_deadband_are_dropped(self):
+        buffer = self._buffer()
+        self.assertTrue(buffer.add(**color(0.5)))
+        self.assertFalse(buffer.add(**color(0.505)))
+        self.assertFalse(buffer.add(**color(0.509)))
+        self.assertTrue(buffer.add(**color(0.52)))
+        self.assertEqual((buffer.offered, buffer.kept), (4, 2))
+
+    def test_deadband_is_measured_from_the_last_kept_reading(self):
+        buffer = self._buffer()
+        buffer.add(**color(0.5))
+        # Each step is inside the deadband, but together they drift out of it
+        kept = [buffer.add(**color(0.5 + step * 0.004)) for step in range(1, 4)]
+        self.assertEqual(kept, [False, False, True])
+
+    def test_status_change_is_kept_and_flushed(self):
+        buffer = self._buffer()
+        buffer.add(**color(0.0, Sunlight.STATUS_SUNLIGHT_OFF))
+        self.assertEqual(Sunlight.objects.count(), 0)
+
+        self.assertTrue(buffer.add(**color(0.0, Sunlight.STATUS_SUNLIGHT_ON)))
+        self.assertEqual(list(Sunlight.objects.order_by('timestamp').values_list('status', flat=True)), [0, 1])
+        self.assertEqual(buffer.pending, [])
+
+    def test_heartbeat_keeps_a_flat_series(self):
+        buffer = self._buffer(heartbeat=60)
+        buffer.add(**color(0.3))
+        self.now += 59
+        self.assertFalse(buffer.add(**color(0.3)))
+        self.now += 1
+        self.assertTrue(buffer.add(**color(0.3)))
+
+    def test_flushes_by_row_count(self):
+        buffer = self._buffer(max_rows=3)
+        for level in (0.1, 0.2):
+            buffer.add(**color(level))
+        self.assertEqual(Sunlight.objects.count(), 0)
+
+        buffer.add(**color(0.3))
+        self.assertEqual(Sunlight.objects.count(), 3)
+        self.assertEqual(buffer.flushes, 1)
+
+    def test_flushes_by_age(self):
+        buffer = self._buffer(max_age=300)
+        buffer.add(**color(0.1))
+        self.now += 299
+        buffer.add(**color(0.2))
+        self.assertEqual(Sunlight.objects.count(), 0)
+
+        # Even a reading inside the deadband triggers the overdue flush
+        self.now += 1
+        self.assertFalse(buffer.add(**color(0.2)))
+        self.assertEqual(Sunlight.objects.count(), 2)
+
+    def test_flush_records_rollups_and_hands_off_to_the_writer(self):
+        writer = mock.Mock()
+        buffer = self._buffer(writer=writer)
+        buffer.add(**color(0.4))
+        self.assertEqual(buffer.flush(), 1)
+
+        # Nothing is written on the caller's thread; the writer runs the batch
+        self.assertEqual(Sunlight.objects.count(), 0)
+        fn, readings = writer.submit.call_args.args
+        fn(readings)
+        self.assertEqual(Sunlight.objects.count(), 1)
+        self.assertEqual(SunlightRollup.objects.filter(period='hour').get().count, 1)
+
+    def test_on_write_runs_after_the_batch_is_committed(self):
+        seen = []
+        buffer = self._buffer(on_write=lambda readings: seen.append((len(readings), Sunlight.objects.count())))
+        buffer.add(**color(0.1))
+        buffer.add(**color(0.2))
+        self.assertEqual(seen, [])
+
+        buffer.flush()
+        self.assertEqual(seen, [(2, 2)])
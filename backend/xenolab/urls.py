@@ -19,8 +19,8 @@ from django.urls import path
 from wind.views import wind_data
 from sunlight.views import sunlight_data
 from temphumidity.views import temphumidity_data
-from camera.views import camera_stream, camera_frame, camera_status, camera_control
-from xenolab.views import get_lifeform_data, map_png, get_atmospherics
+from camera.views import camera_stream, camera_frame, camera_snapshot, camera_status, camera_control, camera_timelapse, camera_timelapse_frame, camera_timelapse_stream
+from xenolab.views import get_lifeform_data, switch_lifeform, map_png, get_atmospherics, dashboard, state_events
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -33,13 +33,21 @@ urlpatterns = [
     path('camera/stream/', camera_stream, name='default_camera_stream'),  # Default camera
     path('camera/frame/<int:camera_id>/', camera_frame, name='camera_frame'),
     path('camera/frame/', camera_frame, name='default_camera_frame'),  # Default camera
+    path('camera/snapshot/<int:camera_id>/', camera_snapshot, name='camera_snapshot'),
+    path('camera/snapshot/', camera_snapshot, name='default_camera_snapshot'),  # Default camera
     path('camera/status/<int:camera_id>/', camera_status, name='camera_status'),
     path('camera/status/', camera_status, name='default_camera_status'),  # Default camera
     path('camera/control/<int:camera_id>/', camera_control, name='camera_control'),
     path('camera/control/', camera_control, name='default_camera_control'),  # Default camera
+    path('camera/timelapse/', camera_timelapse, name='camera_timelapse'),
+    path('camera/timelapse/frame/', camera_timelapse_frame, name='camera_timelapse_frame'),
+    path('camera/timelapse/stream/', camera_timelapse_stream, name='camera_timelapse_stream'),
     
     # Xenolab endpoints
     path('lifeform/', get_lifeform_data, name='get_lifeform_data'),
+    path('lifeform/profile/', switch_lifeform, name='switch_lifeform'),
     path('map/', map_png, name='map_png'),
     path('atmospherics/', get_atmospherics, name='get_atmospherics'),
+    path('dashboard/', dashboard, name='dashboard'),
+    path('events/', state_events, name='state_events'),
 ]
@@ -1,48 +1,121 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
 from django.http import JsonResponse
-from django.http import HttpResponse
-import json
-from sunlight.models import Sunlight
-from wind.models import Wind
-
-
-from django.conf import settings
+from django.http import FileResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+import asyncio
+import time
+from xenolab.dashboard import atmospherics_state, dashboard_state, SNAPSHOT_FALLBACKS
+from xenolab.events import StateEventStream, XENOLAB_EVENTS_POLL
+from xenolab.history import parse_num_records
+from xenolab.lifeform import lifeform_payload, registry
 
 
 def get_lifeform_data(request):
     
-    lifeform_dir = settings.BASE_DIR / 'assets' / 'lifeform.json'
-    lifeform_data = json.load(open(lifeform_dir, 'r'))
+    version, payload = lifeform_payload()
+    return _conditional_json(request, payload, f'"lifeform-{version}"')
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def switch_lifeform(request):
+    """Make another assets/lifeform.<profile>.json the active lifeform"""
+    try:
+        registry.switch(request.POST.get('profile', ''))
+    except ValueError as e:
+        return JsonResponse({'error': 'Invalid profile', 'details': str(e)}, status=400)
     
-    return JsonResponse(lifeform_data, safe=False)
+    version, payload = lifeform_payload()
+    return JsonResponse(payload)
 
 
 def map_png(request):
     
-    lifeform_dir = settings.BASE_DIR / 'assets' / 'lifeform.json'
-    lifeform_data = json.load(open(lifeform_dir, 'r'))
+    asset = registry.map()
+    if asset is None:
+        return JsonResponse({'error': 'No map for the active lifeform'}, status=404)
+    
+    response = get_conditional_response(request, etag=asset.etag, last_modified=int(asset.modified))
+    if response is None:
+        # FileResponse streams the file and closes it when done
+        response = FileResponse(open(asset.path, 'rb'))
     
-    map_dir = settings.BASE_DIR / 'assets' / lifeform_data['map']
-    map_data = open(map_dir, 'rb').read()
-    return HttpResponse(map_data, content_type='image/png')
+    response['ETag'] = asset.etag
+    response['Last-Modified'] = http_date(asset.modified)
+    # lifeform_payload's map_url carries the version, so that URL can be cached for good
+    if request.GET.get('v') == asset.version:
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _conditional_json(request, payload, etag):
+    if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    
+    if etag in if_none_match or '*' in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(payload)
+    
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
 
 
 def get_atmospherics(request):
     
-    sunlight = Sunlight.objects.all().order_by('-timestamp')[:1]
-    wind = Wind.objects.all().order_by('-timestamp')[:1]
-
-    payload = {
-        'sunlight': {
-            'status': sunlight[0].status,   
-            'r': sunlight[0].r,
-            'g': sunlight[0].g,
-            'b': sunlight[0].b,
-            'brightness': sunlight[0].brightness,
-        },
-        'wind': {
-            'status': wind[0].status,
-            'speed': wind[0].speed,
-        },
-    }
+    payload, etag = atmospherics_state()
+    return _conditional_json(request, payload, etag)
+
+
+def dashboard(request):
+    """Lifeform, atmospherics and the temperature/humidity series in one response"""
+    try:
+        num_records = parse_num_records(request)
+    except ValueError as e:
+        return JsonResponse({'error': 'Invalid num_records', 'details': str(e)}, status=400)
     
-    return JsonResponse(payload)
+    payload, etag = dashboard_state(num_records)
+    return _conditional_json(request, payload, etag)
+
+
+def generate_events(stream):
+    """Blocking generator for WSGI servers; pins a thread per client"""
+    yield stream.initial()
+    while True:
+        time.sleep(XENOLAB_EVENTS_POLL)
+        chunk = stream.poll(XENOLAB_EVENTS_POLL)
+        if chunk:
+            yield chunk
+
+
+async def generate_events_async(stream):
+    """Async generator for ASGI; an idle client is a sleeping coroutine and a few stat() calls per poll"""
+    # The cold-start fallback may query the database, so keep it off the event loop
+    yield await sync_to_async(stream.initial, thread_sensitive=False)()
+    while True:
+        await asyncio.sleep(XENOLAB_EVENTS_POLL)
+        chunk = stream.poll(XENOLAB_EVENTS_POLL)
+        if chunk:
+            yield chunk
+
+
+@require_http_methods(["GET"])
+def state_events(request):
+    """Server-Sent Events stream of sunlight, wind and temperature/humidity state changes"""
+    stream = StateEventStream(request.META.get('HTTP_LAST_EVENT_ID'), SNAPSHOT_FALLBACKS)
+    
+    if isinstance(request, ASGIRequest):
+        events = generate_events_async(stream)
+    else:
+        events = generate_events(stream)
+    
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
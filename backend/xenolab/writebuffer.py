@@ -0,0 +1,90 @@
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+
+class ReadingBuffer:
+    """
+    Coalesces a worker's readings and writes them in batches.
+
+    A reading is only kept if its status changed, a field moved by more than
+    ``deadband`` since the last kept reading, or ``heartbeat`` seconds passed
+    (so a flat series still shows up). Kept readings are written with one
+    bulk_create, in one transaction, once ``max_rows`` are pending, the oldest
+    is ``max_age`` seconds old, or the status changed. With a ``writer`` (see
+    xenolab.daemon.DatabaseWriter) the batch is handed over rather than
+    written on the caller's thread. ``on_write`` is called with each batch
+    once its transaction has committed, on whichever thread wrote it.
+    """
+
+    def __init__(self, model, fields, status_field=None, rollup_model=None, deadband=0.01, max_rows=60, max_age=300, heartbeat=3600, writer=None, on_write=None):
+        self.model = model
+        self.fields = fields
+        self.status_field = status_field
+        self.rollup_model = rollup_model
+        self.deadband = deadband
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.heartbeat = heartbeat
+        self.writer = writer
+        self.on_write = on_write
+        self.pending = []
+        self.pending_since = None
+        self.last_values = None
+        self.last_kept = None
+        self.offered = 0
+        self.kept = 0
+        self.flushes = 0
+
+    def _changed(self, values):
+        if self.last_values is None:
+            return True
+        if self.status_field and values[self.status_field] != self.last_values[self.status_field]:
+            return True
+        return any(abs(values[field] - self.last_values[field]) > self.deadband for field in self.fields)
+
+    def add(self, **values):
+        """Offer a reading; returns True if it will be written"""
+        self.offered += 1
+        now = time.monotonic()
+        status_changed = (
+            self.status_field is not None and self.last_values is not None
+            and values[self.status_field] != self.last_values[self.status_field]
+        )
+
+        keep = self._changed(values) or now - self.last_kept >= self.heartbeat
+        if keep:
+            if not self.pending:
+                self.pending_since = now
+            self.pending.append(self.model(timestamp=timezone.now(), **values))
+            self.last_values = values
+            self.last_kept = now
+            self.kept += 1
+
+        if self.pending and (status_changed or len(self.pending) >= self.max_rows or now - self.pending_since >= self.max_age):
+            self.flush()
+        return keep
+
+    def _write(self, readings):
+        with transaction.atomic():
+            self.model.objects.bulk_create(readings)
+            if self.rollup_model is not None:
+                self.rollup_model.record(readings)
+        if self.on_write is not None:
+            self.on_write(readings)
+
+    def flush(self):
+        """Write every pending reading; returns how many were written"""
+        if not self.pending:
+            return 0
+
+        readings = self.pending
+        if self.writer is not None:
+            self.writer.submit(self._write, readings)
+        else:
+            self._write(readings)
+
+        self.pending = []
+        self.flushes += 1
+        return len(readings)